@@ -5,12 +5,37 @@ A tool that captures screenshots and uses OpenAI's GPT-4 Vision API to analyze
 and log user actions for productivity tracking and analysis.
 """
 
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
 __version__ = "1.0.0"
 __author__ = "Michael Kim"
 __email__ = "mjunyeopkim@gmail.com"
 
-from .core import ActivityLogger
-# from .app import ActivityLoggerApp
-from .settings import Settings
+if TYPE_CHECKING:
+    from .core import ActivityLogger
+    # from .app import ActivityLoggerApp
+    from .settings import Settings
+
+# Public names and the submodule defining them. They are imported on first
+# access (PEP 562), so `import activity_logger.cli` doesn't load OpenCV,
+# NumPy, OpenAI or keyring until they are used.
+_LAZY_ATTRIBUTES = {
+    "ActivityLogger": ".core",
+    "Settings": ".settings",
+}
 
 __all__ = ["ActivityLogger", "Settings"]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
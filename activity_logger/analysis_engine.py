@@ -0,0 +1,275 @@
+"""
+Asyncio engine for OpenAI requests.
+
+One event loop runs on a background thread with a single AsyncOpenAI client,
+so every request shares one pooled set of HTTP connections. Requests are
+limited by a max-in-flight semaphore and an optional token-bucket rate
+limiter, and 429/5xx/connection errors are retried with exponential backoff
+and full jitter (honouring Retry-After).
+
+Worker threads call ``create(**kwargs)`` (blocking) or ``submit(**kwargs)``
+(returns a concurrent.futures.Future).
+"""
+
+import asyncio
+import concurrent.futures
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` tokens per second, holding at most ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        # asyncio.Lock binds to the loop it is first used on; the engine gets a
+        # new loop on every start(), so the lock is recreated per loop
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available. Returns seconds waited."""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                delay = (1.0 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, (openai.APIConnectionError, openai.RateLimitError)):
+        return True  # APITimeoutError is a subclass of APIConnectionError
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code in (408, 409)
+    return False
+
+
+def is_permanent_error(error: BaseException) -> bool:
+    """A 4xx the API will keep returning for the same request (bad key, payload too large, ...)."""
+    import openai
+    return (isinstance(error, openai.APIStatusError) and 400 <= error.status_code < 500
+            and not _is_retryable(error) and not isinstance(error, openai.RateLimitError))
+
+
+class AnalysisEngine:
+    """Rate-limited, retrying AsyncOpenAI client on a dedicated event-loop thread."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_in_flight: int = 4,
+        requests_per_minute: Optional[float] = None,
+        burst: int = 1,
+        max_retries: int = 6,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        timeout: float = 60.0,
+    ) -> None:
+        """
+        Args:
+            api_key: OpenAI API key
+            base_url: Alternative OpenAI-compatible endpoint
+            max_in_flight: Concurrent requests (also the connection pool size)
+            requests_per_minute: Token-bucket rate limit; None disables it
+            burst: Requests allowed back to back before the rate limit applies
+            max_retries: Retries for 429/5xx/connection errors before giving up
+            base_delay, max_delay: Exponential backoff bounds in seconds
+            timeout: Per-attempt request timeout in seconds. create() gives up after
+                all attempts and backoff delays could have run (see request_deadline).
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst) if requests_per_minute else None
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client: Any = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._start_error: Optional[BaseException] = None
+
+        self.requests = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.throttle_seconds = 0.0
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            ready = threading.Event()
+            self._start_error = None
+            thread = threading.Thread(target=self._run_loop, args=(ready,), name="analysis-engine", daemon=True)
+            thread.start()
+            ready.wait()
+            if self._start_error is not None:
+                thread.join()
+                raise RuntimeError(f"Could not start the analysis engine: {self._start_error}")
+            self._thread = thread
+
+    def _run_loop(self, ready: threading.Event) -> None:
+        try:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(max_connections=self.max_in_flight, max_keepalive_connections=self.max_in_flight),
+            )
+            # Retries are handled here so they respect the semaphore and rate limiter
+            self._client = AsyncOpenAI(
+                api_key=self.api_key, base_url=self.base_url, http_client=http_client,
+                max_retries=0, timeout=self.timeout,
+            )
+            self._loop = loop
+        except BaseException as e:
+            self._start_error = e
+            ready.set()
+            return
+        ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # Cancel requests still running so their futures resolve instead of hanging callers
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(self._client.close())
+            loop.close()
+
+    @property
+    def request_deadline(self) -> float:
+        """Longest a request can take with every attempt timing out and the longest backoffs."""
+        return self.timeout * (self.max_retries + 1) + self.max_delay * self.max_retries
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        delay = random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        return delay
+
+    async def _create(self, **kwargs: Any) -> Any:
+        with self._stats_lock:
+            self.requests += 1
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                if self.bucket is not None:
+                    waited = await self.bucket.acquire()
+                    with self._stats_lock:
+                        self.throttle_seconds += waited
+                with self._stats_lock:
+                    self.attempts += 1
+                    self.in_flight += 1
+                try:
+                    return await self._client.chat.completions.create(**kwargs)
+                except Exception as e:
+                    error = e
+                finally:
+                    with self._stats_lock:
+                        self.in_flight -= 1
+
+            import openai
+            with self._stats_lock:
+                if isinstance(error, openai.RateLimitError):
+                    self.rate_limited += 1
+                retry = attempt < self.max_retries and _is_retryable(error)
+                if retry:
+                    self.retries += 1
+                else:
+                    self.failures += 1
+            if not retry:
+                raise error
+            delay = self._backoff(attempt, error)
+            print(f"API request failed ({error.__class__.__name__}); retrying in {delay:.1f}s")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def submit(self, **kwargs: Any) -> "concurrent.futures.Future[Any]":
+        """Schedule a chat.completions.create call; returns a thread-safe future."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(self._create(**kwargs), self._loop)
+
+    def create(self, deadline: Optional[float] = None, **kwargs: Any) -> Any:
+        """Blocking chat.completions.create with rate limiting and retries.
+
+        Raises concurrent.futures.TimeoutError after ``deadline`` seconds (default
+        request_deadline), or CancelledError if the engine stops meanwhile.
+        """
+        future = self.submit(**kwargs)
+        try:
+            return future.result(self.request_deadline if deadline is None else deadline)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+            self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "requests": self.requests,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "rate_limited": self.rate_limited,
+                "in_flight": self.in_flight,
+                "throttle_seconds": self.throttle_seconds,
+            }
@@ -69,6 +69,7 @@ class ActivityLoggerApp(rumps.App):
                 api_key=api_key,
                 screenshot_folder=self.settings.get_screenshot_folder(),
                 log_dir=self.settings.get_log_dir(),
+                archive_after_days=self.settings.get_archive_after_days(),
                 on_status_change=self._on_logger_status_change,
                 capture_mode="focused_window",
             )
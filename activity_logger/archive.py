@@ -0,0 +1,324 @@
+"""
+Compressed, seekable archive of old daily logs.
+
+Daily logs older than ``keep_days`` are moved into one archive per month,
+``<log_dir>/archive/actions_log_YYYY-MM.gz``. The archive is a sequence of
+independently compressed gzip members ("chunks", ~64 KiB of log lines each,
+never spanning two log files), so ``gzip -dc`` still reads it as a whole.
+A JSON sidecar (``actions_log_YYYY-MM.idx``) records for every chunk the
+original file name, its byte range in the archive, its byte range in the
+original log, and the first/last timestamp it covers. Readers decompress
+only the chunks that overlap the day or time range they ask for.
+
+Archiving is crash-safe: chunks are appended and fsynced, the sidecar is
+replaced atomically, the chunks are read back and compared with the
+original, and only then is the original log removed. Bytes past
+the end recorded in the sidecar (from an interrupted run) are truncated on
+the next run.
+"""
+
+import datetime
+import gzip
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+ARCHIVE_DIRNAME = "archive"
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_LOG_NAME = re.compile(r"^actions_log_(\d\d)-(\d\d)-(\d\d)\.(txt|jsonl)$")
+
+
+def log_day(name: str) -> Optional[datetime.date]:
+    """Day of a daily log file name ('actions_log_MM-DD-YY.txt'), or None."""
+    m = _LOG_NAME.match(name)
+    if not m:
+        return None
+    return datetime.date(2000 + int(m.group(3)), int(m.group(1)), int(m.group(2)))
+
+
+def line_timestamp(line: str) -> Optional[str]:
+    """ISO timestamp ('YYYY-MM-DDTHH:MM:SS') of a .txt or .jsonl log line."""
+    if line.startswith("["):
+        return line[1:20].replace(" ", "T") if len(line) > 20 and line[20] == "]" else None
+    if line.startswith("{"):
+        try:
+            value = json.loads(line).get("captured_at")
+        except (ValueError, AttributeError):
+            return None
+        return value[:19] if isinstance(value, str) else None
+    return None
+
+
+def _month_key(day: datetime.date) -> str:
+    return day.strftime("%Y-%m")
+
+
+class LogArchive:
+    """One month's archive file and its chunk index."""
+
+    def __init__(self, directory: str, month: str) -> None:
+        self.path = os.path.join(directory, f"actions_log_{month}.gz")
+        self.index_path = os.path.join(directory, f"actions_log_{month}.idx")
+        self.chunks: List[Dict[str, Any]] = []
+        # Archived source files as [name, size, mtime_ns], to recognise a file
+        # whose removal was interrupted
+        self.files: List[List[Any]] = []
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.chunks = index["chunks"]
+            self.files = index.get("files", [])
+
+    @property
+    def end(self) -> int:
+        return max((c["offset"] + c["length"] for c in self.chunks), default=0)
+
+    def names(self) -> List[str]:
+        seen: Dict[str, None] = {}
+        for chunk in self.chunks:
+            seen.setdefault(chunk["name"], None)
+        return list(seen)
+
+    def raw_size(self, name: str) -> int:
+        return max((c["raw_offset"] + c["raw_length"] for c in self.chunks if c["name"] == name), default=0)
+
+    def contains(self, name: str, stat: os.stat_result) -> bool:
+        return [name, stat.st_size, stat.st_mtime_ns] in self.files
+
+    def add(self, name: str, data: bytes, stat: os.stat_result, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """Append one log file's contents as compressed chunks. Returns archived bytes.
+
+        A file archived earlier under the same name (late entries written after
+        archival) continues at the raw offset where the previous one ended.
+        """
+        base = self.raw_size(name)
+        chunks: List[Tuple[int, bytes]] = []
+        start = 0
+        while start < len(data):
+            end = min(len(data), start + chunk_size)
+            if end < len(data):
+                # Cut after the last complete line; a single huge line becomes its own chunk
+                newline = data.rfind(b"\n", start, end)
+                if newline < start:
+                    newline = data.find(b"\n", end)
+                end = newline + 1 if newline >= 0 else len(data)
+            chunks.append((base + start, data[start:end]))
+            start = end
+
+        with open(self.path, "ab") as f:
+            f.truncate(self.end)  # drop leftovers of an interrupted run
+            f.seek(self.end)
+            for raw_offset, raw in chunks:
+                stamps = [ts for ts in map(line_timestamp, raw.decode("utf-8", errors="replace").splitlines()) if ts]
+                compressed = gzip.compress(raw, compresslevel=6, mtime=0)
+                self.chunks.append({
+                    "name": name,
+                    "offset": f.tell(),
+                    "length": len(compressed),
+                    "raw_offset": raw_offset,
+                    "raw_length": len(raw),
+                    "first": min(stamps) if stamps else None,
+                    "last": max(stamps) if stamps else None,
+                })
+                f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            self.files.append([name, stat.st_size, stat.st_mtime_ns])
+            json.dump({"version": 1, "chunks": self.chunks, "files": self.files}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_path)
+        return len(data)
+
+    def matches(self, name: str, data: bytes, base: int) -> bool:
+        """True if the chunks of ``name`` from raw offset ``base`` decompress to ``data``."""
+        try:
+            return b"".join(raw for _, raw in self.iter_chunks(name, from_raw_offset=base)) == data
+        except (OSError, EOFError, zlib.error):
+            return False
+
+    def read_chunk(self, chunk: Dict[str, Any], f: Any = None) -> bytes:
+        if f is None:
+            with open(self.path, "rb") as f:
+                return self.read_chunk(chunk, f)
+        f.seek(chunk["offset"])
+        return gzip.decompress(f.read(chunk["length"]))
+
+    def iter_chunks(
+        self,
+        name: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        from_raw_offset: int = 0,
+    ) -> Iterator[Tuple[Dict[str, Any], bytes]]:
+        """Decompress only the chunks of ``name`` overlapping [since, until] (ISO strings)."""
+        selected = [
+            c for c in self.chunks
+            if (name is None or c["name"] == name)
+            and c["raw_offset"] + c["raw_length"] > from_raw_offset
+            and not (since and c["last"] and c["last"] < since)
+            and not (until and c["first"] and c["first"] > until)
+        ]
+        if not selected:
+            return
+        with open(self.path, "rb") as f:
+            for chunk in selected:
+                yield chunk, self.read_chunk(chunk, f)
+
+
+class ArchiveReader:
+    """Reads log lines for a day or time range from live logs and archives alike."""
+
+    def __init__(self, log_dir: str) -> None:
+        self.log_dir = log_dir
+        self.archive_dir = os.path.join(log_dir, ARCHIVE_DIRNAME)
+
+    def archives(self) -> List[LogArchive]:
+        if not os.path.isdir(self.archive_dir):
+            return []
+        months = sorted(
+            name[len("actions_log_"):-len(".idx")]
+            for name in os.listdir(self.archive_dir)
+            if name.startswith("actions_log_") and name.endswith(".idx")
+        )
+        return [LogArchive(self.archive_dir, month) for month in months]
+
+    def archived_names(self) -> Dict[str, LogArchive]:
+        """Archived log file name -> the archive holding it."""
+        return {name: archive for archive in self.archives() for name in archive.names()}
+
+    def read_range(
+        self,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        fmt: str = "txt",
+    ) -> Iterator[str]:
+        """Log lines (without newline) captured in [start, end], day by day."""
+        since = start.isoformat(timespec="seconds")
+        until = end.isoformat(timespec="seconds")
+        archived = self.archived_names()
+        day = start.date()
+        while day <= end.date():
+            name = f"actions_log_{day.strftime('%m-%d-%y')}.{fmt}"
+            for line in self._day_lines(name, archived.get(name), since, until):
+                ts = line_timestamp(line)
+                if ts is None or since <= ts <= until:
+                    yield line
+            day += datetime.timedelta(days=1)
+
+    def _day_lines(self, name: str, archive: Optional[LogArchive], since: str, until: str) -> Iterator[str]:
+        if archive is not None:
+            for _, raw in archive.iter_chunks(name, since, until):
+                yield from raw.decode("utf-8", errors="replace").splitlines()
+        path = os.path.join(self.log_dir, name)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    yield line.rstrip("\n")
+
+
+class LogArchiver:
+    """Background job moving daily logs older than ``keep_days`` into monthly archives."""
+
+    def __init__(
+        self,
+        log_dir: str,
+        keep_days: int = 30,
+        interval: float = 6 * 3600.0,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ) -> None:
+        """
+        Args:
+            log_dir: Directory holding the daily logs
+            keep_days: Logs from the last keep_days days stay uncompressed
+            interval: Seconds between archival passes
+            chunk_size: Uncompressed bytes per independently readable chunk
+        """
+        self.log_dir = log_dir
+        self.archive_dir = os.path.join(log_dir, ARCHIVE_DIRNAME)
+        self.keep_days = keep_days
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.files_archived = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def run_once(self, today: Optional[datetime.date] = None) -> int:
+        """Archive every eligible log file. Returns the number of files archived."""
+        cutoff = (today or datetime.date.today()) - datetime.timedelta(days=self.keep_days)
+        due: Dict[str, List[str]] = {}
+        for name in sorted(os.listdir(self.log_dir)):
+            day = log_day(name)
+            if day is not None and day < cutoff:
+                due.setdefault(_month_key(day), []).append(name)
+        if not due:
+            return 0
+
+        os.makedirs(self.archive_dir, exist_ok=True)
+        archived = 0
+        with self._lock:
+            for month, names in due.items():
+                archive = LogArchive(self.archive_dir, month)
+                before = archive.end
+                for name in names:
+                    path = os.path.join(self.log_dir, name)
+                    stat = os.stat(path)
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    if archive.contains(name, stat):
+                        base = archive.raw_size(name) - len(data)  # removal was interrupted
+                    else:
+                        base = archive.raw_size(name)
+                        archive.add(name, data, stat, self.chunk_size)
+                        self.bytes_in += len(data)
+                    if not archive.matches(name, data, base):
+                        print(f"Archived copy of {name} could not be verified; keeping the original")
+                        continue
+                    os.remove(path)  # only once its chunks and index are on disk and read back
+                    archived += 1
+                self.bytes_out += archive.end - before
+            self.files_archived += archived
+        return archived
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="log-archiver", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                count = self.run_once()
+                if count:
+                    print(f"Archived {count} old log file(s) to {self.archive_dir}")
+            except Exception as e:
+                print(f"Log archival failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "files_archived": self.files_archived,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": self.bytes_in / self.bytes_out if self.bytes_out else 0.0,
+            }
@@ -0,0 +1,130 @@
+"""
+Micro-batching of analysis requests.
+
+Frames are collected for up to ``window`` seconds or ``max_batch`` frames,
+whichever comes first, and handed to a handler as one list so they can be
+sent in a single multi-image request. Each submit() returns a future that
+resolves to that item's entry in the handler's result list. Once stop() has
+begun, submit() returns futures that already hold an error, and an item
+whose future was cancelled before its batch was sent is left out of it.
+"""
+
+import concurrent.futures
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class AnalysisBatcher:
+    """Collects items into batches and runs ``handler(batch)`` on its own thread."""
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], List[Any]],
+        max_batch: int = 4,
+        window: float = 1.5,
+        max_pending: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            handler: Called with each batch (in submission order); returns one
+                result per item
+            max_batch: Largest batch sent in one request
+            window: Seconds to wait after the first item for more to arrive
+            max_pending: submit() blocks once this many items are waiting
+                (default: two full batches)
+        """
+        self.handler = handler
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self.max_pending = max_pending or self.max_batch * 2
+
+        self._pending: List[Tuple[Any, "concurrent.futures.Future[Any]"]] = []
+        self._first_at: Optional[float] = None
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.batches = 0
+        self.items = 0
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="analysis-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> "concurrent.futures.Future[Any]":
+        future: "concurrent.futures.Future[Any]" = concurrent.futures.Future()
+        with self._cond:
+            while len(self._pending) >= self.max_pending and not self._stopping:
+                self._cond.wait()
+            if self._stopping:
+                # The batcher thread may already have exited; nothing would resolve the future
+                future.set_exception(RuntimeError("Analysis batcher is stopped"))
+                return future
+            if not self._pending:
+                self._first_at = time.monotonic()
+            self._pending.append((item, future))
+            self._cond.notify_all()
+        return future
+
+    def _take_batch(self) -> Optional[List[Tuple[Any, "concurrent.futures.Future[Any]"]]]:
+        """Block until a batch is due; returns None once stopped and drained."""
+        with self._cond:
+            while True:
+                if self._pending:
+                    due = self._first_at + self.window
+                    if len(self._pending) >= self.max_batch or self._stopping or time.monotonic() >= due:
+                        batch = self._pending[:self.max_batch]
+                        del self._pending[:self.max_batch]
+                        self._first_at = time.monotonic() if self._pending else None
+                        self._cond.notify_all()
+                        # Drop items whose caller gave up; the rest can no longer be cancelled
+                        batch = [entry for entry in batch if entry[1].set_running_or_notify_cancel()]
+                        if not batch:
+                            continue
+                        return batch
+                    self._cond.wait(max(0.0, due - time.monotonic()))
+                elif self._stopping:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                results = self.handler([item for item, _ in batch])
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                print(f"Batch analysis failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            with self._cond:
+                self.batches += 1
+                self.items += len(batch)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Flush what is pending, then stop."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "avg_batch": self.items / self.batches if self.batches else 0.0,
+                "pending": len(self._pending),
+            }
@@ -0,0 +1,174 @@
+"""
+Memory budget for captured frames in flight.
+
+A 5K BGRA frame is about 60 MB, so a burst of Enter presses can hold far
+more pixel memory than the rest of the logger. FrameBudget tracks the bytes
+held by frames that are between capture and encoding and applies an
+admission policy when a new capture would exceed the budget:
+
+    downscale  admit it, but shrink the grabbed frame to fit what is left
+               (down to ``min_scale``; smaller than that and it is dropped)
+    coalesce   skip the capture now and take one capture for the whole burst
+               as soon as enough memory has been released
+    drop       skip the capture
+
+Admission is decided before the grab, from the size of the previous frame;
+the grabbed frame is then charged with charge() and uncharged with release()
+once its pixels are no longer needed.
+"""
+
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .frame import Frame
+
+DOWNSCALE = "downscale"
+COALESCE = "coalesce"
+DROP = "drop"
+ADMISSION_POLICIES = (DOWNSCALE, COALESCE, DROP)
+
+# Pixel memory allowed for frames between capture and encoding (about four 5K frames)
+DEFAULT_MAX_FRAME_BYTES = 256 * 1024 * 1024
+
+
+def retained_bytes(frame: "Frame") -> int:
+    """Bytes kept alive by a frame, including the whole buffer a cropped view points into."""
+    base: Any = frame.pixels
+    while getattr(base, "base", None) is not None:
+        base = base.base
+    if isinstance(base, (bytes, bytearray)):
+        return max(len(base), frame.nbytes)
+    return max(getattr(base, "nbytes", 0), frame.nbytes)
+
+
+def scaled_frame(frame: "Frame", scale: float) -> "Frame":
+    """A compact copy of ``frame`` at ``scale`` of its width and height."""
+    import cv2
+
+    from .frame import Frame
+
+    size = (max(1, int(frame.width * scale)), max(1, int(frame.height * scale)))
+    pixels = cv2.resize(frame.pixels, size, interpolation=cv2.INTER_AREA)
+    return Frame(pixels, frame.order, frame.captured_at, frame.window)
+
+
+class FrameBudget:
+    """Byte budget for in-flight frames, with an admission policy for captures."""
+
+    def __init__(
+        self,
+        max_bytes: int,
+        policy: str = DOWNSCALE,
+        min_scale: float = 0.5,
+        on_available: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        """
+        Args:
+            max_bytes: Frame memory allowed between capture and encoding
+            policy: "downscale", "coalesce" or "drop" (see module docstring)
+            min_scale: Smallest downscale factor; OCR gets unreliable below ~0.5
+            on_available: Called with the first deferred request time when a
+                coalesced capture can go ahead (coalesce policy)
+        """
+        if policy not in ADMISSION_POLICIES:
+            raise ValueError(f"Unknown admission policy '{policy}'")
+        self.max_bytes = max(1, int(max_bytes))
+        self.policy = policy
+        self.min_scale = min(1.0, max(0.05, min_scale))
+        self.on_available = on_available
+
+        self._lock = threading.Lock()
+        # Size of the last full-resolution grab; the estimate for the next one
+        self._expected = 0
+        self._deferred: Optional[float] = None
+
+        # Counters (guarded by self._lock)
+        self.current_bytes = 0
+        self.peak_bytes = 0
+        self.frames = 0
+        self.admitted = 0
+        self.downscaled = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def admit(self, requested_at: float) -> bool:
+        """Decide whether a capture may be taken now. Cheap enough for the event-tap callback."""
+        with self._lock:
+            if self.policy == DOWNSCALE or self.current_bytes + self._expected <= self.max_bytes:
+                self.admitted += 1
+                return True
+            if self.policy == COALESCE:
+                self.coalesced += 1
+                if self._deferred is None:
+                    self._deferred = requested_at
+            else:
+                self.dropped += 1
+            return False
+
+    def charge(self, frame: "Frame", requested_at: Optional[float] = None) -> Tuple[Optional["Frame"], int]:
+        """Account for a grabbed frame.
+
+        Returns the frame to use (possibly downscaled) and the bytes charged
+        for it, to pass to release(); or (None, 0) if it was not admitted.
+        """
+        nbytes = retained_bytes(frame)
+        with self._lock:
+            self._expected = nbytes
+            available = self.max_bytes - self.current_bytes
+            if nbytes > available:
+                # Pixel memory scales with the square of the linear scale
+                scale = (max(0, available) / nbytes) ** 0.5
+                if self.policy != DOWNSCALE or scale < self.min_scale:
+                    if self.policy == COALESCE and requested_at is not None:
+                        # Memory filled up since admit(); retry with the next release
+                        self.coalesced += 1
+                        if self._deferred is None:
+                            self._deferred = requested_at
+                    else:
+                        self.dropped += 1
+                    return None, 0
+            else:
+                scale = 1.0
+            # Reserve before resizing so concurrent charges see it
+            reserved = int(nbytes * scale * scale)
+            self._charge(reserved)
+
+        if scale < 1.0:
+            frame = scaled_frame(frame, scale)
+            with self._lock:
+                self.downscaled += 1
+                self.current_bytes += frame.nbytes - reserved
+                reserved = frame.nbytes
+        return frame, reserved
+
+    def _charge(self, nbytes: int) -> None:
+        self.current_bytes += nbytes
+        self.peak_bytes = max(self.peak_bytes, self.current_bytes)
+        self.frames += 1
+
+    def release(self, nbytes: int) -> None:
+        """Return a frame's bytes; runs a coalesced capture if it now fits."""
+        deferred = None
+        with self._lock:
+            self.current_bytes = max(0, self.current_bytes - nbytes)
+            self.frames = max(0, self.frames - 1)
+            if self._deferred is not None and self.current_bytes + self._expected <= self.max_bytes:
+                deferred, self._deferred = self._deferred, None
+                self.admitted += 1
+        if deferred is not None and self.on_available is not None:
+            self.on_available(deferred)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "policy": self.policy,
+                "max_bytes": self.max_bytes,
+                "current_bytes": self.current_bytes,
+                "peak_bytes": self.peak_bytes,
+                "frames_in_flight": self.frames,
+                "admitted": self.admitted,
+                "downscaled": self.downscaled,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+            }
@@ -0,0 +1,466 @@
+"""
+Screen capture backends and the capture hand-off thread.
+
+Backends implement ``grab()`` and return a PIL Image (or None), and
+``grab_frame()``, which returns a frame.Frame for the pipeline; the mss
+backends wrap mss's BGRA buffer without copying it. The macOS backends import
+mss/Quartz lazily so the synthetic and file-replay backends can be used on
+Linux for benchmarks and tests.
+
+``CaptureThread`` takes the grab off the Quartz event-tap callback: the
+callback only records a timestamp with ``request()`` and returns, and the
+dedicated thread performs the actual capture.
+"""
+
+import collections
+import glob
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from .frame import Frame
+from .metrics import LatencyHistogram
+
+
+class CaptureBackend:
+    """Interface for something that can produce a screenshot."""
+
+    name = "base"
+
+    def grab(self) -> Optional[Image.Image]:
+        raise NotImplementedError
+
+    def grab_frame(self) -> Optional[Frame]:
+        """The next screenshot as a Frame. Backends that capture raw pixels override this."""
+        image = self.grab()
+        return Frame.from_image(image) if image is not None else None
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MSSBackend(CaptureBackend):
+    """Full-display capture via mss (``monitors[0]`` is the union of all monitors)."""
+
+    name = "mss"
+
+    def __init__(self, monitor_index: int = 0) -> None:
+        self.monitor_index = monitor_index
+        self._local = threading.local()
+
+    def _instance(self) -> Any:
+        # mss handles are not safe to share across threads; keep one per thread
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            import mss
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def _grab_monitor(self, monitor: Dict[str, int]) -> Frame:
+        screenshot_data = self._instance().grab(monitor)
+        width, height = screenshot_data.size
+        # ScreenShot.raw is a bytearray, so the frame is a writable view of it
+        return Frame.from_bgra(screenshot_data.raw, width, height)
+
+    def grab_frame(self) -> Optional[Frame]:
+        return self._grab_monitor(self._instance().monitors[self.monitor_index])
+
+    def grab(self) -> Optional[Image.Image]:
+        return self.grab_frame().to_image()
+
+
+def cursor_position() -> Optional[Tuple[float, float]]:
+    """Mouse location in global display points, top-left origin (macOS)."""
+    try:
+        from Quartz import CGEventCreate, CGEventGetLocation
+
+        location = CGEventGetLocation(CGEventCreate(None))
+        return float(location.x), float(location.y)
+    except Exception as e:
+        print(f"Failed to get cursor position: {e}")
+        return None
+
+
+def monitor_for_point(monitors: List[Dict[str, int]], x: float, y: float) -> Optional[Dict[str, int]]:
+    """The monitor containing (x, y), else the nearest one. ``monitors`` excludes mss's union entry."""
+    best = None
+    best_distance = None
+    for mon in monitors:
+        left, top = mon["left"], mon["top"]
+        right, bottom = left + mon["width"], top + mon["height"]
+        if left <= x < right and top <= y < bottom:
+            return mon
+        dx = max(left - x, 0, x - right + 1)
+        dy = max(top - y, 0, y - bottom + 1)
+        distance = dx * dx + dy * dy
+        if best_distance is None or distance < best_distance:
+            best, best_distance = mon, distance
+    return best
+
+
+def roi_box(
+    monitor: Dict[str, int],
+    image_size: Tuple[int, int],
+    bounds: Tuple[int, int, int, int],
+    padding: int,
+) -> Optional[Tuple[int, int, int, int]]:
+    """Pixel box of window ``bounds`` (global points) plus ``padding`` points within a monitor image.
+
+    mss reports monitor geometry in points but grabs at the backing scale, so
+    the box is scaled by image width / monitor width (2 on Retina displays).
+    Returns None if the window doesn't overlap the monitor.
+    """
+    scale_x = image_size[0] / monitor["width"]
+    scale_y = image_size[1] / monitor["height"]
+    x, y, w, h = bounds
+    left = max(0, int((x - padding - monitor["left"]) * scale_x))
+    top = max(0, int((y - padding - monitor["top"]) * scale_y))
+    right = min(image_size[0], int(round((x + w + padding - monitor["left"]) * scale_x)))
+    bottom = min(image_size[1], int(round((y + h + padding - monitor["top"]) * scale_y)))
+    if right <= left or bottom <= top:
+        return None
+    return left, top, right, bottom
+
+
+class ActiveMonitorBackend(MSSBackend):
+    """Capture only the monitor under the focused window (or the cursor).
+
+    On a multi-monitor desk this grabs one display instead of the union of
+    all of them, so redaction, encoding and upload handle a fraction of the
+    pixels. With ``roi_padding`` set, the frame is further cropped to the
+    focused window's bounds plus that many points on each side.
+    """
+
+    name = "active_monitor"
+
+    def __init__(
+        self,
+        window_info: Callable[[], Optional[Dict[str, Any]]],
+        cursor: Optional[Callable[[], Optional[Tuple[float, float]]]] = cursor_position,
+        roi_padding: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.window_info = window_info
+        self.cursor = cursor
+        self.roi_padding = roi_padding
+        self.grabs = 0
+        self.cropped = 0
+        self.pixels = 0
+        self.full_pixels = 0
+
+    def _locate(self, info: Optional[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+        bounds = info.get('bounds') if info else None
+        if bounds:
+            x, y, w, h = bounds
+            return x + w / 2.0, y + h / 2.0
+        return self.cursor() if self.cursor is not None else None
+
+    def grab_frame(self) -> Optional[Frame]:
+        sct = self._instance()
+        monitors = sct.monitors[1:] or sct.monitors[:1]
+        info = self.window_info()
+        point = self._locate(info)
+        monitor = monitor_for_point(monitors, *point) if point else None
+        if monitor is None:
+            monitor = monitors[0]  # primary display
+        frame = self._grab_monitor(monitor)
+        frame.window = info
+        self.grabs += 1
+        # What a full-display grab (the union of all monitors) would have cost
+        scale = frame.width / monitor["width"]
+        union = sct.monitors[0]
+        self.full_pixels += int(union["width"] * union["height"] * scale * scale)
+        if self.roi_padding is not None and info and info.get('bounds'):
+            box = roi_box(monitor, frame.size, info['bounds'], self.roi_padding)
+            if box is not None and box != (0, 0) + frame.size:
+                frame = frame.crop(box)  # a view; no pixels are copied
+                self.cropped += 1
+        self.pixels += frame.width * frame.height
+        return frame
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "grabs": self.grabs,
+            "cropped": self.cropped,
+            "pixel_ratio": self.pixels / self.full_pixels if self.full_pixels else 0.0,
+        }
+
+
+def capture_window(window_id: int) -> Optional[Image.Image]:
+    """Capture a single window by CGWindowID as a PIL Image.
+
+    Returns None on failure (e.g. missing Screen Recording permission).
+    """
+    from Quartz import (
+        CGWindowListCreateImage,
+        kCGWindowListOptionIncludingWindow,
+        kCGWindowImageBoundsIgnoreFraming,
+        CGRectInfinite,
+        CGImageGetWidth,
+        CGImageGetHeight,
+        CGImageGetDataProvider,
+        CGDataProviderCopyData,
+    )
+
+    try:
+        image_ref = CGWindowListCreateImage(
+            CGRectInfinite,  # ignored when IncludingWindow is used
+            kCGWindowListOptionIncludingWindow,
+            window_id,
+            kCGWindowImageBoundsIgnoreFraming,
+        )
+        if not image_ref:
+            # Likely missing Screen Recording permission, or window cannot be imaged
+            return None
+
+        width = int(CGImageGetWidth(image_ref))
+        height = int(CGImageGetHeight(image_ref))
+        if width == 0 or height == 0:
+            return None
+
+        provider = CGImageGetDataProvider(image_ref)
+        data = CGDataProviderCopyData(provider)
+        if data is None:
+            return None
+        raw = bytes(data)
+
+        # Convert from BGRA to RGBA for PIL
+        return Image.frombuffer("RGBA", (width, height), raw, "raw", "BGRA", 0, 1)
+    except Exception as e:
+        print(f"Failed to capture focused window: {e}")
+        return None
+
+
+class FocusedWindowBackend(CaptureBackend):
+    """Capture the frontmost window, falling back to another backend on failure."""
+
+    name = "focused_window"
+
+    def __init__(
+        self,
+        window_info: Callable[[], Optional[Dict[str, Any]]],
+        fallback: Optional[CaptureBackend] = None,
+    ) -> None:
+        self.window_info = window_info
+        self.fallback = fallback
+
+    def _grab_window(self) -> Tuple[Optional[Image.Image], Optional[Dict[str, Any]]]:
+        info = self.window_info()
+        if info and info.get('window_id'):
+            img = capture_window(info['window_id'])
+            if img is not None:
+                return img, info
+        if self.fallback is not None:
+            print("Focused window capture failed; falling back to full-display screenshot.")
+        return None, info
+
+    def grab(self) -> Optional[Image.Image]:
+        img, _ = self._grab_window()
+        if img is None and self.fallback is not None:
+            return self.fallback.grab()
+        return img
+
+    def grab_frame(self) -> Optional[Frame]:
+        img, info = self._grab_window()
+        if img is not None:
+            return Frame.from_image(img, window=info)
+        return self.fallback.grab_frame() if self.fallback is not None else None
+
+
+class ReplayBackend(CaptureBackend):
+    """Replay image files from disk in order, looping forever."""
+
+    name = "replay"
+
+    def __init__(self, source: Any) -> None:
+        if isinstance(source, str) and os.path.isdir(source):
+            paths = sorted(
+                p for p in glob.glob(os.path.join(source, "*"))
+                if p.lower().endswith((".png", ".jpg", ".jpeg", ".webp", ".bmp"))
+            )
+        elif isinstance(source, str):
+            paths = [source]
+        else:
+            paths = list(source)
+        if not paths:
+            raise ValueError(f"No images to replay from {source!r}")
+        self.paths: List[str] = paths
+        self._index = 0
+        self._lock = threading.Lock()
+
+    def grab(self) -> Optional[Image.Image]:
+        with self._lock:
+            path = self.paths[self._index % len(self.paths)]
+            self._index += 1
+        with Image.open(path) as img:
+            img.load()
+            return img.copy() if img.mode in ("RGB", "RGBA") else img.convert("RGB")
+
+
+SYNTHETIC_WORDS = (
+    "git", "commit", "-m", "Fix", "pipeline", "python", "pytest", "-q", "John", "Smith",
+    "john.smith@example.com", "555-123-4567", "https://example.com/path", "Meeting", "notes",
+    "Oct", "16,", "2025", "192.168.1.20", "ABCD1234EFGH", "the", "a", "and", "to", "of",
+    "Sent", "from", "my", "phone", "Reply", "Submit", "Order", "#", "12", "Main", "St",
+)
+
+
+class SyntheticBackend(CaptureBackend):
+    """Generate text-heavy frames that look roughly like a busy desktop.
+
+    Each grab perturbs one line so consecutive frames differ slightly, like
+    typing into a terminal or chat window.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, size: Tuple[int, int] = (1920, 1080), seed: int = 0, line_height: int = 22) -> None:
+        self.size = size
+        self.line_height = line_height
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._base = self._render_base()
+        self._frame = 0
+
+    def _line(self) -> str:
+        return " ".join(self._rng.choice(SYNTHETIC_WORDS) for _ in range(self._rng.randint(4, 14)))
+
+    def _render_base(self) -> Image.Image:
+        from PIL import ImageDraw
+        img = Image.new("RGB", self.size, (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        column_width = max(self.size[0] // 3, 1)
+        for col in range(0, self.size[0], column_width):
+            for y in range(8, self.size[1] - self.line_height, self.line_height):
+                draw.text((col + 10, y), self._line(), fill=(0, 0, 0))
+        return img
+
+    def grab(self) -> Optional[Image.Image]:
+        from PIL import ImageDraw
+        with self._lock:
+            self._frame += 1
+            rows = max((self.size[1] - 16) // self.line_height, 1)
+            y = 8 + (self._frame % rows) * self.line_height
+            img = self._base.copy()
+            draw = ImageDraw.Draw(img)
+            draw.rectangle((0, y, self.size[0], y + self.line_height), fill=(255, 255, 255))
+            draw.text((10, y), f"$ {self._line()} [{self._frame}]", fill=(0, 0, 0))
+            return img
+
+
+def create_backend(name: str, **kwargs: Any) -> CaptureBackend:
+    """Build a backend by name: "mss", "active_monitor" (window_info=...), "replay" (source=...)
+    or "synthetic" (size=..., seed=...)."""
+    if name == "mss":
+        return MSSBackend(**kwargs)
+    if name == "active_monitor":
+        return ActiveMonitorBackend(**kwargs)
+    if name == "replay":
+        return ReplayBackend(**kwargs)
+    if name == "synthetic":
+        return SyntheticBackend(**kwargs)
+    raise ValueError(f"Unknown capture backend '{name}'")
+
+
+class CaptureThread:
+    """Dedicated capture thread fed by timestamps from the event-tap callback.
+
+    ``request()`` is the only call made on the callback thread: a deque append
+    and an Event set. Requests that arrive while a grab is in progress are
+    coalesced into the next grab, since they would capture the same screen.
+    """
+
+    def __init__(
+        self,
+        backend: CaptureBackend,
+        sink: Callable[[Frame, float], None],
+        max_pending: int = 32,
+        grab: Optional[Callable[[], Optional[Frame]]] = None,
+    ) -> None:
+        self.backend = backend
+        self.sink = sink
+        # Grab function; defaults to backend.grab_frame (the profiler wraps it)
+        self._grab = grab or backend.grab_frame
+        self._pending: Deque[float] = collections.deque(maxlen=max_pending)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.requests = 0
+        self.grabs = 0
+        self.coalesced = 0
+        self.failures = 0
+        # Time from request() to the start of the grab
+        self.handoff_latency = LatencyHistogram("capture_handoff")
+        # Time spent inside backend.grab_frame()
+        self.grab_latency = LatencyHistogram("capture_grab")
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="capture", daemon=True)
+        self._thread.start()
+
+    def request(self, requested_at: Optional[float] = None) -> None:
+        """Ask for a capture. Safe to call from the event-tap callback."""
+        self._pending.append(requested_at if requested_at is not None else time.perf_counter())
+        self._wakeup.set()
+
+    def _run(self) -> None:
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._stopping:
+                return
+            batch: List[float] = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            if not batch:
+                continue
+            self.requests += len(batch)
+            self.coalesced += len(batch) - 1
+            started = time.perf_counter()
+            self.handoff_latency.record(started - batch[0])
+            try:
+                image = self._grab()
+            except Exception as e:
+                print(f"Capture failed: {e}")
+                image = None
+            self.grab_latency.record(time.perf_counter() - started)
+            if image is None:
+                self.failures += 1
+                continue
+            self.grabs += 1
+            try:
+                self.sink(image, batch[0])
+            except Exception as e:
+                print(f"Capture hand-off failed: {e}")
+            image = None  # don't hold the frame while waiting for the next request
+
+    def stop(self, timeout: Optional[float] = 2.0) -> None:
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "grabs": self.grabs,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "handoff_latency": self.handoff_latency.summary(),
+            "grab_latency": self.grab_latency.summary(),
+            "backend": self.backend.stats(),
+        }
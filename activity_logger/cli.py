@@ -4,13 +4,187 @@ Command-line interface for Activity Logger
 """
 
 import argparse
+import datetime
+import json
 import sys
 import os
-from .core import ActivityLogger
+import time
+from typing import List, Optional
+from .budget import ADMISSION_POLICIES, DEFAULT_MAX_FRAME_BYTES, DOWNSCALE
+from .logindex import LogIndex, format_result, parse_date
+from .archive import ArchiveReader, LogArchiver
+from .metrics import HTTPMetricsSink, MetricsSink, PrometheusFileSink, format_snapshot, records_snapshot
 
 
-def main():
+def query_main(argv: List[str]) -> int:
+    """`activity-logger query`: search the activity logs"""
+    parser = argparse.ArgumentParser(
+        prog="activity-logger query",
+        description="Search activity logs through the full-text index (built/updated on demand)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  activity-logger query pytest                     # Entries mentioning pytest
+  activity-logger query "git push" --since 7d      # ... in the last week
+  activity-logger query --category Coding --app Terminal --since 2025-10-14 --until 2025-10-14
+  activity-logger query deploy* --json             # Prefix match, JSON lines output
+        """
+    )
+    parser.add_argument("text", nargs="*", help="Words to search for (all must match; word* for a prefix)")
+    parser.add_argument("--logs", default="logs", help="Activity log directory (default: logs)")
+    parser.add_argument("--since", type=parse_date, help="First day: YYYY-MM-DD, today, yesterday or Nd (N days ago)")
+    parser.add_argument("--until", type=parse_date, help="Last day (inclusive), same formats as --since")
+    parser.add_argument("--category", help="Only this category, e.g. Coding")
+    parser.add_argument("--app", help="Only apps whose name contains this text")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum results, newest first (default: 50)")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per result")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.logs):
+        print(f"Log directory not found: {args.logs}")
+        return 1
+    try:
+        index = LogIndex(args.logs)
+    except RuntimeError as e:
+        print(f"Error: {e}")
+        return 1
+
+    try:
+        started = time.perf_counter()
+        added = index.sync()
+        synced = time.perf_counter()
+        results = index.query(
+            " ".join(args.text) or None, since=args.since, until=args.until,
+            category=args.category, app=args.app, limit=args.limit,
+        )
+        finished = time.perf_counter()
+    finally:
+        index.close()
+
+    for entry in results:
+        print(json.dumps(entry, ensure_ascii=False) if args.json else format_result(entry))
+    note = f"{len(results)} result(s) in {(finished - synced) * 1000:.1f} ms"
+    if added:
+        note += f" (indexed {added} new entries in {(synced - started) * 1000:.0f} ms)"
+    print(note, file=sys.stderr)
+    return 0
+
+
+def _parse_time(value: str) -> datetime.datetime:
+    """YYYY-MM-DD[THH:MM[:SS]] (a space also works), or a parse_date() shorthand."""
+    try:
+        return datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        return datetime.datetime.combine(parse_date(value), datetime.time())
+
+
+def replay_main(argv: List[str]) -> int:
+    """`activity-logger replay`: print the log lines of a day or time range"""
+    parser = argparse.ArgumentParser(
+        prog="activity-logger replay",
+        description="Print log entries for a day or time range, from live logs or the compressed archive. "
+                    "Only the archive chunks covering the range are decompressed.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  activity-logger replay 2025-10-14                          # One day
+  activity-logger replay "2025-10-14 09:00" "2025-10-14 12:30"
+  activity-logger replay yesterday --jsonl                   # Structured records
+        """
+    )
+    parser.add_argument("start", type=_parse_time, help="Start: YYYY-MM-DD[ HH:MM[:SS]], today, yesterday or Nd")
+    parser.add_argument("end", type=_parse_time, nargs="?",
+                        help="End (inclusive; a bare date means the end of that day). Defaults to the end of the start day")
+    parser.add_argument("--logs", default="logs", help="Activity log directory (default: logs)")
+    parser.add_argument("--jsonl", action="store_true", help="Read the .jsonl logs instead of the .txt logs")
+    args = parser.parse_args(argv)
+
+    end = args.end
+    if end is None:
+        end = datetime.datetime.combine(args.start.date(), datetime.time(23, 59, 59))
+    elif end.time() == datetime.time():
+        end = datetime.datetime.combine(end.date(), datetime.time(23, 59, 59))
+    reader = ArchiveReader(args.logs)
+    for line in reader.read_range(args.start, end, fmt="jsonl" if args.jsonl else "txt"):
+        print(line)
+    return 0
+
+
+def archive_main(argv: List[str]) -> int:
+    """`activity-logger archive`: compress old daily logs now"""
+    parser = argparse.ArgumentParser(
+        prog="activity-logger archive",
+        description="Move daily logs older than --keep-days into seekable monthly archives "
+                    "(<logs>/archive). The logger also does this in the background when "
+                    "started with --archive-after-days.",
+    )
+    parser.add_argument("--logs", default="logs", help="Activity log directory (default: logs)")
+    parser.add_argument("--keep-days", type=int, default=30, help="Days of logs to leave uncompressed (default: 30)")
+    args = parser.parse_args(argv)
+
+    archiver = LogArchiver(args.logs, keep_days=args.keep_days)
+    count = archiver.run_once()
+    stats = archiver.stats()
+    print(f"Archived {count} file(s): {stats['bytes_in']} -> {stats['bytes_out']} bytes")
+    return 0
+
+
+def stats_main(argv: List[str]) -> int:
+    """`activity-logger stats`: per-stage latency percentiles"""
+    parser = argparse.ArgumentParser(
+        prog="activity-logger stats",
+        description="Print p50/p95/p99 per pipeline stage (capture, redact, encode, analyze, log, "
+                    "end_to_end) and counters, from the JSONL logs or a running logger's metrics endpoint",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  activity-logger stats                              # Today's entries
+  activity-logger stats --since 7d                   # The last week
+  activity-logger stats --url http://127.0.0.1:9464  # Live, from a logger started with --metrics-port 9464
+        """
+    )
+    parser.add_argument("--logs", default="logs", help="Activity log directory (default: logs)")
+    parser.add_argument("--since", type=parse_date, default="today",
+                        help="First day: YYYY-MM-DD, today, yesterday or Nd (default: today)")
+    parser.add_argument("--until", type=parse_date, help="Last day (inclusive), same formats as --since")
+    parser.add_argument("--url", help="Read the live rolling window from a metrics endpoint instead of the logs")
+    parser.add_argument("--json", action="store_true", help="Print the snapshot as JSON")
+    args = parser.parse_args(argv)
+
+    if args.url:
+        from urllib.error import URLError
+        from urllib.request import urlopen
+
+        try:
+            with urlopen(args.url.rstrip("/") + "/metrics.json", timeout=5) as response:
+                snapshot = json.load(response)
+        except (URLError, OSError, ValueError) as e:
+            print(f"Could not read metrics from {args.url}: {e}")
+            return 1
+    else:
+        start = datetime.datetime.combine(args.since, datetime.time())
+        end = datetime.datetime.combine(args.until or datetime.date.today(), datetime.time(23, 59, 59))
+        records = []
+        for line in ArchiveReader(args.logs).read_range(start, end, fmt="jsonl"):
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+        snapshot = records_snapshot(records)
+
+    print(json.dumps(snapshot, indent=2) if args.json else format_snapshot(snapshot))
+    return 0
+
+
+COMMANDS = {"query": query_main, "replay": replay_main, "archive": archive_main, "stats": stats_main}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
     """Main CLI entry point"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+
     parser = argparse.ArgumentParser(
         description="AI-powered activity logger that captures screenshots and analyzes user actions",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -20,6 +194,10 @@ Examples:
   activity-logger --api-key sk-...  # Start with specific API key
   activity-logger --screenshots ~/MyScreenshots  # Custom screenshot folder
   activity-logger --logs ~/MyLogs    # Custom log directory
+  activity-logger query pytest --since 7d  # Search the activity logs
+  activity-logger replay yesterday   # Print one day's entries (archived or not)
+  activity-logger stats --since 7d   # Latency percentiles per pipeline stage
+  activity-logger --profile          # Per-stage CPU/memory reports under logs/profiles/
 
 Requirements:
   - OpenAI API key (set OPENAI_API_KEY env var or use --api-key)
@@ -42,25 +220,99 @@ Requirements:
         help="Directory to save activity logs (default: logs)"
     )
     
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve live metrics on http://127.0.0.1:PORT/metrics (Prometheus) and /metrics.json"
+    )
+
+    parser.add_argument(
+        "--metrics-file",
+        help="Rewrite a Prometheus text file with live metrics every 10 seconds"
+    )
+
+    parser.add_argument(
+        "--frame-budget-mb",
+        type=float,
+        help="Memory for captured frames awaiting redaction/encoding (default: 256; 0 disables the limit)"
+    )
+
+    parser.add_argument(
+        "--frame-admission",
+        choices=ADMISSION_POLICIES,
+        default=DOWNSCALE,
+        help="What to do with captures over the frame budget (default: downscale)"
+    )
+
+    parser.add_argument(
+        "--archive-after-days",
+        type=int,
+        metavar="N",
+        help="Move daily logs older than N days into compressed archives in <logs>/archive "
+             "(off by default)"
+    )
+
+    parser.add_argument(
+        "--full-res-screenshots",
+        action="store_true",
+        help="Save screenshots as full-resolution PNG instead of the downscaled upload"
+    )
+
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="",
+        metavar="DIR",
+        help="Profile each pipeline stage and write reports to DIR on stop "
+             "(default: <logs>/profiles/<timestamp>)"
+    )
+
     parser.add_argument(
         "--version",
         action="version",
         version="activity-logger 1.0.0"
     )
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
+    sinks: List[MetricsSink] = []
+    if args.metrics_port is not None:
+        sinks.append(HTTPMetricsSink(args.metrics_port))
+    if args.metrics_file:
+        sinks.append(PrometheusFileSink(args.metrics_file))
+
+    log_dir = args.logs or "logs"
+    max_frame_bytes: Optional[int] = DEFAULT_MAX_FRAME_BYTES
+    if args.frame_budget_mb is not None:
+        max_frame_bytes = int(args.frame_budget_mb * 1024 * 1024) if args.frame_budget_mb > 0 else None
+    profile_dir = None
+    if args.profile is not None:
+        from .profiling import default_profile_dir
+        profile_dir = args.profile or default_profile_dir(log_dir)
+
+    # The capture stack (OpenCV, NumPy, Pillow, Quartz, ...) is only loaded to start logging,
+    # so --help, --version and the query/replay/stats commands start fast
+    from .core import ActivityLogger
+
     try:
         # Initialize the logger
         logger = ActivityLogger(
             api_key=args.api_key,
             screenshot_folder=args.screenshots,
-            log_dir=args.logs or "logs"
+            log_dir=log_dir,
+            metrics_sinks=sinks,
+            max_frame_bytes=max_frame_bytes,
+            frame_admission=args.frame_admission,
+            full_resolution_screenshots=args.full_res_screenshots,
+            archive_after_days=args.archive_after_days,
+            profile_dir=profile_dir,
         )
         
         print("Starting Activity Logger...")
         print(f"Screenshots will be saved to: {logger.screenshot_folder}")
         print(f"Activity logs will be saved to: {logger.log_dir}")
+        if profile_dir:
+            print(f"Profiling; reports will be written to: {profile_dir}")
         print()
         
         # Start the logger
@@ -1,60 +1,111 @@
+import argparse
+import concurrent.futures
 import threading
-import mss
-from pynput import keyboard, mouse
+import time
 import datetime
 import os
-import base64
-from openai import OpenAI
-import io
-import base64
 from PIL import Image
 import signal
-from typing import Optional, Dict, Tuple, Callable, Any, List
-## todo find way to prevent lag on pressing enter. 
-
-from Quartz import (
-    CGEventTapCreate,
-    kCGSessionEventTap,
-    kCGHeadInsertEventTap,
-    kCGEventKeyDown,
-    CGEventMaskBit,
-    kCGEventFlagMaskCommand,
-    CFRunLoopAddSource,
-    CGEventTapEnable,
-    CFRunLoopGetCurrent,
-    kCFRunLoopCommonModes,
-    CFMachPortCreateRunLoopSource,
-    CFRunLoopRun,
-    CGEventGetIntegerValueField,
-    kCGKeyboardEventKeycode
-)
-from Quartz import (
-    CGWindowListCopyWindowInfo,
-    kCGWindowListOptionOnScreenOnly,
-    kCGWindowListExcludeDesktopElements,
-    kCGNullWindowID,
-)
-from Quartz import (
-    CGWindowListCreateImage,
-    kCGWindowListOptionIncludingWindow,
-    kCGWindowImageBoundsIgnoreFraming,
-    CGRectInfinite,
-    CGImageGetWidth,
-    CGImageGetHeight,
-    CGImageGetDataProvider,
-    CGDataProviderCopyData,
-)
-from AppKit import NSWorkspace
-
-from activity_logger.redact import redact_image
-from .prompts import build_activity_prompt
-
-
-def encode_image_from_pil(image: Image.Image) -> str:
-    buffer = io.BytesIO()        # create an in-memory binary stream
-    image.save(buffer, format="PNG")  # write the image as PNG into the buffer
-    buffer.seek(0)
-    return base64.b64encode(buffer.read()).decode("utf-8")
+from typing import Optional, Dict, Tuple, Callable, Any, List, Sequence, Union
+
+from activity_logger.redact import IncrementalRedactor, RedactionCache, load_ocr
+from .prompts import build_activity_prompt, build_batch_prompt, parse_batch_response, parse_category
+from .pipeline import Pipeline, COALESCE, DROP_OLDEST
+from .capture import ActiveMonitorBackend, CaptureBackend, CaptureThread, FocusedWindowBackend, MSSBackend, capture_window
+from .metrics import LatencyHistogram, Metrics, MetricsSink
+from .profiling import StageProfiler, default_profile_dir
+from .encode import EncodedImage, ImageEncoder
+from .dedup import REUSE, ResponseDedup, perceptual_hash
+from .frame import Frame
+from .budget import DEFAULT_MAX_FRAME_BYTES, DOWNSCALE, FrameBudget
+from .batching import AnalysisBatcher
+from .analysis_engine import AnalysisEngine, is_permanent_error
+from .spool import PARK, DurableQueue, Job, QueueDrainer
+from .logwriter import FLUSH_INTERVAL, LogWriter
+from .logindex import LogIndex
+from .archive import LogArchiver
+from .retention import MaxAge, MaxBytes, MaxCount, RetentionManager, RetentionPolicy
+from .store import STORE_PATTERN, ScreenshotStore
+from .window import MacWindowContextProvider, WindowContextProvider, WindowInfo
+
+DEFAULT_MODEL = "gpt-4o-mini"  # or "gpt-4o"
+# Seconds the drainer waits for log entries to reach disk before retrying their jobs
+LOG_FLUSH_TIMEOUT = 30.0
+# Completion budget per screenshot
+MAX_TOKENS_PER_FRAME = 150
+
+CAPTURE_MODES = ("full_display", "focused_window", "active_monitor")
+
+# Per-stage worker/queue defaults for the capture pipeline. Redaction is the
+# expensive step, so bursts are coalesced there rather than queued.
+DEFAULT_STAGE_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "redact": {"workers": 1, "max_queue": 2, "overflow": COALESCE},
+    "persist": {"workers": 1, "max_queue": 4, "overflow": DROP_OLDEST},
+    "encode": {"workers": 1, "max_queue": 2, "overflow": DROP_OLDEST},
+    "analyze": {"workers": 4, "max_queue": 4, "overflow": DROP_OLDEST},
+    "spool": {"workers": 1, "max_queue": 8, "overflow": DROP_OLDEST},
+}
+
+
+def _usage(response: Any) -> Optional[Dict[str, int]]:
+    """Token counts of a chat completion, if the server reported them."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens,
+    }
+
+
+def _window_names(window: Optional[WindowInfo]) -> Tuple[Optional[str], Optional[str]]:
+    if not window:
+        return None, None
+    return window.get('app_name'), window.get('window_title')
+
+
+def _window_context(window: Optional[WindowInfo]) -> Optional[Dict[str, Any]]:
+    """The JSON-safe part of a window snapshot kept with queued frames."""
+    if not window:
+        return None
+    return {'app_name': window.get('app_name'), 'window_title': window.get('window_title')}
+
+
+class Capture:
+    """A captured frame and the artifacts derived from it as it moves through the pipeline.
+
+    ``image`` and ``redacted`` are usually the same Frame, redacted in place.
+    """
+
+    __slots__ = (
+        "image", "captured_at", "requested_at", "redacted", "encoded", "saved", "phash", "timings", "window",
+        "frame_bytes", "error",
+    )
+
+    def __init__(
+        self,
+        image: Optional[Frame],
+        captured_at: Optional[datetime.datetime] = None,
+        requested_at: Optional[float] = None,
+    ) -> None:
+        self.image: Optional[Frame] = image
+        self.captured_at = captured_at or datetime.datetime.now()
+        # perf_counter() timestamp of the Enter press that asked for this frame
+        self.requested_at = requested_at
+        self.redacted: Optional[Frame] = None
+        self.encoded: Optional[EncodedImage] = None
+        # Full-resolution copy to save instead of the upload (full_resolution_screenshots)
+        self.saved: Optional[EncodedImage] = None
+        self.phash: Optional[int] = None
+        # Per-stage latencies in milliseconds, reported in the JSONL log
+        self.timings: Dict[str, float] = {}
+        # Frontmost window when the frame was grabbed
+        self.window: Optional[WindowInfo] = None
+        # Bytes charged to the frame budget until the pixels are released
+        self.frame_bytes = 0
+        # Exception from the last failed analysis request
+        self.error: Optional[BaseException] = None
 
 
 class ActivityLogger:
@@ -68,7 +119,41 @@ class ActivityLogger:
         screenshot_folder: Optional[str] = None, 
         log_dir: str = "logs", 
         on_status_change: Optional[Callable[[str, str], None]] = None, 
-        capture_mode: str = "full_display"
+        capture_mode: str = "full_display",
+        capture_roi_padding: Optional[int] = None,
+        stage_options: Optional[Dict[str, Dict[str, Any]]] = None,
+        max_frame_bytes: Optional[int] = DEFAULT_MAX_FRAME_BYTES,
+        frame_admission: str = DOWNSCALE,
+        capture_backend: Optional[CaptureBackend] = None,
+        capture_handoff: bool = True,
+        ocr_tile_size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+        ocr_workers: Optional[int] = None,
+        incremental_redaction: bool = False,
+        image_codec: str = "png",
+        image_quality: int = 80,
+        full_resolution_screenshots: bool = False,
+        dedup_distance: Optional[int] = None,
+        dedup_mode: str = REUSE,
+        model: str = DEFAULT_MODEL,
+        base_url: Optional[str] = None,
+        batch_size: int = 1,
+        batch_window: float = 1.5,
+        max_in_flight: int = 4,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 6,
+        durable_queue: bool = True,
+        queue_dir: Optional[str] = None,
+        log_flush: str = FLUSH_INTERVAL,
+        log_fsync: bool = False,
+        log_format: str = "both",
+        search_index: bool = True,
+        archive_after_days: Optional[int] = None,
+        max_screenshots: Optional[int] = 5,
+        max_screenshot_bytes: Optional[int] = None,
+        max_screenshot_age: Optional[float] = None,
+        window_provider: Optional[WindowContextProvider] = None,
+        metrics_sinks: Sequence[MetricsSink] = (),
+        profile_dir: Optional[str] = None,
     ) -> None:
         """
         Initialize the Activity Logger.
@@ -78,12 +163,85 @@ class ActivityLogger:
             screenshot_folder (str): Folder to save screenshots. Defaults to ~/Desktop/Screenshots
             log_dir (str): Directory to save activity logs. Defaults to 'logs'
             on_status_change (callable): Optional callback function(status, message) for status updates
+            capture_mode (str): "full_display", "focused_window" or "active_monitor"
+                (only the monitor under the focused window, or under the cursor)
+            capture_roi_padding (int): In "active_monitor" mode, crop the frame to the
+                focused window's bounds plus this many points on each side
+            stage_options (dict): Per-stage overrides of DEFAULT_STAGE_OPTIONS, e.g.
+                {"analyze": {"workers": 4, "overflow": "block"}}
+            max_frame_bytes (int): Pixel memory allowed for frames between capture and
+                encoding. None disables the budget.
+            frame_admission (str): What to do with a capture that would exceed it:
+                "downscale" (shrink the frame to fit), "coalesce" (one capture once
+                memory frees up) or "drop"
+            capture_backend (CaptureBackend): Override the screen capture backend
+                (e.g. capture.ReplayBackend). Defaults to one built from capture_mode.
+            capture_handoff (bool): If True, the event-tap callback only signals a
+                dedicated capture thread and returns immediately. If False, the frame
+                is grabbed inside the callback, before the key reaches the app.
+            ocr_tile_size (tuple): (width, height) of tiles OCR'd in parallel during
+                redaction, e.g. (None, 512) for full-width bands. None disables tiling.
+            ocr_workers (int): Parallel tile OCR workers (default: CPU count)
+            incremental_redaction (bool): Re-OCR only the tiles that changed since the
+                previous frame of the same size, reusing cached PII boxes for the rest
+            image_codec (str): Codec for uploads and saved screenshots: "png", "jpeg"
+                or "webp". Frames are downscaled to the vision model's working
+                resolution and encoded once; the same bytes are uploaded and saved, so
+                saved screenshots are downscaled too (768 px on the short side).
+            image_quality (int): JPEG/WebP quality
+            full_resolution_screenshots (bool): Save screenshots as full-resolution PNG
+                instead of the downscaled upload bytes. Costs a second encode per frame.
+            dedup_distance (int): Frames whose perceptual hash is within this many bits
+                of a recently analyzed frame skip the API call. None (the default)
+                disables dedup. The 64-bit hash covers the whole screen, so a new line
+                of text often changes only 0-4 bits; use 0 unless repeats are expected.
+            dedup_mode (str): "reuse" logs the cached description again; "coalesce"
+                writes no new entry for the repeated screen
+            model (str): Vision model used for analysis
+            base_url (str): Alternative OpenAI-compatible endpoint, e.g. a local stub
+                server for testing (benchmarks/openai_stub.py)
+            batch_size (int): Send up to this many frames in one multi-image request.
+                1 disables batching.
+            batch_window (float): Seconds to wait for more frames before sending a batch
+            max_in_flight (int): Concurrent API requests (and pooled connections)
+            requests_per_minute (float): Client-side rate limit; None disables it
+            max_retries (int): Retries with exponential backoff on 429/5xx/network errors
+            durable_queue (bool): Spool encoded (redacted) frames to disk and analyze them
+                from a persistent queue, so pending work survives restarts and outages
+            queue_dir (str): Location of the durable queue. Defaults to <log_dir>/.queue
+            log_flush (str): When the log writer flushes: "entry", "interval" or "shutdown"
+            log_fsync (bool): fsync the log file on every flush
+            log_format (str): "text" (actions_log_*.txt), "jsonl" (structured
+                actions_log_*.jsonl records) or "both"
+            search_index (bool): Keep <log_dir>/.index.db (SQLite FTS5) up to date for
+                `activity-logger query`
+            archive_after_days (int): Move daily logs older than this many days into
+                seekable monthly archives under <log_dir>/archive (the originals are
+                deleted once archived). None (the default) leaves the logs alone.
+            max_screenshots (int): Keep at most this many screenshots (None: no limit)
+            max_screenshot_bytes (int): Keep screenshots under this many bytes in total
+            max_screenshot_age (float): Delete screenshots older than this many seconds
+            window_provider (WindowContextProvider): Source of frontmost-window snapshots
+                (default: cached macOS window list; window.FakeWindowContextProvider for tests)
+            metrics_sinks (list): Extra destinations for per-stage timings and counters,
+                e.g. metrics.PrometheusFileSink or metrics.HTTPMetricsSink. Recent
+                percentiles are always available from metrics_stats().
+            profile_dir (str): Profile each pipeline stage (sampled stacks, plus tracemalloc
+                around redaction and encoding) and write the reports here on stop.
+                None disables profiling.
         """
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         if not self.api_key:
             raise ValueError("OpenAI API key is required. Set OPENAI_API_KEY environment variable or pass api_key parameter.")
         
-        self.client = OpenAI(api_key=self.api_key)
+        self.model = model
+        self.engine = AnalysisEngine(
+            self.api_key,
+            base_url=base_url,
+            max_in_flight=max_in_flight,
+            requests_per_minute=requests_per_minute,
+            max_retries=max_retries,
+        )
         self.log_dir = log_dir
         
         # Setup screenshot folder
@@ -91,139 +249,505 @@ class ActivityLogger:
             screenshot_folder = os.path.expanduser("~/Desktop/Screenshots")
         self.screenshot_folder = screenshot_folder
         os.makedirs(self.screenshot_folder, exist_ok=True)
-        
-        # Initialize counters and storage
-        self.file_num = 0
+
+        # Names and evicts screenshots without rescanning the folder on every save
+        policies: List[RetentionPolicy] = []
+        if max_screenshots is not None:
+            policies.append(MaxCount(max_screenshots))
+        if max_screenshot_bytes is not None:
+            policies.append(MaxBytes(max_screenshot_bytes))
+        if max_screenshot_age is not None:
+            policies.append(MaxAge(max_screenshot_age))
+        self.retention = RetentionManager(self.screenshot_folder, policies, pattern=STORE_PATTERN)
+        self.screenshot_store = ScreenshotStore(self.screenshot_folder, self.retention)
         
         # Keycode for Return/Enter key on Mac
         self.ENTER_KEYCODE = 36
         self.event_tap = None
+        # Quartz functions and constants the event-tap callback uses, resolved in start()
+        self._tap_api: Optional[Tuple[Any, ...]] = None
         
-        # Capture mode: "full_display" or "focused_window"
-        self.capture_mode = capture_mode if capture_mode in ("full_display", "focused_window") else "full_display"
+        # Capture mode: "full_display", "focused_window" or "active_monitor"
+        self.capture_mode = capture_mode if capture_mode in CAPTURE_MODES else "full_display"
 
-        # Initialize MSS for screenshot capture
-        self.mss_instance = mss.mss()
+        # One window snapshot per capture, cached between app switches
+        self.window_provider = window_provider or MacWindowContextProvider()
+
+        # Screen capture backend and hand-off thread
+        if capture_backend is None:
+            capture_backend = MSSBackend()
+            if self.capture_mode == "active_monitor":
+                capture_backend = ActiveMonitorBackend(self.window_provider.snapshot, roi_padding=capture_roi_padding)
+            elif self.capture_mode == "focused_window":
+                capture_backend = FocusedWindowBackend(self.window_provider.snapshot, fallback=capture_backend)
+        self.capture_backend = capture_backend
+        self.capture_handoff = capture_handoff
+        # Admission control for frame memory, checked before each grab
+        self.frame_budget: Optional[FrameBudget] = None
+        if max_frame_bytes is not None:
+            self.frame_budget = FrameBudget(max_frame_bytes, policy=frame_admission, on_available=self._request_capture)
+        # Optional per-stage CPU/memory profiler; stage functions are wrapped when it is set
+        self.profiler: Optional[StageProfiler] = StageProfiler(profile_dir) if profile_dir else None
+        self.capture_thread = CaptureThread(
+            self.capture_backend, self._on_captured,
+            grab=self._profiled("capture", self.capture_backend.grab_frame),
+        )
+        # Time spent inside keyboard_event_callback before the key is released to the system
+        self.callback_latency = LatencyHistogram("event_tap_callback")
+        # Per-stage spans (capture, redact, encode, analyze, log, end_to_end) and counters
+        self.metrics = Metrics(metrics_sinks)
+        self.metrics.add_collector(self._component_counters)
         
         # Setup logging directory
         os.makedirs(self.log_dir, exist_ok=True)
+        # All log entries go through one writer thread, which also feeds the search index
+        self.log_index: Optional[LogIndex] = None
+        if search_index:
+            try:
+                self.log_index = LogIndex(self.log_dir)
+            except RuntimeError as e:
+                print(f"Search index disabled: {e}")
+        self.archiver: Optional[LogArchiver] = None
+        if archive_after_days is not None:
+            self.archiver = LogArchiver(self.log_dir, keep_days=max(1, archive_after_days))
+        self.log_writer = LogWriter(
+            self.log_dir, flush_policy=log_flush, fsync=log_fsync, log_format=log_format,
+            on_flush=self.log_index.update if self.log_index is not None else None,
+            on_written=self._on_log_written,
+        )
         
         # GUI integration
         self.on_status_change = on_status_change
         self._running = False
         self._should_stop = False
         self._run_loop_thread = None
-    
-    def encode_image(self, image_path: str) -> str:
-        """Encode image to base64 for API"""
-        with open(image_path, "rb") as image_file:
-            return base64.b64encode(image_file.read()).decode('utf-8')
 
-    def get_frontmost_window_info(self) -> Optional[Dict[str, Any]]:
-        """Return info for the currently focused (frontmost) window.
+        # Each frame is OCR'd once and the result shared by the save and analyze paths
+        self.incremental_redactor: Optional[IncrementalRedactor] = None
+        if incremental_redaction:
+            self.incremental_redactor = IncrementalRedactor(
+                tile_size=ocr_tile_size or (None, 256), workers=ocr_workers,
+            )
+            self.redaction_cache = RedactionCache(box_finder=self.incremental_redactor.find_boxes)
+        else:
+            self.redaction_cache = RedactionCache(tile_size=ocr_tile_size, workers=ocr_workers)
 
-        Returns dict with keys: window_id, bounds (x, y, width, height), app_name, window_title, pid.
-        Returns None if it cannot be determined.
-        """
+        self.encoder = ImageEncoder(codec=image_codec, quality=image_quality)
+        self.screenshot_encoder: Optional[ImageEncoder] = None
+        if full_resolution_screenshots:
+            self.screenshot_encoder = ImageEncoder(codec="png", max_side=None, short_side=None)
+        self.dedup: Optional[ResponseDedup] = None
+        if dedup_distance is not None:
+            self.dedup = ResponseDedup(max_distance=dedup_distance, mode=dedup_mode)
+        self.batcher: Optional[AnalysisBatcher] = None
+        if batch_size > 1:
+            self.batcher = AnalysisBatcher(self._profiled("analyze", self._analyze_batch), max_batch=batch_size, window=batch_window)
+
+        # Bounded capture pipeline: redact -> encode -> (persist, analyze | spool)
+        self.stage_options = {name: dict(opts) for name, opts in DEFAULT_STAGE_OPTIONS.items()}
+        for name, opts in (stage_options or {}).items():
+            self.stage_options.setdefault(name, {}).update(opts)
+        # Analysis threads block on the batch they joined, so a batch needs that many
+        analysis_workers = max(self.stage_options["analyze"].get("workers", 1), batch_size)
+        self.stage_options["analyze"]["workers"] = analysis_workers
+
+        self.queue: Optional[DurableQueue] = None
+        self.drainer: Optional[QueueDrainer] = None
+        if durable_queue:
+            self.queue = DurableQueue(queue_dir or os.path.join(self.log_dir, ".queue"))
+            # With batching the batcher's thread makes the API call and is profiled as "analyze";
+            # the drainer only waits on it, so it gets its own span to avoid counting that time twice
+            drain_stage = "spool_drain" if self.batcher is not None else "analyze"
+            self.drainer = QueueDrainer(self.queue, self._profiled(drain_stage, self._analyze_jobs), workers=analysis_workers)
+        self.pipeline = self._build_pipeline()
+
+    def _build_pipeline(self) -> Pipeline:
+        """Wire the capture stages together with their pool sizes and overflow policies."""
+        pipeline = Pipeline()
+        opts = self.stage_options
+        stage = self._profiled
+        # Frames dropped before they are encoded give their memory back
+        release = self._release_frame
+        pipeline.add_stage("redact", stage("redact", self._redact_stage), on_drop=release, **opts["redact"])
+        pipeline.add_stage("encode", stage("encode", self._encode_stage), after="redact", on_drop=release,
+                           **opts["encode"])
+        pipeline.add_stage("persist", stage("persist", self._persist_stage), after="encode", **opts["persist"])
+        if self.queue is not None:
+            pipeline.add_stage("spool", stage("spool", self._spool_stage), after="encode", **opts["spool"])
+        else:
+            analyze_stage = "analyze_submit" if self.batcher is not None else "analyze"
+            pipeline.add_stage("analyze", stage(analyze_stage, self._analyze_stage), after="encode", **opts["analyze"])
+        return pipeline
+
+    def _profiled(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """``fn`` wrapped by the profiler as ``stage``, or unchanged when profiling is off."""
+        if self.profiler is None:
+            return fn
+        return self.profiler.wrap(stage, fn)
+
+    def _redact_stage(self, capture: Capture) -> Capture:
+        started = time.perf_counter()
         try:
-            workspace = NSWorkspace.sharedWorkspace()
-            app = workspace.frontmostApplication()
-            if app is None:
+            capture.redacted = self.redaction_cache.redact(capture.image)
+        except Exception:
+            self._release_frame(capture)
+            raise
+        capture.image = None  # the unredacted frame is no longer needed
+        capture.timings["redact_ms"] = (time.perf_counter() - started) * 1000.0
+        self.metrics.span("redact", capture.timings["redact_ms"] / 1000.0)
+        return capture
+
+    def _persist_stage(self, capture: Capture) -> None:
+        # Same bytes as the upload unless full-resolution screenshots are on;
+        # written under their content hash by the store's thread
+        saved, capture.saved = capture.saved, None
+        self.screenshot_store.put(saved or capture.encoded)
+
+    def _encode_stage(self, capture: Capture) -> Capture:
+        started = time.perf_counter()
+        try:
+            if self.dedup is not None:
+                capture.phash = perceptual_hash(capture.redacted)
+            capture.encoded = self.encoder.encode(capture.redacted)
+            if self.screenshot_encoder is not None:
+                capture.saved = self.screenshot_encoder.encode(capture.redacted)
+        finally:
+            self._release_frame(capture)  # persist and analyze only need the encoded bytes
+        capture.timings["encode_ms"] = (time.perf_counter() - started) * 1000.0
+        self.metrics.span("encode", capture.timings["encode_ms"] / 1000.0)
+        print(f'encoded {capture.encoded.nbytes} bytes ({self.encoder.codec}, '
+              f'{capture.encoded.size[0]}x{capture.encoded.size[1]}) in {capture.encoded.encode_ms:.1f} ms')
+        return capture
+
+    def _release_frame(self, capture: Capture) -> None:
+        """Let go of a capture's pixels and return their bytes to the frame budget."""
+        frame = capture.redacted or capture.image
+        capture.image = capture.redacted = None
+        if frame is not None:
+            # Each frame is redacted once in the pipeline; don't keep it in the LRU
+            self.redaction_cache.discard(frame)
+        if capture.frame_bytes and self.frame_budget is not None:
+            self.frame_budget.release(capture.frame_bytes)
+            capture.frame_bytes = 0
+
+    def _analyze_stage(self, capture: Capture) -> None:
+        self._analyze_capture(capture)
+
+    def _spool_stage(self, capture: Capture) -> None:
+        """Persist the encoded frame to the durable queue; the drainer analyzes it."""
+        encoded = capture.encoded
+        self.queue.enqueue(encoded.data, encoded.mime, {
+            "captured_at": capture.captured_at.isoformat(),
+            "size": list(encoded.size),
+            "phash": capture.phash,
+            "timings": capture.timings,
+            "window": _window_context(capture.window),
+        })
+
+    def _analyze_jobs(self, jobs: List[Job]) -> List[Union[bool, str]]:
+        """Drainer handler: analyze queued frames; True acknowledges a job, PARK gives up on it."""
+        results = []
+        for job in jobs:
+            meta = job.meta
+            capture = Capture(None, datetime.datetime.fromisoformat(meta["captured_at"]))
+            capture.encoded = EncodedImage(memoryview(job.read_payload()), job.mime, tuple(meta.get("size") or (0, 0)), 0.0)
+            capture.phash = meta.get("phash")
+            capture.timings = meta.get("timings") or {}
+            capture.window = meta.get("window")
+            if self._analyze_capture(capture) is not None:
+                results.append(True)
+            elif capture.error is not None and is_permanent_error(capture.error):
+                results.append(PARK)  # retrying would get the same 4xx
+            else:
+                results.append(False)
+        # Entries must be on disk before their jobs are acknowledged; otherwise retry them
+        if not self.log_writer.flush(timeout=LOG_FLUSH_TIMEOUT):
+            print('activity log not flushed; keeping the analyzed frames queued')
+            return [False if result is True else result for result in results]
+        return results
+
+    def _analyze_capture(self, capture: Capture) -> Optional[str]:
+        """Dedup, then analyze one frame (batched if enabled). Returns None on failure."""
+        if self.dedup is not None and capture.phash is not None:
+            cached = self.dedup.begin(capture.phash)
+            if cached is not None:
+                self.metrics.count("dedup_hits")
+                print(f'near-duplicate screen; skipped API call ({self.dedup.mode})')
+                if self.dedup.mode == REUSE:
+                    self.log_response(cached, timestamp=capture.captured_at,
+                                      details={"reused": True, "latencies_ms": capture.timings})
+                return cached
+
+        if self.batcher is not None:
+            future = self.batcher.submit(capture)
+            try:
+                return future.result(self._batch_deadline())
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                print('batched analysis timed out')
                 return None
-            pid = int(app.processIdentifier())
-            app_name = str(app.localizedName()) if app.localizedName() else ""
-
-            options = kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements
-            window_list = CGWindowListCopyWindowInfo(options, kCGNullWindowID) or []
-
-            # Windows are front-to-back ordered; pick the first for this PID with layer 0
-            front_windows = []
-            for w in window_list:
-                try:
-                    owner_pid = int(w.get('kCGWindowOwnerPID', -1))
-                    if owner_pid != pid:
-                        continue
-                    layer = int(w.get('kCGWindowLayer', 0))
-                    if layer != 0:
-                        continue
-                    bounds = w.get('kCGWindowBounds') or {}
-                    width = int(bounds.get('Width', 0))
-                    height = int(bounds.get('Height', 0))
-                    if width <= 2 or height <= 2:
-                        continue
-                    alpha = float(w.get('kCGWindowAlpha', 1.0))
-                    if alpha <= 0.01:
-                        continue
-                    front_windows.append(w)
-                except Exception:
-                    continue
-
-            if not front_windows:
+            except Exception:
                 return None
 
-            w = front_windows[0]
-            bounds = w.get('kCGWindowBounds') or {}
-            x = int(bounds.get('X', 0))
-            y = int(bounds.get('Y', 0))
-            width = int(bounds.get('Width', 0))
-            height = int(bounds.get('Height', 0))
-            window_id = int(w.get('kCGWindowNumber')) if w.get('kCGWindowNumber') is not None else None
-            window_title = w.get('kCGWindowName') or ""
-            owner_name = w.get('kCGWindowOwnerName') or app_name
-
-            return {
-                'window_id': window_id,
-                'bounds': (x, y, width, height),
-                'app_name': owner_name,
-                'window_title': window_title,
-                'pid': pid,
-            }
+        response = None
+        try:
+            response = self._request_analysis(capture.encoded, capture.captured_at, capture.timings, capture.window,
+                                              capture=capture)
+        finally:
+            self._finish_dedup(capture, response)
+        return response
+
+    def _batch_deadline(self) -> float:
+        """Longest a batched frame can wait: the batches queued ahead of it, its own
+        batching window, and each batch's request with every retry."""
+        batches = -(-self.batcher.max_pending // self.batcher.max_batch) + 1
+        return self.batcher.window + batches * self.engine.request_deadline
+
+    def _analyze_batch(self, captures: List[Capture]) -> List[Optional[str]]:
+        """Batcher handler: one multi-image request for several captures."""
+        responses: List[Optional[str]] = [None] * len(captures)
+        try:
+            responses = self._request_batch_analysis(captures)
+        finally:
+            for capture, response in zip(captures, responses):
+                self._finish_dedup(capture, response)
+        return responses
+
+    def _finish_dedup(self, capture: Capture, response: Optional[str]) -> None:
+        if self.dedup is not None and capture.phash is not None:
+            self.dedup.finish(capture.phash, response)
+
+    def pipeline_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Live queue depth, drop and throughput counters for each pipeline stage."""
+        return self.pipeline.stats()
+
+    def encoding_stats(self) -> Dict[str, Any]:
+        """Bytes and milliseconds per encoded frame."""
+        return self.encoder.stats()
+
+    def api_stats(self) -> Dict[str, Any]:
+        """Request, retry, rate-limit and in-flight counters of the API engine."""
+        return self.engine.stats()
+
+    def queue_stats(self) -> Dict[str, Any]:
+        """Durable queue depth by state, evictions and drainer ack/retry/park counts (empty if disabled).
+
+        After the logger stops, the depth is the last one seen.
+        """
+        return self.drainer.stats() if self.drainer is not None else {}
+
+    def _backfill_index(self) -> None:
+        try:
+            added = self.log_index.sync()
         except Exception as e:
-            print(f"Failed to get frontmost window info: {e}")
-            return None
+            print(f"Search index backfill failed: {e}")
+            return
+        if added:
+            print(f"Indexed {added} earlier log entries")
+
+    def window_stats(self) -> Dict[str, Any]:
+        """Hit rate of the cached window-context provider."""
+        return self.window_provider.stats()
+
+    def retention_stats(self) -> Dict[str, Any]:
+        """Screenshots written, deduplicated by content hash, kept and evicted."""
+        return self.screenshot_store.stats()
+
+    def log_stats(self) -> Dict[str, Any]:
+        """Entries, group commits, flushes and rotations of the log writer."""
+        return self.log_writer.stats()
+
+    def batch_stats(self) -> Dict[str, Any]:
+        """Batches sent and average frames per batch (empty if batching is off)."""
+        return self.batcher.stats() if self.batcher is not None else {}
+
+    def dedup_stats(self) -> Dict[str, Any]:
+        """Hit rate of the perceptual-hash response cache (empty if dedup is off)."""
+        return self.dedup.stats() if self.dedup is not None else {}
+
+    def redaction_stats(self) -> Dict[str, Any]:
+        """Redaction cache counters, plus tile hit rate and time saved in incremental mode."""
+        stats: Dict[str, Any] = {"cache": self.redaction_cache.stats()}
+        if self.incremental_redactor is not None:
+            stats["incremental"] = self.incremental_redactor.stats()
+        return stats
+
+    def frame_memory_stats(self) -> Dict[str, Any]:
+        """Current and peak bytes held by in-flight frames, and admission decisions."""
+        return self.frame_budget.stats() if self.frame_budget is not None else {}
+
+    def metrics_stats(self) -> Dict[str, Any]:
+        """p50/p95/p99 per pipeline stage over recent captures, and counters."""
+        return self.metrics.snapshot()
+
+    def _component_counters(self) -> Dict[str, float]:
+        pipeline = self.pipeline.stats()
+        engine = self.engine.stats()
+        budget = self.frame_memory_stats()
+        return {
+            "capture_requests": self.capture_thread.requests,
+            "captures_coalesced": (self.capture_thread.coalesced + sum(s["coalesced"] for s in pipeline.values())
+                                   + budget.get("coalesced", 0)),
+            "captures_dropped": sum(s["dropped"] for s in pipeline.values()) + budget.get("dropped", 0),
+            "captures_downscaled": budget.get("downscaled", 0),
+            "api_requests": engine["requests"],
+            "api_retries": engine["retries"],
+            "api_rate_limited": engine["rate_limited"],
+            "api_errors": engine["failures"],
+        }
+
+    def _on_log_written(self, seconds: float) -> None:
+        self.metrics.span("log", seconds)
+
+    def _record_usage(self, encoded_bytes: int, usage: Optional[Dict[str, int]]) -> None:
+        self.metrics.count("bytes_uploaded", encoded_bytes)
+        if usage:
+            self.metrics.count("prompt_tokens", usage["prompt_tokens"])
+            self.metrics.count("completion_tokens", usage["completion_tokens"])
+
+    def latency_stats(self) -> Dict[str, Any]:
+        """Event-tap callback latency histogram plus capture-thread counters."""
+        return {
+            "callback": self.callback_latency.summary(),
+            "capture": self.capture_thread.stats(),
+        }
+
+    def _on_captured(self, frame: Frame, requested_at: Optional[float] = None) -> None:
+        """Hand a freshly grabbed frame to the pipeline."""
+        frame_bytes = 0
+        if self.frame_budget is not None:
+            frame, frame_bytes = self.frame_budget.charge(frame, requested_at)
+            if frame is None:
+                print('frame memory budget exceeded; capture skipped')
+                return
+        capture = Capture(frame, frame.captured_at, requested_at=requested_at)
+        capture.frame_bytes = frame_bytes
+        capture.window = frame.window or self.window_provider.snapshot()
+        self.metrics.count("captures")
+        if requested_at is not None:
+            capture.timings["capture_ms"] = (time.perf_counter() - requested_at) * 1000.0
+            self.metrics.span("capture", capture.timings["capture_ms"] / 1000.0)
+        if not self.pipeline.submit(capture):
+            print('pipeline busy; capture dropped')
+    
+    def get_frontmost_window_info(self) -> Optional[Dict[str, Any]]:
+        """Return info for the currently focused (frontmost) window.
+
+        Returns dict with keys: window_id, bounds (x, y, width, height), app_name, window_title, pid.
+        Returns None if it cannot be determined. Served from the window provider's cache
+        unless an app was activated since the last lookup.
+        """
+        return self.window_provider.snapshot()
     
     def analyze_screenshot_then_log(self, image: Image.Image) -> str:
         """Send an in-memory screenshot to ChatGPT for analysis"""
+        redacted_image: Image.Image = self.redaction_cache.redact(image)
+        response = self._request_analysis(self.encoder.encode(redacted_image), window=self.get_frontmost_window_info())
+        return response if response is not None else "Error analyzing screenshot"
+
+    def _create_completion(self, content: List[Dict[str, Any]], max_tokens: int) -> Any:
+        return self.engine.create(
+            model=self.model,
+            messages=[{"role": "user", "content": content}],
+            max_tokens=max_tokens,
+        )
+
+    def _request_analysis(
+        self,
+        encoded: EncodedImage,
+        captured_at: Optional[datetime.datetime] = None,
+        timings: Optional[Dict[str, float]] = None,
+        window: Optional[WindowInfo] = None,
+        capture: Optional[Capture] = None,
+    ) -> Optional[str]:
+        """Ask the model to describe an already redacted, encoded frame and log the reply.
+
+        window is the snapshot taken when the frame was captured. Returns None
+        if the request failed; the error is then kept on ``capture``, if given.
+        """
         try:
-        
-            redacted_image: Image.Image = redact_image(image)
-            base64_image = encode_image_from_pil(redacted_image)
-            
-            info = self.get_frontmost_window_info()
-            prompt_text = build_activity_prompt(
-                (info.get('app_name') if info else None),
-                (info.get('window_title') if info else None),
-            )
+            app_name, window_title = _window_names(window)
+            prompt_text = build_activity_prompt(app_name, window_title)
 
-            response = self.client.chat.completions.create(
-                model="gpt-4o-mini",  # or "gpt-4o"
-                messages=[
+            started = time.perf_counter()
+            response = self._create_completion(
+                [
                     {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt_text,
-                            },
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
-                                },
-                            },
-                        ],
-                    }
+                        "type": "text",
+                        "text": prompt_text,
+                    },
+                    {
+                        "type": "image_url",
+                        "image_url": {
+                            "url": encoded.data_url()
+                        },
+                    },
                 ],
-                max_tokens=150,
+                max_tokens=MAX_TOKENS_PER_FRAME,
             )
+            latencies = dict(timings or {})
+            latencies["analyze_ms"] = (time.perf_counter() - started) * 1000.0
+            self.metrics.span("analyze", latencies["analyze_ms"] / 1000.0)
+            usage = _usage(response)
+            self._record_usage(encoded.nbytes, usage)
             chosen_response_content = response.choices[0].message.content 
-            self.log_response(chosen_response_content)
+            self.log_response(chosen_response_content, timestamp=captured_at, details={
+                "app_name": app_name,
+                "window_title": window_title,
+                "model": self.model,
+                "usage": usage,
+                "latencies_ms": latencies,
+            })
 
-            return response.choices[0].message.content
+            return chosen_response_content
 
         except Exception as e:
+            self.metrics.count("analysis_errors")
             print(f"Error analyzing screenshot: {e}")
-            return "Error analyzing screenshot"
+            if capture is not None:
+                capture.error = e
+            return None
+
+    def _request_batch_analysis(self, captures: List[Capture]) -> List[Optional[str]]:
+        """Describe several frames in one request and log one line per frame.
+
+        Returns the per-frame entries; None marks frames the reply didn't cover.
+        """
+        try:
+            contexts = [_window_names(capture.window) for capture in captures]
+            started = time.perf_counter()
+            content: List[Dict[str, Any]] = [
+                {"type": "text", "text": build_batch_prompt(contexts)},
+            ]
+            for i, capture in enumerate(captures, start=1):
+                content.append({"type": "text", "text": f"Screenshot {i}:"})
+                content.append({"type": "image_url", "image_url": {"url": capture.encoded.data_url()}})
+
+            response = self._create_completion(content, max_tokens=MAX_TOKENS_PER_FRAME * len(captures))
+            analyze_ms = (time.perf_counter() - started) * 1000.0
+            self.metrics.span("analyze", analyze_ms / 1000.0)
+            self._record_usage(sum(capture.encoded.nbytes for capture in captures), _usage(response))
+            entries = parse_batch_response(response.choices[0].message.content, len(captures))
+        except Exception as e:
+            self.metrics.count("analysis_errors", len(captures))
+            print(f"Error analyzing screenshot batch: {e}")
+            for capture in captures:
+                capture.error = e
+            return [None] * len(captures)
+
+        for capture, context, entry in zip(captures, contexts, entries):
+            if entry is None:
+                print("Batch reply did not cover a screenshot; no entry logged for it")
+                continue
+            self.log_response(entry, timestamp=capture.captured_at, details={
+                "app_name": context[0],
+                "window_title": context[1],
+                "model": self.model,
+                "usage": _usage(response),  # for the whole request
+                "batch_size": len(captures),
+                "latencies_ms": dict(capture.timings, analyze_ms=analyze_ms),
+            })
+        return entries
     
     def capture_focused_window(self) -> Optional[Image.Image]:
         """Capture only the currently focused window as a PIL Image.
@@ -234,70 +758,41 @@ class ActivityLogger:
         info = self.get_frontmost_window_info()
         if not info or not info.get('window_id'):
             return None
-
-        window_id = info['window_id']
-        try:
-            image_ref = CGWindowListCreateImage(
-                CGRectInfinite,  # ignored when IncludingWindow is used
-                kCGWindowListOptionIncludingWindow,
-                window_id,
-                kCGWindowImageBoundsIgnoreFraming,
-            )
-            if not image_ref:
-                # Likely missing Screen Recording permission, or window cannot be imaged
-                return None
-
-            width = int(CGImageGetWidth(image_ref))
-            height = int(CGImageGetHeight(image_ref))
-            if width == 0 or height == 0:
-                return None
-
-            provider = CGImageGetDataProvider(image_ref)
-            data = CGDataProviderCopyData(provider)
-            if data is None:
-                return None
-            raw = bytes(data)
-
-            # Convert from BGRA to RGBA for PIL
-            image = Image.frombuffer(
-                "RGBA",
-                (width, height),
-                raw,
-                "raw",
-                "BGRA",
-                0,
-                1,
-            )
-            return image
-        except Exception as e:
-            print(f"Failed to capture focused window: {e}")
-            return None
+        return capture_window(info['window_id'])
     
-    def capture_screenshot(self) -> Image.Image:
-        """Capture a screenshot per capture_mode with safe fallback to full display."""
-        if self.capture_mode == "focused_window":
-            img = self.capture_focused_window()
-            if img is not None:
-                return img
-            print("Focused window capture failed; falling back to full-display screenshot.")
-
-        # Full display capture via mss
-        screenshot_data = self.mss_instance.grab(self.mss_instance.monitors[0])
-        screenshot = Image.frombytes("RGB", screenshot_data.size, screenshot_data.bgra, "raw", "BGRX")
-        return screenshot
+    def capture_screenshot(self) -> Optional[Image.Image]:
+        """Capture a screenshot with the configured backend (capture_mode by default)."""
+        return self.capture_backend.grab()
     
-    def log_response(self, response_content: str) -> str:
-        """Log the AI response to a daily log file"""
-        date_str = datetime.datetime.now().strftime("%m-%d-%y")   # CHANGED
-        log_filename = f"actions_log_{date_str}.txt"              # CHANGED
-        actions_log = os.path.join(self.log_dir, log_filename)          # CHANGED
-        
-        with open(actions_log, "a") as f:  # same logic, still append
-            timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            f.write(f"[{timestamp}] {response_content}\n")                  # CHANGED
-            print(f"[Wrote to] {actions_log}")
-            print(f"[Wrote log] {response_content}")
-        
+    def log_response(
+        self,
+        response_content: str,
+        timestamp: Optional[datetime.datetime] = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Queue the AI response for the daily log files.
+
+        timestamp is when the screenshot was captured; defaults to now. details
+        (window context, model, token usage, latencies) go into the JSONL record.
+        The entry is written by the log-writer thread.
+        """
+        when = timestamp or datetime.datetime.now()
+        category, description = parse_category(response_content)
+        record: Dict[str, Any] = {
+            "captured_at": when.isoformat(),
+            "category": category,
+            "description": description,
+        }
+        record.update(details or {})
+        if record.get("latencies_ms"):
+            record["latencies_ms"] = {k: round(v, 2) for k, v in record["latencies_ms"].items()}
+            if timestamp is not None:
+                # Capture to hand-off to the log writer; the "log" span covers the write itself
+                self.metrics.span("end_to_end", (datetime.datetime.now() - timestamp).total_seconds())
+        self.metrics.count("entries_logged")
+        self.log_writer.write(response_content, when, record)
+        print(f"[Wrote log] {response_content}")
+
         # Notify GUI of new log entry if callback is set
         if self.on_status_change:
             self.on_status_change("logged", response_content)
@@ -305,47 +800,46 @@ class ActivityLogger:
         return response_content     
     
     def keyboard_event_callback(self, proxy: Any, event_type: Any, event: Any, refcon: Any) -> Any:
-        """This runs BEFORE the system processes the key"""
-        if event_type == kCGEventKeyDown:
-            keycode = CGEventGetIntegerValueField(event, kCGKeyboardEventKeycode)
+        """This runs BEFORE the system processes the key.
+
+        In hand-off mode nothing here blocks: the capture thread is signalled and
+        the event is returned straight away.
+        """
+        get_field, tap_enable, key_down, keycode_field = self._tap_api
+
+        started = time.perf_counter()
+        if event_type == key_down:
+            keycode = get_field(event, keycode_field)
             
             if keycode == self.ENTER_KEYCODE:
-                print('enter pressed')
-                screenshot: Image.Image = self.capture_screenshot()
-                threading.Thread(target=self.save_screenshot, args=(screenshot,), daemon=True).start()
-                threading.Thread(target=self.analyze_screenshot_then_log, args=(screenshot,), daemon=True).start()
+                if self.frame_budget is None or self.frame_budget.admit(started):
+                    self._request_capture(started)
     
                 if self.event_tap:
-                    CGEventTapEnable(self.event_tap, True)
+                    tap_enable(self.event_tap, True)
+                self.callback_latency.record(time.perf_counter() - started)
         
         # Return the event to let it continue to the system
         return event
     
-    def save_screenshot(self, screenshot: Image.Image) -> None:
-        """Save screenshot to file; keep only 5 screenshots, deleting from right side of reverse-sorted list."""
-        file_path = os.path.join(self.screenshot_folder, f"screenshot_{self.file_num}.png")
-        self.file_num += 1
-        redacted_screenshot: Image.Image = redact_image(screenshot)
-        redacted_screenshot.save(file_path)
-        print(f'screenshot saved to {file_path}')
-
-        # --- New logic: reverse sort by modification time ---
-        screenshots = sorted(
-            [os.path.join(self.screenshot_folder, f) for f in os.listdir(self.screenshot_folder)
-             if f.lower().endswith('.png')],
-            key=os.path.getmtime,
-            reverse=True   # newest first
-        )
+    def _request_capture(self, requested_at: float) -> None:
+        """Capture on the hand-off thread, or right here when hand-off is off."""
+        if self.capture_handoff:
+            self.capture_thread.request(requested_at)
+        else:
+            frame = self.capture_backend.grab_frame()
+            if frame is not None:
+                self._on_captured(frame, requested_at)
+
+    def save_screenshot(self, screenshot: Image.Image) -> Optional[str]:
+        """Redact, encode and save a screenshot, applying the retention limits.
+
+        Redaction is shared with analyze_screenshot_then_log() for the same frame.
+        Returns the content-addressed path, or None if the writer was busy.
+        """
+        encoder = self.screenshot_encoder or self.encoder
+        return self.screenshot_store.put(encoder.encode(self.redaction_cache.redact(screenshot)))
 
-        while len(screenshots) > 5:
-            oldest = screenshots.pop()
-            try:
-                os.remove(oldest)
-                print(f'deleted screenshot: {oldest}')
-            except Exception as e:
-                print(f'failed to delete {oldest}: {e}')
-                break
-    
     def is_running(self) -> bool:
         """Check if the logger is currently running"""
         return self._running
@@ -356,8 +850,46 @@ class ActivityLogger:
             return
             
         self._should_stop = False
+        self.metrics.start()
+        if self.profiler is not None:
+            self.profiler.start()
+        self.engine.start()
+        self.log_writer.start()
+        self.screenshot_store.start()
+        if self.log_index is not None:
+            # Backfill logs written before the index existed (or while it was off)
+            threading.Thread(target=self._backfill_index, name="log-index-backfill", daemon=True).start()
+        if self.archiver is not None:
+            self.archiver.start()
+        self.pipeline.start()
+        if self.batcher is not None:
+            self.batcher.start()
+        if self.drainer is not None:
+            # Resumes frames left over from a previous run or an outage
+            self.drainer.start()
+        if self.capture_handoff:
+            self.capture_thread.start()
+        # Deferred imports are paid here rather than on the first Enter press
+        load_ocr()
         
         # Create event tap
+        from Quartz import (
+            CGEventTapCreate,
+            kCGSessionEventTap,
+            kCGHeadInsertEventTap,
+            kCGEventKeyDown,
+            CGEventMaskBit,
+            CFRunLoopAddSource,
+            CFRunLoopGetCurrent,
+            kCFRunLoopCommonModes,
+            CFMachPortCreateRunLoopSource,
+            CFRunLoopRun,
+            CGEventGetIntegerValueField,
+            CGEventTapEnable,
+            kCGKeyboardEventKeycode,
+        )
+        # Looked up once here rather than with an import on every key event
+        self._tap_api = (CGEventGetIntegerValueField, CGEventTapEnable, kCGEventKeyDown, kCGKeyboardEventKeycode)
         event_mask = CGEventMaskBit(kCGEventKeyDown)
         self.event_tap = CGEventTapCreate(
             kCGSessionEventTap,
@@ -397,8 +929,35 @@ class ActivityLogger:
     def _cleanup(self) -> None:
         """Clean up resources"""
         if self.event_tap:
+            from Quartz import CGEventTapEnable
             CGEventTapEnable(self.event_tap, False)
             self.event_tap = None
+
+        self.capture_thread.stop()
+
+        # Give frames already past redaction a moment to finish
+        self.pipeline.stop(drain_timeout=5.0)
+        self.screenshot_store.close()
+        if self.drainer is not None:
+            self.drainer.stop()
+        if self.batcher is not None:
+            self.batcher.stop()
+        self.engine.stop()
+        if self.frame_budget is not None:
+            print(f"Peak frame memory: {self.frame_budget.peak_bytes / 1e6:.1f} MB")
+        if self.profiler is not None:
+            report_dir = self.profiler.stop()
+            if report_dir:
+                print(f"Profile written to {report_dir}")
+        if self.queue is not None:
+            self.queue.close()
+        self.log_writer.close()
+        self.window_provider.close()
+        if self.archiver is not None:
+            self.archiver.stop()
+        if self.log_index is not None:
+            self.log_index.close()
+        self.metrics.close()
         
         self._running = False
         
@@ -414,7 +973,7 @@ class ActivityLogger:
         self._should_stop = True
         
         # Stop the CFRunLoop
-        from Quartz import CFRunLoopStop
+        from Quartz import CFRunLoopGetCurrent, CFRunLoopStop
         CFRunLoopStop(CFRunLoopGetCurrent())
         
         self._cleanup()
@@ -424,11 +983,20 @@ def _sigint_handler(_signum: Optional[int], _frame: Optional[Any]) -> None:
         logger.stop()
 
 
-def main() -> int:
+def main(argv: Optional[List[str]] = None) -> int:
     """Main entry point for the activity logger"""
+    parser = argparse.ArgumentParser(description="AI-powered activity logger")
+    parser.add_argument("--profile", nargs="?", const="", metavar="DIR",
+                        help="Profile each pipeline stage and write reports to DIR on stop "
+                             "(default: logs/profiles/<timestamp>)")
+    args = parser.parse_args(argv)
+    profile_dir = None
+    if args.profile is not None:
+        profile_dir = args.profile or default_profile_dir("logs")
+
     try:
         global logger
-        logger = ActivityLogger()
+        logger = ActivityLogger(profile_dir=profile_dir)
         signal.signal(signal.SIGINT, _sigint_handler) 
         t = threading.Thread(target=logger.start, daemon=True)
         t.start()
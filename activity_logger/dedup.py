@@ -0,0 +1,152 @@
+"""
+Perceptual-hash deduplication of vision requests.
+
+Pressing Enter repeatedly on a screen that barely changed shouldn't cost a
+full API round trip each time. Frames are reduced to a 64-bit DCT perceptual
+hash; a frame within ``max_distance`` bits of a recently analyzed one reuses
+that response. Near-identical frames that arrive while the first is still
+being analyzed wait for its answer instead of sending a second request.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .frame import Frame
+
+HASH_SIZE = 8       # bits per side of the kept low-frequency block (64-bit hash)
+SAMPLE_SIZE = 32    # frames are reduced to SAMPLE_SIZE x SAMPLE_SIZE before the DCT
+
+REUSE = "reuse"         # log the cached description again with the new timestamp
+COALESCE = "coalesce"   # write nothing; the earlier entry already covers this screen
+DEDUP_MODES = (REUSE, COALESCE)
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II basis as an n x n matrix."""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    m = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    m[0, :] = np.sqrt(1.0 / n)
+    return m
+
+
+_DCT = _dct_matrix(SAMPLE_SIZE)
+
+
+def perceptual_hash(image: Union[Image.Image, Frame]) -> int:
+    """64-bit pHash: sign of the low-frequency DCT coefficients against their median."""
+    if isinstance(image, Frame):
+        small = Frame(cv2.resize(image.pixels, (SAMPLE_SIZE, SAMPLE_SIZE), interpolation=cv2.INTER_AREA), image.order)
+        pixels = small.gray().astype(np.float32)
+    else:
+        small = image.resize((SAMPLE_SIZE, SAMPLE_SIZE), Image.BILINEAR, reducing_gap=2.0).convert("L")
+        pixels = np.asarray(small, dtype=np.float32)
+    coeffs = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = coeffs[1:] > np.median(coeffs[1:])  # skip the DC term
+    return int(np.packbits(bits).tobytes().hex() or "0", 16)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ResponseDedup:
+    """LRU of recent frame hashes and the responses they produced."""
+
+    def __init__(
+        self,
+        max_distance: int = 4,
+        max_entries: int = 32,
+        max_age: Optional[float] = 300.0,
+        mode: str = REUSE,
+        wait_timeout: float = 30.0,
+    ) -> None:
+        """
+        Args:
+            max_distance: Hamming distance (bits of 64) under which two frames match
+            max_entries: Recent hashes remembered
+            max_age: Seconds a response stays reusable (None: forever)
+            mode: "reuse" logs the cached response again, "coalesce" logs nothing
+            wait_timeout: Longest wait for an in-flight request on a matching frame
+        """
+        if mode not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{mode}'")
+        self.max_distance = max_distance
+        self.max_entries = max(1, max_entries)
+        self.max_age = max_age
+        self.mode = mode
+        self.wait_timeout = wait_timeout
+
+        self._entries: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._inflight: List[Tuple[int, threading.Event]] = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    def _find(self, fingerprint: int) -> Optional[str]:
+        now = time.monotonic()
+        for key, (response, stored_at) in reversed(self._entries.items()):
+            if self.max_age is not None and now - stored_at > self.max_age:
+                continue
+            if hamming(key, fingerprint) <= self.max_distance:
+                self._entries.move_to_end(key)
+                return response
+        return None
+
+    def begin(self, fingerprint: int) -> Optional[str]:
+        """Return a reusable response, or None if the caller should make the request.
+
+        A None return registers the frame as in flight; the caller must then call
+        ``finish()`` (with the response, or None on failure).
+        """
+        while True:
+            with self._lock:
+                cached = self._find(fingerprint)
+                if cached is not None:
+                    self.hits += 1
+                    return cached
+                pending = next(
+                    (event for key, event in self._inflight if hamming(key, fingerprint) <= self.max_distance),
+                    None,
+                )
+                if pending is None:
+                    self._inflight.append((fingerprint, threading.Event()))
+                    self.misses += 1
+                    return None
+                self.waits += 1
+            if not pending.wait(self.wait_timeout):
+                with self._lock:
+                    self._inflight.append((fingerprint, threading.Event()))
+                    self.misses += 1
+                return None
+
+    def finish(self, fingerprint: int, response: Optional[str]) -> None:
+        with self._lock:
+            if response is not None:
+                self._entries[fingerprint] = (response, time.monotonic())
+                self._entries.move_to_end(fingerprint)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            for i, (key, event) in enumerate(self._inflight):
+                if key == fingerprint:
+                    del self._inflight[i]
+                    event.set()
+                    break
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "waits": self.waits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
@@ -0,0 +1,165 @@
+"""
+Image encoding for the vision API payload.
+
+Frames are downscaled to the resolution the vision model actually looks at
+before encoding, and the base64 data URL is built straight from the encoder's
+buffer. Frame objects are downscaled and encoded with OpenCV directly from
+their NumPy view, without a round trip through PIL.
+"""
+
+import base64
+import io
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import cv2
+from PIL import Image
+
+from .frame import Frame
+
+# OpenAI "high" detail: fit within 2048x2048, then shortest side to 768.
+VISION_MAX_SIDE = 2048
+VISION_SHORT_SIDE = 768
+
+# codec -> (PIL format, MIME type)
+CODECS: Dict[str, Tuple[str, str]] = {
+    "png": ("PNG", "image/png"),
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+# codec -> OpenCV file extension for Frame encoding
+CV2_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+
+
+class EncodedImage:
+    """An encoded frame ready to be embedded in a request."""
+
+    __slots__ = ("data", "mime", "size", "encode_ms")
+
+    def __init__(self, data: memoryview, mime: str, size: Tuple[int, int], encode_ms: float) -> None:
+        self.data = data
+        self.mime = mime
+        self.size = size
+        self.encode_ms = encode_ms
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def base64(self) -> str:
+        return base64.b64encode(self.data).decode("ascii")
+
+    def data_url(self) -> str:
+        return f"data:{self.mime};base64,{self.base64()}"
+
+
+def target_size(
+    width: int,
+    height: int,
+    max_side: Optional[int] = VISION_MAX_SIDE,
+    short_side: Optional[int] = VISION_SHORT_SIDE,
+) -> Tuple[int, int]:
+    """Size a frame is scaled to before upload; never upscales."""
+    scale = 1.0
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+    if short_side and min(width, height) * scale > short_side:
+        scale = short_side / min(width, height)
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+class ImageEncoder:
+    """Downscale and encode frames with a selectable codec, tracking bytes and time per frame."""
+
+    def __init__(
+        self,
+        codec: str = "png",
+        quality: int = 80,
+        png_compress_level: int = 1,
+        max_side: Optional[int] = VISION_MAX_SIDE,
+        short_side: Optional[int] = VISION_SHORT_SIDE,
+    ) -> None:
+        """
+        Args:
+            codec: "png", "jpeg" or "webp"
+            quality: JPEG/WebP quality (1-100)
+            png_compress_level: zlib level for PNG (0-9); low levels are much faster
+                and only slightly larger for screenshots
+            max_side, short_side: Downscale limits; None disables that limit
+        """
+        if codec not in CODECS:
+            raise ValueError(f"Unsupported image codec '{codec}'. Choose from {', '.join(CODECS)}")
+        self.codec = codec
+        self.quality = quality
+        self.png_compress_level = png_compress_level
+        self.max_side = max_side
+        self.short_side = short_side
+
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.total_bytes = 0
+        self.total_ms = 0.0
+        self.last_bytes = 0
+        self.last_ms = 0.0
+
+    def _save_options(self) -> Dict[str, Any]:
+        if self.codec == "png":
+            return {"compress_level": self.png_compress_level}
+        if self.codec == "jpeg":
+            return {"quality": self.quality, "optimize": False}
+        return {"quality": self.quality, "method": 0}
+
+    def _cv2_params(self) -> List[int]:
+        if self.codec == "png":
+            return [cv2.IMWRITE_PNG_COMPRESSION, self.png_compress_level]
+        if self.codec == "jpeg":
+            return [cv2.IMWRITE_JPEG_QUALITY, self.quality]
+        return [cv2.IMWRITE_WEBP_QUALITY, self.quality]
+
+    def _encode_frame(self, frame: Frame, size: Tuple[int, int]) -> memoryview:
+        # Downscale the view first; alpha is dropped from the small copy only
+        ok, buffer = cv2.imencode(CV2_EXTENSIONS[self.codec], frame.resized(size), self._cv2_params())
+        if not ok:
+            raise ValueError(f"OpenCV could not encode {self.codec}")
+        return memoryview(buffer.reshape(-1))
+
+    def _encode_image(self, image: Image.Image, size: Tuple[int, int]) -> memoryview:
+        if size != image.size:
+            image = image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        if image.mode not in ("RGB", "L"):
+            # Alpha carries nothing for the model, and JPEG can't store it
+            image = image.convert("RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, format=CODECS[self.codec][0], **self._save_options())
+        return buffer.getbuffer()
+
+    def encode(self, image: Union[Image.Image, Frame]) -> EncodedImage:
+        started = time.perf_counter()
+        size = target_size(image.width, image.height, self.max_side, self.short_side)
+        if isinstance(image, Frame):
+            data = self._encode_frame(image, size)
+        else:
+            data = self._encode_image(image, size)
+        encode_ms = (time.perf_counter() - started) * 1000.0
+
+        encoded = EncodedImage(data, CODECS[self.codec][1], size, encode_ms)
+        with self._lock:
+            self.frames += 1
+            self.total_bytes += encoded.nbytes
+            self.total_ms += encode_ms
+            self.last_bytes = encoded.nbytes
+            self.last_ms = encode_ms
+        return encoded
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "codec": self.codec,
+                "frames": self.frames,
+                "last_bytes": self.last_bytes,
+                "last_ms": self.last_ms,
+                "avg_bytes": self.total_bytes / self.frames if self.frames else 0,
+                "avg_ms": self.total_ms / self.frames if self.frames else 0.0,
+            }
@@ -0,0 +1,122 @@
+"""
+NumPy-native captured frames.
+
+A Frame wraps the capture buffer (mss's BGRA bytes, or a PIL image's pixels)
+as a NumPy view plus a little metadata, and is what the pipeline passes from
+capture through redaction to encoding. Redaction converts it to grayscale
+once for OCR and blacks out PII boxes in place; the encoder downscales the
+view with OpenCV before dropping alpha, so the only full-resolution copy
+after the grab is the grayscale OCR input. PIL images are produced only at
+the edges (``to_image()``), for callers that still want one.
+"""
+
+import datetime
+import hashlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+# Channel order -> (to grayscale, to BGR) OpenCV conversion codes
+_CONVERSIONS = {
+    "BGRA": (cv2.COLOR_BGRA2GRAY, cv2.COLOR_BGRA2BGR),
+    "BGR": (cv2.COLOR_BGR2GRAY, None),
+    "RGBA": (cv2.COLOR_RGBA2GRAY, cv2.COLOR_RGBA2BGR),
+    "RGB": (cv2.COLOR_RGB2GRAY, cv2.COLOR_RGB2BGR),
+}
+
+# PIL raw decoder per channel order
+_RAW_MODES = {"BGRA": "BGRX", "BGR": "BGR", "RGBA": "RGBX", "RGB": "RGB"}
+
+
+class Frame:
+    """A captured frame: an HxWxC uint8 view of the capture buffer and its metadata."""
+
+    __slots__ = ("pixels", "order", "captured_at", "window", "digest", "redaction_key")
+
+    def __init__(
+        self,
+        pixels: np.ndarray,
+        order: str = "BGRA",
+        captured_at: Optional[datetime.datetime] = None,
+        window: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if order not in _CONVERSIONS:
+            raise ValueError(f"Unsupported channel order '{order}'")
+        self.pixels = pixels
+        self.order = order
+        self.captured_at = captured_at or datetime.datetime.now()
+        # Frontmost window when the frame was grabbed, if the backend knew it
+        self.window = window
+        # Content hash, computed on first use by content_digest()
+        self.digest: Optional[str] = None
+        # RedactionCache key, pinned before the frame is redacted in place
+        self.redaction_key: Optional[Tuple[Any, ...]] = None
+
+    @classmethod
+    def from_bgra(cls, buffer: Any, width: int, height: int, stride: Optional[int] = None, **meta: Any) -> "Frame":
+        """Wrap a BGRA buffer without copying. ``stride`` is bytes per row (default width * 4).
+
+        The buffer must be writable (e.g. mss's ``ScreenShot.raw`` bytearray)
+        for redaction to work in place.
+        """
+        stride = stride or width * 4
+        rows = np.frombuffer(buffer, dtype=np.uint8, count=stride * height).reshape(height, stride // 4, 4)
+        return cls(rows[:, :width], "BGRA", **meta)
+
+    @classmethod
+    def from_image(cls, image: Image.Image, **meta: Any) -> "Frame":
+        """Copy a PIL image's pixels into a new frame."""
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB")
+        return cls(np.array(image), image.mode, **meta)
+
+    @property
+    def width(self) -> int:
+        return self.pixels.shape[1]
+
+    @property
+    def height(self) -> int:
+        return self.pixels.shape[0]
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.pixels.shape[1], self.pixels.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        return self.pixels.nbytes
+
+    def crop(self, box: Tuple[int, int, int, int]) -> "Frame":
+        """View of the (left, top, right, bottom) box; shares pixels with this frame."""
+        left, top, right, bottom = box
+        return Frame(self.pixels[top:bottom, left:right], self.order, self.captured_at, self.window)
+
+    def gray(self) -> np.ndarray:
+        """New single-channel copy for OCR."""
+        return cv2.cvtColor(self.pixels, _CONVERSIONS[self.order][0])
+
+    def fill(self, boxes: Iterable[Tuple[int, int, int, int]]) -> None:
+        """Black out (x, y, width, height) boxes in place, edges inclusive. Alpha is left alone."""
+        for x, y, w, h in boxes:
+            self.pixels[max(y, 0):y + h + 1, max(x, 0):x + w + 1, :3] = 0
+        self.digest = None
+
+    def resized(self, size: Tuple[int, int]) -> np.ndarray:
+        """BGR pixels at ``size``: downscaled first, so alpha is dropped from the small copy."""
+        pixels = self.pixels
+        if size != self.size:
+            pixels = cv2.resize(pixels, size, interpolation=cv2.INTER_AREA)
+        to_bgr = _CONVERSIONS[self.order][1]
+        return pixels if to_bgr is None else cv2.cvtColor(pixels, to_bgr)
+
+    def content_digest(self) -> str:
+        if self.digest is None:
+            self.digest = hashlib.blake2b(np.ascontiguousarray(self.pixels).data, digest_size=16).hexdigest()
+        return self.digest
+
+    def to_image(self) -> Image.Image:
+        """RGB PIL image of the frame (one copy)."""
+        pixels = np.ascontiguousarray(self.pixels)
+        return Image.frombuffer("RGB", self.size, pixels, "raw", _RAW_MODES[self.order], 0, 1)
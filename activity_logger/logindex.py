@@ -0,0 +1,308 @@
+"""
+Full-text index over the daily activity logs.
+
+Entries are kept in an SQLite database (``<log_dir>/.index.db``) with an
+FTS5 table over the description, app name and window title, plus ordinary
+indexes on time, category and app, so queries stay fast however much
+history there is.
+
+Indexing is driven by byte offsets: for each log file the index remembers
+how far it has read and only parses what was appended since. The same code
+backfills existing logs and picks up new entries as the log writer flushes
+them. For each day, the structured ``.jsonl`` log is indexed when it exists
+and the ``.txt`` log otherwise. Days already moved into the compressed
+archive (see archive.py) are indexed from the archive chunks, using the same
+offsets into the original file.
+"""
+
+import datetime
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .archive import ArchiveReader, LogArchive
+from .prompts import parse_category
+
+INDEX_FILENAME = ".index.db"
+
+_LOG_NAME = re.compile(r"^actions_log_(\d\d)-(\d\d)-(\d\d)\.(txt|jsonl)$")
+_TEXT_LINE = re.compile(r"^\[(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d)\] (.*)$")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    captured_at TEXT NOT NULL,
+    category TEXT,
+    app_name TEXT,
+    window_title TEXT,
+    description TEXT NOT NULL,
+    UNIQUE (source, offset)
+);
+CREATE INDEX IF NOT EXISTS entries_time ON entries (captured_at);
+CREATE INDEX IF NOT EXISTS entries_category ON entries (category COLLATE NOCASE, captured_at);
+CREATE INDEX IF NOT EXISTS entries_app ON entries (app_name COLLATE NOCASE, captured_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5 (
+    description, app_name, window_title, content='entries', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, description, app_name, window_title)
+    VALUES (new.id, new.description, new.app_name, new.window_title);
+END;
+CREATE TABLE IF NOT EXISTS sources (
+    day TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    offset INTEGER NOT NULL
+);
+"""
+
+
+def _log_day(name: str) -> Optional[str]:
+    """'actions_log_10-18-26.jsonl' -> '2026-10-18'."""
+    m = _LOG_NAME.match(name)
+    if not m:
+        return None
+    month, day, year = m.group(1), m.group(2), m.group(3)
+    return f"20{year}-{month}-{day}"
+
+
+def _parse_text(line: str) -> Optional[Dict[str, Any]]:
+    m = _TEXT_LINE.match(line)
+    if not m:
+        return None  # continuation of a multi-line reply
+    category, description = parse_category(m.group(2))
+    return {
+        "captured_at": m.group(1).replace(" ", "T"),
+        "category": category,
+        "description": description,
+    }
+
+
+def _parse_json(line: str) -> Optional[Dict[str, Any]]:
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(record, dict) or "captured_at" not in record:
+        return None
+    if record.get("description") is None:
+        record["category"], record["description"] = parse_category(record.get("text", ""))
+    return record
+
+
+def _fts_query(text: str) -> str:
+    """Quote each word so user input can't trip FTS5 syntax; keep trailing * as a prefix match."""
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _with_offsets(lines: Iterable[bytes], start: int) -> Iterable[Tuple[int, bytes]]:
+    offset = start
+    for line in lines:
+        yield offset, line
+        offset += len(line)
+
+
+class LogIndex:
+    """SQLite FTS5 index of log entries, updated incrementally by byte offset."""
+
+    def __init__(self, log_dir: str, path: Optional[str] = None) -> None:
+        self.log_dir = log_dir
+        self.path = path or os.path.join(log_dir, INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            self._conn.executescript(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            self._conn.close()
+            raise RuntimeError(f"SQLite FTS5 is not available: {e}")
+
+    def _source_offset(self, day: str, name: str, exists: Callable[[str], bool]) -> Optional[int]:
+        """Index one file per day: whichever was indexed first, else prefer .jsonl.
+
+        Returns the offset already indexed, or None if ``name`` isn't the day's source.
+        """
+        row = self._conn.execute("SELECT name, offset FROM sources WHERE day = ?", (day,)).fetchone()
+        if row is not None:
+            return row[1] if row[0] == name else None
+        if name.endswith(".txt") and exists(name[:-4] + ".jsonl"):
+            return None
+        self._conn.execute("INSERT INTO sources (day, name, offset) VALUES (?, ?, 0)", (day, name))
+        return 0
+
+    def _parse_lines(self, name: str, lines: Iterable[Tuple[int, bytes]], rows: List[Tuple[Any, ...]]) -> int:
+        """Parse complete (offset, line) pairs into ``rows``; returns the offset after the last one."""
+        parse = _parse_json if name.endswith(".jsonl") else _parse_text
+        end = 0
+        for offset, raw in lines:
+            if not raw.endswith(b"\n"):
+                break  # partial line still being written
+            record = parse(raw.decode("utf-8", errors="replace").rstrip("\n"))
+            if record is not None:
+                rows.append((
+                    name, offset, record["captured_at"], record.get("category"),
+                    record.get("app_name"), record.get("window_title"), record["description"],
+                ))
+            end = offset + len(raw)
+        return end
+
+    def _index_file(self, name: str, exists: Callable[[str], bool]) -> int:
+        day = _log_day(name)
+        offset = None if day is None else self._source_offset(day, name, exists)
+        if offset is None:
+            return 0
+        path = os.path.join(self.log_dir, name)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0
+        if size <= offset:
+            return 0
+
+        rows: List[Tuple[Any, ...]] = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            end = self._parse_lines(name, _with_offsets(f, offset), rows)
+        return self._store(day, rows, max(offset, end))
+
+    def _index_archived(self, name: str, archive: LogArchive, exists: Callable[[str], bool]) -> int:
+        day = _log_day(name)
+        offset = None if day is None else self._source_offset(day, name, exists)
+        if offset is None or archive.raw_size(name) <= offset:
+            return 0
+        rows: List[Tuple[Any, ...]] = []
+        end = offset
+        for chunk, raw in archive.iter_chunks(name, from_raw_offset=offset):
+            lines = [(o, line) for o, line in _with_offsets(raw.splitlines(keepends=True), chunk["raw_offset"])
+                     if o >= offset]
+            end = max(end, self._parse_lines(name, lines, rows))
+        return self._store(day, rows, end)
+
+    def _store(self, day: str, rows: List[Tuple[Any, ...]], offset: int) -> int:
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO entries (source, offset, captured_at, category, app_name, "
+                "window_title, description) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("UPDATE sources SET offset = ? WHERE day = ?", (offset, day))
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def _live_exists(self, name: str) -> bool:
+        return os.path.exists(os.path.join(self.log_dir, name))
+
+    def update(self, paths: Iterable[str]) -> int:
+        """Index whatever was appended to these log files. Returns entries added."""
+        added = 0
+        with self._lock:
+            for path in paths:
+                added += self._index_file(os.path.basename(path), self._live_exists)
+        return added
+
+    def sync(self) -> int:
+        """Backfill/catch up on every log file in log_dir and its archive. Returns entries added."""
+        archived = ArchiveReader(self.log_dir).archived_names()
+        live = {name for name in os.listdir(self.log_dir) if _LOG_NAME.match(name)}
+
+        def exists(name: str) -> bool:
+            return name in live or name in archived
+
+        def order(name: str) -> Tuple[str, bool]:
+            # .jsonl before .txt so a day with both is indexed from the structured log
+            return name.rsplit(".", 1)[0], not name.endswith(".jsonl")
+
+        added = 0
+        with self._lock:
+            for name in sorted(archived, key=order):
+                added += self._index_archived(name, archived[name], exists)
+            for name in sorted(live, key=order):
+                added += self._index_file(name, exists)
+        return added
+
+    def query(
+        self,
+        text: Optional[str] = None,
+        since: Optional[datetime.date] = None,
+        until: Optional[datetime.date] = None,
+        category: Optional[str] = None,
+        app: Optional[str] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Newest-first entries matching all given filters.
+
+        ``text`` is matched word by word against the description, app and
+        window title (``word*`` for a prefix); ``since``/``until`` are
+        inclusive dates; ``app`` matches a substring of the app name.
+        """
+        where: List[str] = []
+        params: List[Any] = []
+        if text and _fts_query(text):
+            where.append("e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)")
+            params.append(_fts_query(text))
+        if since is not None:
+            where.append("e.captured_at >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            where.append("e.captured_at < ?")
+            params.append((until + datetime.timedelta(days=1)).isoformat())
+        if category:
+            where.append("e.category = ? COLLATE NOCASE")
+            params.append(category)
+        if app:
+            where.append("e.app_name LIKE ?")
+            params.append(f"%{app}%")
+        sql = "SELECT e.captured_at, e.category, e.app_name, e.window_title, e.description FROM entries e"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.captured_at DESC LIMIT ?"
+        params.append(limit)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        keys = ("captured_at", "category", "app_name", "window_title", "description")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def parse_date(value: str, today: Optional[datetime.date] = None) -> datetime.date:
+    """YYYY-MM-DD, 'today', 'yesterday', or 'Nd' (N days ago)."""
+    today = today or datetime.date.today()
+    value = value.strip().lower()
+    if value == "today":
+        return today
+    if value == "yesterday":
+        return today - datetime.timedelta(days=1)
+    if value.endswith("d") and value[:-1].isdigit():
+        return today - datetime.timedelta(days=int(value[:-1]))
+    return datetime.date.fromisoformat(value)
+
+
+def format_result(entry: Dict[str, Any]) -> str:
+    when = entry["captured_at"].replace("T", " ")[:19]
+    category = f"[{entry['category']}] " if entry.get("category") else ""
+    app = f"({entry['app_name']}) " if entry.get("app_name") else ""
+    return f"[{when}] {category}{app}{entry['description']}"
+
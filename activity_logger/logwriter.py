@@ -0,0 +1,340 @@
+"""
+Dedicated writer thread for the daily activity log.
+
+Analysis workers hand finished entries to a queue instead of opening the log
+file themselves. One thread keeps today's ``actions_log_MM-DD-YY.txt`` open,
+writes whatever has queued up in one go (group commit), and rotates to the
+next day's file the first time an entry dated after midnight arrives.
+
+Each entry can be written as a text line (``.txt``), a JSON record
+(``.jsonl``, one object per line), or both. The writer adds ``written_at``
+to each JSON record when it commits it.
+
+Flush policies:
+    "entry"     flush (and fsync, if enabled) after every group of entries
+    "interval"  flush at most every ``flush_interval`` seconds
+    "shutdown"  leave buffering to the OS until close()
+"""
+
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TextIO, Tuple
+
+FLUSH_ENTRY = "entry"
+FLUSH_INTERVAL = "interval"
+FLUSH_SHUTDOWN = "shutdown"
+FLUSH_POLICIES = (FLUSH_ENTRY, FLUSH_INTERVAL, FLUSH_SHUTDOWN)
+
+TEXT = "text"
+JSONL = "jsonl"
+LOG_FORMATS = {TEXT: (TEXT,), JSONL: (JSONL,), "both": (TEXT, JSONL)}
+_EXTENSIONS = {TEXT: ".txt", JSONL: ".jsonl"}
+
+_STOP = object()
+_FLUSH = object()
+
+
+def log_filename(day: datetime.date, fmt: str = TEXT) -> str:
+    return f"actions_log_{day.strftime('%m-%d-%y')}{_EXTENSIONS[fmt]}"
+
+
+def format_text(when: datetime.datetime, text: str) -> str:
+    return f"[{when.strftime('%Y-%m-%d %H:%M:%S')}] {text}\n"
+
+
+def format_record(record: Dict[str, Any]) -> str:
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+
+
+class LogWriter:
+    """Queue-fed, group-committing writer for the daily log files."""
+
+    def __init__(
+        self,
+        log_dir: str,
+        flush_policy: str = FLUSH_INTERVAL,
+        flush_interval: float = 0.2,
+        fsync: bool = False,
+        max_group: int = 256,
+        log_format: str = TEXT,
+        on_flush: Optional[Callable[[List[str]], None]] = None,
+        on_written: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        """
+        Args:
+            log_dir: Directory holding the daily log files
+            flush_policy: "entry", "interval" or "shutdown" (see module docstring)
+            flush_interval: Seconds between flushes for the "interval" policy
+            fsync: Also fsync on each flush, so entries survive power loss
+            max_group: Most entries written per commit
+            log_format: "text", "jsonl" or "both"
+            on_flush: Called on the writer thread with the paths just flushed,
+                e.g. to index the new entries
+            on_written: Called on the writer thread with each entry's seconds from
+                write() until it was committed (queue wait plus write)
+        """
+        if flush_policy not in FLUSH_POLICIES:
+            raise ValueError(f"Unknown flush policy '{flush_policy}'")
+        if log_format not in LOG_FORMATS:
+            raise ValueError(f"Unknown log format '{log_format}'")
+        self.formats = LOG_FORMATS[log_format]
+        self.on_flush = on_flush
+        self.on_written = on_written
+        self.log_dir = log_dir
+        self.flush_policy = flush_policy
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_group = max(1, max_group)
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._files: Dict[str, TextIO] = {}
+        self._day: Optional[datetime.date] = None
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._written = threading.Condition()
+
+        self.submitted = 0
+        # Sequence numbers (1-based, in write() order) of the newest entry that was
+        # handed to the files, that is flushed to disk, and that was lost to an error
+        self._committed_seq = 0
+        self.flushed_seq = 0
+        self.failed_seq = 0
+        self.write_errors = 0
+        self.entries = 0
+        self.commits = 0
+        self.flushes = 0
+        self.rotations = 0
+
+    def current_path(self, fmt: str = TEXT) -> Optional[str]:
+        return os.path.join(self.log_dir, log_filename(self._day, fmt)) if self._day else None
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+            self._thread.start()
+
+    def write(self, text: str, timestamp: Optional[datetime.datetime] = None,
+              record: Optional[Dict[str, Any]] = None) -> None:
+        """Queue one entry; ``timestamp`` (default now) sets its prefix and day file.
+
+        ``record`` is the JSON form of the entry (default: timestamp and text).
+        """
+        self.start()
+        with self._written:
+            self.submitted += 1
+            # Queued under the lock so sequence numbers reach the queue in order
+            self._queue.put((timestamp or datetime.datetime.now(), text, record, time.perf_counter(), self.submitted))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is written and flushed to disk.
+
+        Returns False on timeout, if the writer isn't running, or if an entry
+        queued since the last successful flush could not be written.
+        """
+        with self._written:
+            target = self.submitted
+            baseline = self.flushed_seq
+            if self.flushed_seq >= target and self.failed_seq <= baseline:
+                return True
+            if self._thread is None:
+                return False
+        self._queue.put(_FLUSH)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._written:
+            while self.flushed_seq < target and self.failed_seq <= baseline:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._written.wait(remaining)
+            return self.failed_seq <= baseline
+
+    def _open_day(self, day: datetime.date) -> None:
+        """Rotate forward to ``day``'s file; only ever moves to a later day."""
+        if self._files:
+            self._flush_files()
+            self._close_files()
+            self.rotations += 1
+        self._day = day
+        self._files = {
+            fmt: open(os.path.join(self.log_dir, log_filename(day, fmt)), "a", encoding="utf-8")
+            for fmt in self.formats
+        }
+
+    def _close_files(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+
+    def _flush_files(self) -> None:
+        if not self._files or not self._dirty:
+            self._flushed(self._committed_seq)
+            return
+        try:
+            for f in self._files.values():
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        except OSError as e:
+            self._failed(self._committed_seq, e)
+            return
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self.flushes += 1
+        self._flushed(self._committed_seq)
+        self._notify_flush([f.name for f in self._files.values()])
+
+    def _flushed(self, seq: int) -> None:
+        with self._written:
+            if seq > self.flushed_seq:
+                self.flushed_seq = seq
+                self._written.notify_all()
+
+    def _failed(self, seq: int, error: OSError) -> None:
+        """Entries up to ``seq`` may not be on disk; make pending flush() calls fail."""
+        print(f"Error writing activity log: {error}")
+        with self._written:
+            self.write_errors += 1
+            self.failed_seq = max(self.failed_seq, seq)
+            self._written.notify_all()
+
+    def _notify_flush(self, paths: List[str]) -> None:
+        if self.on_flush is None:
+            return
+        try:
+            self.on_flush(paths)
+        except Exception as e:
+            print(f"Log flush hook failed: {e}")
+
+    def _notify_written(self, queued_at: List[float]) -> None:
+        if self.on_written is None or not queued_at:
+            return
+        now = time.perf_counter()
+        try:
+            for started in queued_at:
+                self.on_written(now - started)
+        except Exception as e:
+            print(f"Log write hook failed: {e}")
+
+    def _lines(self, when: datetime.datetime, text: str, record: Optional[Dict[str, Any]],
+               written_at: str) -> Dict[str, str]:
+        lines = {}
+        if TEXT in self.formats:
+            lines[TEXT] = format_text(when, text)
+        if JSONL in self.formats:
+            record = dict(record) if record else {"captured_at": when.isoformat(), "text": text}
+            record["written_at"] = written_at
+            lines[JSONL] = format_record(record)
+        return lines
+
+    def _commit(self, group: List[Tuple[datetime.datetime, str, Optional[Dict[str, Any]]]], last_seq: int) -> None:
+        written_at = datetime.datetime.now().isoformat()
+        late: Dict[Tuple[datetime.date, str], List[str]] = {}
+        for when, text, record in group:
+            day = when.date()
+            if self._day is None or day > self._day:
+                self._open_day(day)
+            for fmt, line in self._lines(when, text, record, written_at).items():
+                if day == self._day:
+                    self._files[fmt].write(line)
+                    self._dirty = True
+                else:
+                    # A frame captured before midnight that finished analysis after it
+                    late.setdefault((day, fmt), []).append(line)
+        for (day, fmt), lines in late.items():
+            with open(os.path.join(self.log_dir, log_filename(day, fmt)), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        if late:
+            self._notify_flush([os.path.join(self.log_dir, log_filename(day, fmt)) for day, fmt in late])
+        self._committed_seq = last_seq
+
+        if self.flush_policy == FLUSH_ENTRY:
+            self._flush_files()
+        elif self.flush_policy == FLUSH_INTERVAL and time.monotonic() - self._last_flush >= self.flush_interval:
+            self._flush_files()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            timeout = None
+            if self._dirty and self.flush_policy == FLUSH_INTERVAL:
+                timeout = max(0.0, self._last_flush + self.flush_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_files()
+                continue
+
+            group: List[Tuple[datetime.datetime, str, Optional[Dict[str, Any]]]] = []
+            queued_at: List[float] = []
+            last_seq = self._committed_seq
+            force_flush = False
+            while True:
+                if item is _STOP:
+                    stopping = True
+                elif item is _FLUSH:
+                    force_flush = True
+                else:
+                    group.append(item[:3])
+                    queued_at.append(item[3])
+                    last_seq = item[4]
+                if stopping or len(group) >= self.max_group:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            try:
+                if group:
+                    self._commit(group, last_seq)
+            except OSError as e:
+                # Later flushes move past these entries; flush() callers waiting on them get False
+                self._committed_seq = last_seq
+                self._failed(last_seq, e)
+            else:
+                self._notify_written(queued_at)
+            if force_flush or stopping:
+                self._flush_files()
+            with self._written:
+                self.entries += len(group)
+                self.commits += 1 if group else 0
+                self._written.notify_all()
+
+        self._close_files()
+        self._day = None
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Write everything still queued, flush, and close the files."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._written:
+            return {
+                "entries": self.entries,
+                "pending": self.submitted - self.entries,
+                "commits": self.commits,
+                "avg_group": self.entries / self.commits if self.commits else 0.0,
+                "flushes": self.flushes,
+                "write_errors": self.write_errors,
+                "rotations": self.rotations,
+                "policy": self.flush_policy,
+                "fsync": self.fsync,
+                "formats": list(self.formats),
+            }
@@ -0,0 +1,386 @@
+"""
+Lightweight latency metrics for the capture hot path.
+
+LatencyHistogram is a fixed-bucket histogram for microsecond-scale timings
+such as the event-tap callback. Metrics collects per-stage spans (capture,
+redact, encode, analyze, log, end_to_end) in rolling windows with exact
+percentiles, plus counters, and fans them out to pluggable sinks: a
+Prometheus text file (PrometheusFileSink) or a local HTTP endpoint
+(HTTPMetricsSink). `activity-logger stats` prints the percentiles.
+"""
+
+import collections
+import datetime
+import json
+import math
+import os
+import threading
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence
+
+# Histogram bucket upper bounds in microseconds: 1us, 2us, 4us ... ~67s
+BUCKET_BOUNDS_US: List[float] = [float(2 ** i) for i in range(27)]
+
+
+class LatencyHistogram:
+    """Fixed log2-bucket latency histogram. Recording is O(1)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.counts = [0] * (len(BUCKET_BOUNDS_US) + 1)
+        self.count = 0
+        self.total_us = 0.0
+        self.max_us = 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def record(self, seconds: float) -> None:
+        us = seconds * 1_000_000.0
+        # Index of the first bound >= us, via the exponent of the value
+        idx = 0 if us <= 1.0 else min((math.ceil(us) - 1).bit_length(), len(BUCKET_BOUNDS_US))
+        with self._lock:
+            self.counts[idx] += 1
+            self.count += 1
+            self.total_us += us
+            if us > self.max_us:
+                self.max_us = us
+
+    def percentile(self, p: float) -> float:
+        """Upper bound (in microseconds) of the bucket holding the p-th percentile."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = p / 100.0 * self.count
+            seen = 0
+            for idx, n in enumerate(self.counts):
+                seen += n
+                if n and seen >= rank:
+                    if idx < len(BUCKET_BOUNDS_US):
+                        return min(BUCKET_BOUNDS_US[idx], self.max_us)
+                    return self.max_us
+            return self.max_us
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            count = self.count
+            mean = self.total_us / count if count else 0.0
+            max_us = self.max_us
+            buckets = {
+                (f"<={int(BUCKET_BOUNDS_US[i])}us" if i < len(BUCKET_BOUNDS_US) else "overflow"): n
+                for i, n in enumerate(self.counts) if n
+            }
+        return {
+            "count": count,
+            "mean_us": mean,
+            "p50_us": self.percentile(50),
+            "p99_us": self.percentile(99),
+            "max_us": max_us,
+            "buckets": buckets,
+        }
+
+
+def percentiles(values: Iterable[float], points: Sequence[float] = (50, 95, 99)) -> List[float]:
+    """Nearest-rank percentiles of ``values`` (0.0 for no values)."""
+    ordered = sorted(values)
+    if not ordered:
+        return [0.0 for _ in points]
+    return [ordered[min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))] for p in points]
+
+
+def summarize_ms(values_ms: Sequence[float], total: Optional[int] = None) -> Dict[str, Any]:
+    """count/mean/p50/p95/p99/max of millisecond samples. ``total`` counts samples beyond the window."""
+    p50, p95, p99 = percentiles(values_ms)
+    return {
+        "count": len(values_ms) if total is None else total,
+        "window": len(values_ms),
+        "mean_ms": sum(values_ms) / len(values_ms) if values_ms else 0.0,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "max_ms": max(values_ms) if values_ms else 0.0,
+    }
+
+
+class RollingHistogram:
+    """Exact percentiles over the most recent ``size`` samples."""
+
+    def __init__(self, size: int = 1024) -> None:
+        self._samples: Deque[float] = collections.deque(maxlen=max(1, size))
+        self.count = 0
+        self.total_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        self._samples.append(ms)
+        self.count += 1
+        self.total_ms += ms
+
+    def summary(self) -> Dict[str, Any]:
+        stats = summarize_ms(list(self._samples), self.count)
+        stats["sum_ms"] = self.total_ms
+        return stats
+
+
+class MetricsSink:
+    """Receives spans and counter increments; may also export Metrics.snapshot().
+
+    All methods are optional. span() and count() are called on the hot path
+    and must not block.
+    """
+
+    def open(self, metrics: "Metrics") -> None:
+        pass
+
+    def span(self, stage: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, value: float) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class Metrics:
+    """Per-stage timing spans and counters, kept in rolling windows and fanned out to sinks."""
+
+    def __init__(self, sinks: Sequence[MetricsSink] = (), window: int = 1024) -> None:
+        """
+        Args:
+            sinks: Where spans and counters also go (see PrometheusFileSink, HTTPMetricsSink)
+            window: Recent samples per stage that percentiles are computed over
+        """
+        self.sinks = list(sinks)
+        self.window = window
+        self._lock = threading.Lock()
+        self._stages: Dict[str, RollingHistogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._open = False
+
+    def start(self) -> None:
+        if self._open:
+            return
+        self._open = True
+        for sink in self.sinks:
+            try:
+                sink.open(self)
+            except Exception as e:
+                print(f"Metrics sink {type(sink).__name__} unavailable: {e}")
+
+    def span(self, stage: str, seconds: float) -> None:
+        """Record how long one capture spent in ``stage``."""
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = RollingHistogram(self.window)
+            histogram.record(seconds * 1000.0)
+        for sink in self.sinks:
+            sink.span(stage, seconds)
+
+    def count(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+        for sink in self.sinks:
+            sink.count(name, value)
+
+    def add_collector(self, collector: Callable[[], Dict[str, float]]) -> None:
+        """Counters read at snapshot time from components that already keep them."""
+        self._collectors.append(collector)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {stage: h.summary() for stage, h in self._stages.items()}
+            counters = dict(self._counters)
+        for collector in self._collectors:
+            try:
+                counters.update(collector())
+            except Exception as e:
+                print(f"Metrics collector failed: {e}")
+        return {"stages": stages, "counters": counters}
+
+    def close(self) -> None:
+        if not self._open:
+            return
+        self._open = False
+        for sink in self.sinks:
+            try:
+                sink.close()
+            except Exception as e:
+                print(f"Metrics sink {type(sink).__name__} failed to close: {e}")
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def prometheus_text(snapshot: Dict[str, Any], prefix: str = "activity_logger") -> str:
+    """Render a Metrics snapshot in the Prometheus text exposition format."""
+    lines = [
+        f"# HELP {prefix}_stage_seconds Time a capture spent in each pipeline stage (recent window).",
+        f"# TYPE {prefix}_stage_seconds summary",
+    ]
+    for stage, stats in sorted(snapshot["stages"].items()):
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {stats[key] / 1000.0:.6f}')
+        lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["sum_ms"] / 1000.0:.6f}')
+        lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+    for name, value in sorted(snapshot["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusFileSink(MetricsSink):
+    """Rewrites a Prometheus text file every ``interval`` seconds (node_exporter textfile style)."""
+
+    def __init__(self, path: str, interval: float = 10.0) -> None:
+        self.path = path
+        self.interval = interval
+        self._metrics: Optional[Metrics] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def open(self, metrics: Metrics) -> None:
+        self._metrics = metrics
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-file", daemon=True)
+        self._thread.start()
+
+    def write(self) -> None:
+        if self._metrics is None:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(prometheus_text(self._metrics.snapshot()))
+        os.replace(tmp_path, self.path)  # scrapers never see a half-written file
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Failed to write metrics to {self.path}: {e}")
+
+    def close(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(5.0)
+        self._thread = None
+        try:
+            self.write()
+        except OSError as e:
+            print(f"Failed to write metrics to {self.path}: {e}")
+
+
+class HTTPMetricsSink(MetricsSink):
+    """Serves ``/metrics`` (Prometheus text) and ``/metrics.json`` on a local port."""
+
+    def __init__(self, port: int = 9464, host: str = "127.0.0.1") -> None:
+        self.host = host
+        self.port = port
+        self._server: Optional[Any] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def open(self, metrics: Metrics) -> None:
+        # Only needed when serving; http.server pulls in the email package
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                path = self.path.split("?", 1)[0]
+                if path == "/metrics":
+                    body = prometheus_text(metrics.snapshot()).encode("utf-8")
+                    content_type = "text/plain; version=0.0.4"
+                elif path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]  # resolves port 0
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        print(f"Metrics available at {self.url}/metrics")
+
+    def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._server = None
+        self._thread = None
+
+
+STAGE_ORDER = ("capture", "redact", "encode", "analyze", "log", "end_to_end")
+
+
+def records_snapshot(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """A Metrics-style snapshot computed from JSONL log records.
+
+    Stages come from each record's ``latencies_ms``; ``end_to_end`` is
+    ``written_at - captured_at``. Token counts of batched requests are split
+    across the frames of the batch.
+    """
+    samples: Dict[str, List[float]] = {}
+    counters: Dict[str, float] = {"entries_logged": 0, "dedup_hits": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for record in records:
+        counters["entries_logged"] += 1
+        if record.get("reused"):
+            counters["dedup_hits"] += 1
+        for key, ms in (record.get("latencies_ms") or {}).items():
+            if isinstance(ms, (int, float)):
+                samples.setdefault(key[:-3] if key.endswith("_ms") else key, []).append(float(ms))
+        try:
+            captured = datetime.datetime.fromisoformat(record["captured_at"])
+            written = datetime.datetime.fromisoformat(record["written_at"])
+            samples.setdefault("end_to_end", []).append((written - captured).total_seconds() * 1000.0)
+        except (KeyError, TypeError, ValueError):
+            pass
+        usage = record.get("usage") or {}
+        share = record.get("batch_size") or 1
+        for name in ("prompt_tokens", "completion_tokens"):
+            if isinstance(usage.get(name), (int, float)):
+                counters[name] += usage[name] / share
+    return {"stages": {stage: summarize_ms(values) for stage, values in samples.items()}, "counters": counters}
+
+
+def format_snapshot(snapshot: Dict[str, Any]) -> str:
+    """Table of per-stage percentiles followed by the counters."""
+    stages = snapshot.get("stages", {})
+    order = [s for s in STAGE_ORDER if s in stages] + sorted(s for s in stages if s not in STAGE_ORDER)
+    lines = [f"{'stage':12s} {'count':>7s} {'p50 ms':>10s} {'p95 ms':>10s} {'p99 ms':>10s} {'max ms':>10s}"]
+    for stage in order:
+        s = stages[stage]
+        lines.append(f"{stage:12s} {s['count']:7d} {s['p50_ms']:10.2f} {s['p95_ms']:10.2f} "
+                     f"{s['p99_ms']:10.2f} {s['max_ms']:10.2f}")
+    if not order:
+        lines.append("(no timings recorded)")
+    counters = snapshot.get("counters", {})
+    if counters:
+        lines.append("")
+        width = max(len(name) for name in counters)
+        lines.extend(f"{name:{width}s} {_number(round(value))}" for name, value in sorted(counters.items()))
+    return "\n".join(lines)
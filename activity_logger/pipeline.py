@@ -0,0 +1,278 @@
+"""
+Bounded, multi-stage worker pipeline for captured frames.
+
+Each stage owns a fixed number of worker threads and a bounded queue. When a
+queue is full the stage applies its overflow policy instead of letting work
+pile up:
+
+    block        wait for room (back-pressure to the producer)
+    drop_oldest  discard the oldest queued item to make room
+    coalesce     replace a queued item (same coalesce key, or the newest one)
+
+Stages are chained with ``Pipeline.add_stage(..., after=...)``; a stage
+function returns the item to hand to its downstream stages, or None to stop.
+"""
+
+import collections
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+BLOCK = "block"
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, COALESCE)
+
+# Window (seconds) used for the rolling throughput counter
+THROUGHPUT_WINDOW = 10.0
+
+
+class Stage:
+    """A named pool of worker threads consuming from one bounded queue."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        workers: int = 1,
+        max_queue: int = 4,
+        overflow: str = DROP_OLDEST,
+        coalesce_key: Optional[Callable[[Any], Any]] = None,
+        on_drop: Optional[Callable[[Any], None]] = None,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy '{overflow}' for stage '{name}'")
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.max_queue = max(1, int(max_queue))
+        self.overflow = overflow
+        self.coalesce_key = coalesce_key
+        self.on_drop = on_drop
+        self.downstream: List["Stage"] = []
+
+        self._queue: Deque[Any] = collections.deque()
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+
+        # Counters (guarded by self._cond)
+        self.submitted = 0
+        self.completed = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+        self._completions: Deque[float] = collections.deque()
+
+    def start(self) -> None:
+        with self._cond:
+            self._stopping = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f"pipeline-{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def put(self, item: Any) -> bool:
+        """Queue an item, applying the overflow policy. Returns False if it was dropped."""
+        evicted = None
+        with self._cond:
+            if self._stopping:
+                self.dropped += 1
+                evicted = item
+            else:
+                self.submitted += 1
+                if self.overflow == COALESCE:
+                    evicted = self._coalesce(item)
+                if evicted is None:
+                    while len(self._queue) >= self.max_queue and not self._stopping:
+                        if self.overflow == BLOCK:
+                            self._cond.wait()
+                            continue
+                        if self.overflow == COALESCE:
+                            # No matching key: the newest queued item is superseded
+                            evicted = self._queue.pop()
+                            self.coalesced += 1
+                        else:
+                            evicted = self._queue.popleft()
+                            self.dropped += 1
+                        break
+                    if self._stopping:
+                        self.dropped += 1
+                        evicted = item
+                    else:
+                        self._queue.append(item)
+                self._cond.notify_all()
+        if evicted is not None and self.on_drop:
+            self.on_drop(evicted)
+        return evicted is not item
+
+    def _coalesce(self, item: Any) -> Any:
+        """Replace a queued item with the same coalesce key (caller holds the lock).
+
+        Returns the replaced item, or None if nothing matched.
+        """
+        if self.coalesce_key is None:
+            return None
+        key = self.coalesce_key(item)
+        for i, queued in enumerate(self._queue):
+            if self.coalesce_key(queued) == key:
+                self._queue[i] = item
+                self.coalesced += 1
+                return queued
+        return None
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue and not self._stopping:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                item = self._queue.popleft()
+                self.in_flight += 1
+                self._cond.notify_all()
+
+            started = time.perf_counter()
+            result = None
+            failed = False
+            try:
+                result = self.func(item)
+            except Exception as e:
+                failed = True
+                print(f"Pipeline stage '{self.name}' failed: {e}")
+            elapsed = time.perf_counter() - started
+
+            # Hand off before marking the item done so join() never sees a gap
+            if result is not None:
+                for stage in self.downstream:
+                    stage.put(result)
+
+            with self._cond:
+                self.in_flight -= 1
+                self.busy_seconds += elapsed
+                if failed:
+                    self.errors += 1
+                else:
+                    self.completed += 1
+                    now = time.monotonic()
+                    self._completions.append(now)
+                    while self._completions and now - self._completions[0] > THROUGHPUT_WINDOW:
+                        self._completions.popleft()
+                self._cond.notify_all()
+            # Don't keep the last item (and any frame it holds) alive while idle
+            item = result = None
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the queue is empty and no item is in flight."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self.in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop workers; queued items that were never started are discarded."""
+        with self._cond:
+            self._stopping = True
+            discarded = list(self._queue)
+            self._queue.clear()
+            self.dropped += len(discarded)
+            self._cond.notify_all()
+        if self.on_drop:
+            for item in discarded:
+                self.on_drop(item)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            recent = sum(1 for ts in self._completions if now - ts <= THROUGHPUT_WINDOW)
+            return {
+                "workers": self.workers,
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "overflow": self.overflow,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "throughput_per_s": recent / THROUGHPUT_WINDOW,
+                "avg_ms": (self.busy_seconds / self.completed * 1000.0) if self.completed else 0.0,
+            }
+
+
+class Pipeline:
+    """A small DAG of stages. Items submitted enter every root stage."""
+
+    def __init__(self) -> None:
+        self.stages: Dict[str, Stage] = {}
+        self._roots: List[Stage] = []
+        self._running = False
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        after: Optional[str] = None,
+        **options: Any,
+    ) -> Stage:
+        """Register a stage; ``after`` names the upstream stage (None for a root)."""
+        if name in self.stages:
+            raise ValueError(f"Stage '{name}' already exists")
+        stage = Stage(name, func, **options)
+        if after is None:
+            self._roots.append(stage)
+        else:
+            if after not in self.stages:
+                raise ValueError(f"Unknown upstream stage '{after}'")
+            self.stages[after].downstream.append(stage)
+        self.stages[name] = stage
+        if self._running:
+            stage.start()
+        return stage
+
+    def start(self) -> None:
+        if self._running:
+            return
+        self._running = True
+        for stage in self.stages.values():
+            stage.start()
+
+    def submit(self, item: Any) -> bool:
+        """Feed an item to the root stages. Returns False if any root dropped it."""
+        accepted = True
+        for stage in self._roots:
+            accepted = stage.put(item) and accepted
+        return accepted
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for in-flight work to finish, stage by stage in insertion order."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for stage in self.stages.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not stage.join(remaining):
+                return False
+        return True
+
+    def stop(self, drain_timeout: Optional[float] = 0.0) -> None:
+        """Stop all stages, optionally giving queued work ``drain_timeout`` seconds to finish."""
+        if not self._running:
+            return
+        if drain_timeout:
+            self.drain(drain_timeout)
+        for stage in self.stages.values():
+            stage.stop(timeout=1.0)
+        self._running = False
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Live queue-depth and throughput counters per stage."""
+        return {name: stage.stats() for name, stage in self.stages.items()}
@@ -0,0 +1,293 @@
+"""
+Per-stage CPU and memory profiling (``--profile``).
+
+StageProfiler wraps the pipeline's stage functions. While a wrapped function
+runs, its thread is tagged with the stage name, and a sampling thread reads
+every tagged thread's Python stack ``interval`` seconds apart. Sampling
+works across all worker threads at once and costs little, unlike cProfile,
+which is enabled per thread (and, from Python 3.12, only once per process).
+The samples are written per stage as a pstats file, so the usual tools
+(``python -m pstats``, snakeviz) can read them, next to a text report.
+
+Calls to the memory stages (redaction and encoding by default) are traced
+with tracemalloc. Every ``memory_every``-th call is bracketed by snapshots,
+recording the call's peak traced memory and the source lines whose
+allocations grew. Only Python and NumPy/OpenCV buffers are visible to
+tracemalloc; memory inside PIL images is not. Other threads allocating
+during a sampled call are counted too, so treat peaks as upper bounds.
+"""
+
+import collections
+import datetime
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Counter, Dict, List, Optional, Sequence, Tuple
+
+FuncKey = Tuple[str, int, str]  # (filename, first line, function name), as in pstats
+Stack = Tuple[FuncKey, ...]     # outermost call first
+
+DEFAULT_MEMORY_STAGES = ("redact", "encode")
+
+
+def default_profile_dir(log_dir: str) -> str:
+    """``<log_dir>/profiles/<YYYYmmdd-HHMMSS>``"""
+    return os.path.join(log_dir, "profiles", datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+
+
+def _func_key(code: Any) -> FuncKey:
+    return (code.co_filename, code.co_firstlineno, code.co_name)
+
+
+def stacks_to_pstats(stacks: Counter[Stack], interval: float) -> Dict[FuncKey, Tuple[Any, ...]]:
+    """Turn sampled stacks into the dict pstats.Stats loads.
+
+    Call counts are sample counts; times are samples x interval.
+    """
+    self_samples: Counter[FuncKey] = collections.Counter()
+    cumulative: Counter[FuncKey] = collections.Counter()
+    edges: Counter[Tuple[FuncKey, FuncKey]] = collections.Counter()
+    edge_self: Counter[Tuple[FuncKey, FuncKey]] = collections.Counter()
+    for stack, n in stacks.items():
+        if not stack:
+            continue
+        self_samples[stack[-1]] += n
+        for func in set(stack):
+            cumulative[func] += n
+        for edge in set(zip(stack, stack[1:])):
+            edges[edge] += n
+        if len(stack) > 1:
+            edge_self[(stack[-2], stack[-1])] += n
+
+    callers: Dict[FuncKey, Dict[FuncKey, Tuple[int, int, float, float]]] = collections.defaultdict(dict)
+    for (caller, callee), n in edges.items():
+        callers[callee][caller] = (n, n, edge_self[(caller, callee)] * interval, n * interval)
+    return {
+        func: (n, n, self_samples[func] * interval, n * interval, callers.get(func, {}))
+        for func, n in cumulative.items()
+    }
+
+
+class StageProfiler:
+    """Sampling CPU profile and tracemalloc statistics per pipeline stage."""
+
+    def __init__(
+        self,
+        output_dir: str,
+        interval: float = 0.005,
+        memory_stages: Sequence[str] = DEFAULT_MEMORY_STAGES,
+        memory_every: int = 10,
+        top: int = 30,
+        traceback_frames: int = 1,
+    ) -> None:
+        """
+        Args:
+            output_dir: Where the reports are written on stop()
+            interval: Seconds between stack samples
+            memory_stages: Stages whose calls are traced with tracemalloc
+            memory_every: Trace one call in this many (snapshots are slow)
+            top: Rows per report
+            traceback_frames: Frames tracemalloc keeps per allocation
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.memory_stages = tuple(memory_stages)
+        self.memory_every = max(1, memory_every)
+        self.top = top
+        self.traceback_frames = traceback_frames
+
+        # thread id -> stage it is running; read by the sampler
+        self._active: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        self._stacks: Dict[str, Counter[Stack]] = collections.defaultdict(collections.Counter)
+        self._calls: Counter[str] = collections.Counter()
+        self._seconds: Counter[str] = collections.Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = 0.0
+
+        self._memory_lock = threading.Lock()
+        self._memory_calls: Counter[str] = collections.Counter()
+        # Guarded by _memory_lock
+        self._peaks: Dict[str, List[int]] = collections.defaultdict(list)
+        # stage -> "file:line" -> [bytes grown, blocks grown]
+        self._growth: Dict[str, Dict[str, List[int]]] = collections.defaultdict(dict)
+        self._started_tracemalloc = False
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        if self.memory_stages and not tracemalloc.is_tracing():
+            tracemalloc.start(self.traceback_frames)
+            self._started_tracemalloc = True
+        self._started_at = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+        self._thread.start()
+
+    def wrap(self, stage: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+        """Return ``fn`` instrumented as ``stage``. Nested calls count toward the outer stage."""
+        traced = stage in self.memory_stages
+
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            tid = threading.get_ident()
+            if tid in self._active:
+                return fn(*args, **kwargs)
+            if traced and self._memory_due(stage):
+                return self._traced_call(stage, tid, fn, args, kwargs)
+            return self._timed_call(stage, tid, fn, args, kwargs)
+
+        return profiled
+
+    def _timed_call(self, stage: str, tid: int, fn: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+        # Only this frame and its callees are tagged, so tracemalloc's own work isn't sampled
+        self._active[tid] = stage
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            del self._active[tid]
+            with self._lock:
+                self._calls[stage] += 1
+                self._seconds[stage] += elapsed
+
+    def _sample_loop(self) -> None:
+        boundary = self._timed_call.__code__
+        while not self._stop.wait(self.interval):
+            active = self._active.copy()
+            if not active:
+                continue
+            frames = sys._current_frames()
+            samples = []
+            for tid, stage in active.items():
+                frame = frames.get(tid)
+                stack: List[FuncKey] = []
+                # Walk up to the stage boundary; its callers are pipeline plumbing
+                while frame is not None and frame.f_code is not boundary:
+                    stack.append(_func_key(frame.f_code))
+                    frame = frame.f_back
+                if stack:
+                    samples.append((stage, tuple(reversed(stack))))
+            del frames
+            with self._lock:
+                for stage, stack in samples:
+                    self._stacks[stage][stack] += 1
+
+    def _memory_due(self, stage: str) -> bool:
+        """Count a call to a memory stage; True for the ones to trace."""
+        with self._lock:
+            self._memory_calls[stage] += 1
+            due = (self._memory_calls[stage] - 1) % self.memory_every == 0
+        return due and tracemalloc.is_tracing()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def _traced_call(self, stage: str, tid: int, fn: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+        # Traced calls are serialized so their snapshots and peaks don't interleave
+        with self._memory_lock:
+            before = self._snapshot()
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            try:
+                return self._timed_call(stage, tid, fn, args, kwargs)
+            finally:
+                # Without reset_peak (Python < 3.9) this is the peak since tracing started
+                peak = tracemalloc.get_traced_memory()[1]
+                after = self._snapshot()
+                self._peaks[stage].append(max(0, peak - baseline))
+                growth = self._growth[stage]
+                for stat in after.compare_to(before, "lineno"):
+                    if stat.size_diff <= 0:
+                        continue
+                    frame = stat.traceback[0]
+                    entry = growth.setdefault(f"{frame.filename}:{frame.lineno}", [0, 0])
+                    entry[0] += stat.size_diff
+                    entry[1] += stat.count_diff
+
+    def stop(self) -> Optional[str]:
+        """Stop sampling and write the reports. Returns the output directory."""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join(5.0)
+        self._thread = None
+        try:
+            self._write_reports()
+        except OSError as e:
+            print(f"Failed to write profile to {self.output_dir}: {e}")
+            return None
+        finally:
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+        return self.output_dir
+
+    def _write_reports(self) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        wall = time.perf_counter() - self._started_at
+        with self._lock:
+            stacks = {stage: collections.Counter(c) for stage, c in self._stacks.items()}
+            calls = dict(self._calls)
+            seconds = dict(self._seconds)
+
+        summary = [f"Profiled {wall:.1f} s, sampling every {self.interval * 1000:.1f} ms", ""]
+        summary.append(f"{'stage':12s} {'calls':>7s} {'total s':>9s} {'mean ms':>9s} {'samples':>8s}")
+        for stage in sorted(set(calls) | set(stacks)):
+            n = calls.get(stage, 0)
+            total = seconds.get(stage, 0.0)
+            samples = sum(stacks.get(stage, {}).values())
+            summary.append(f"{stage:12s} {n:7d} {total:9.2f} {total / n * 1000 if n else 0:9.1f} {samples:8d}")
+            if samples:
+                self._write_cpu_report(stage, stacks[stage])
+        for stage in self.memory_stages:
+            if self._peaks.get(stage):
+                self._write_memory_report(stage)
+        summary.append("")
+        summary.append("Per stage: <stage>.pstats (python -m pstats / snakeviz), <stage>.txt, "
+                       "<stage>_memory.txt")
+        with open(os.path.join(self.output_dir, "summary.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(summary) + "\n")
+
+    def _write_cpu_report(self, stage: str, stacks: Counter[Stack]) -> None:
+        path = os.path.join(self.output_dir, f"{stage}.pstats")
+        with open(path, "wb") as f:
+            marshal.dump(stacks_to_pstats(stacks, self.interval), f)
+        text = io.StringIO()
+        stats = pstats.Stats(path, stream=text)
+        text.write(f"Stage '{stage}': {sum(stacks.values())} samples; "
+                   f"ncalls are sample counts, times are samples x {self.interval * 1000:.1f} ms\n\n")
+        stats.sort_stats("cumulative").print_stats(self.top)
+        stats.sort_stats("tottime").print_stats(self.top)
+        with open(os.path.join(self.output_dir, f"{stage}.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+
+    def _write_memory_report(self, stage: str) -> None:
+        with self._memory_lock:
+            peaks = list(self._peaks[stage])
+            growth = sorted(self._growth[stage].items(), key=lambda item: item[1][0], reverse=True)
+        with self._lock:
+            calls = self._memory_calls[stage]
+        lines = [
+            f"Stage '{stage}': {len(peaks)} traced call(s) of {calls}",
+            f"peak traced memory per call: mean {sum(peaks) / len(peaks) / 1e6:.1f} MB, "
+            f"max {max(peaks) / 1e6:.1f} MB",
+            "",
+            "Top allocators (memory still held when the call returned, summed over traced calls):",
+        ]
+        for location, (size, count) in growth[:self.top]:
+            lines.append(f"{size / 1e6:10.2f} MB {count:8d} blocks  {location}")
+        if not growth:
+            lines.append("(none)")
+        with open(os.path.join(self.output_dir, f"{stage}_memory.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
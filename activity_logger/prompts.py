@@ -1,3 +1,5 @@
+import re
+
 BASE_ACTIVITY_PROMPT = """
 Analyze this screenshot and describe the high-level action being performed.
 Answer briefly in one concise sentence. Focus on the high level action being performed, below are some examples:
@@ -37,3 +39,54 @@ def build_activity_prompt(app_name=None, window_title=None):
     return prefix + BASE_ACTIVITY_PROMPT
 
 
+BATCH_INSTRUCTIONS = """
+You will receive {count} screenshots, labelled Screenshot 1 to Screenshot {count}, in the order they were taken.
+Write exactly one log line per screenshot, in order, each starting with its number, for example:
+1. [Coding] Running `pytest -q` in the terminal for the activity_logger project.
+2. [Communication] Replying to Sarah in Slack about the release date.
+Do not add any other text.
+"""
+
+_CATEGORY_TAG = re.compile(r"^\s*\[([A-Za-z_ ]+)\]\s*")
+_BATCH_LINE = re.compile(r"^\s*(?:Screenshot\s*)?(\d+)\s*[.):\-]\s*(.+?)\s*$", re.IGNORECASE)
+
+
+def build_batch_prompt(contexts):
+    """Prompt for one request covering several screenshots.
+
+    contexts is a list of (app_name, window_title) pairs, one per screenshot.
+    """
+    lines = []
+    for i, (app_name, window_title) in enumerate(contexts, start=1):
+        if app_name or window_title:
+            lines.append(f"Screenshot {i} context: app={app_name or ''} title={window_title or ''}")
+    prefix = ("\n".join(lines) + "\n\n") if lines else ""
+    return prefix + BASE_ACTIVITY_PROMPT + BATCH_INSTRUCTIONS.format(count=len(contexts))
+
+
+def parse_batch_response(text, count):
+    """Split a batched reply into one entry per screenshot (None where missing)."""
+    entries = [None] * count
+    plain = []
+    for line in (text or "").splitlines():
+        if not line.strip():
+            continue
+        plain.append(line.strip())
+        m = _BATCH_LINE.match(line)
+        if m and 1 <= int(m.group(1)) <= count and entries[int(m.group(1)) - 1] is None:
+            entries[int(m.group(1)) - 1] = m.group(2)
+    if all(e is None for e in entries) and len(plain) == count:
+        # Model dropped the numbering but kept one line per screenshot
+        return plain
+    return entries
+
+
+def parse_category(entry):
+    """Split a log entry like "[Coding] Running pytest" into (category, description).
+
+    category is None if the entry has no leading tag.
+    """
+    m = _CATEGORY_TAG.match(entry or "")
+    if not m:
+        return None, (entry or "").strip()
+    return m.group(1).strip(), entry[m.end():].strip()
@@ -1,52 +1,449 @@
 import cv2
-import pytesseract
+import hashlib
+import os
 import re
-from typing import List, Dict, Any, Union
+import threading
+import time
+from collections import ChainMap, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Hashable, Optional, Tuple, Union
 import numpy as np
 from PIL import Image
 
-PII_PATTERNS = [
+from .frame import Frame
+
+# (tag, pattern) pairs. Tags name the kind of PII a match came from.
+TAGGED_PII_PATTERNS = [
     # --- Numeric Identifiers ---
-    r"\b\d{3}[-.]?\d{2}[-.]?\d{4}\b",               # SSN
-    r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b",               # Phone
-    r"\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b",              # Credit card
+    ("ssn", r"\b\d{3}[-.]?\d{2}[-.]?\d{4}\b"),               # SSN
+    ("phone", r"\b\d{3}[-.]?\d{3}[-.]?\d{4}\b"),             # Phone
+    ("credit_card", r"\b\d{4}\s\d{4}\s\d{4}\s\d{4}\b"),        # Credit card
 
     # --- Internet Identifiers ---
-    r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-z]{2,}", # Email
-    r"(https?://|www\.)\S+",                        # URLs
-    r"@[A-Za-z0-9_]+",                              # Social media handles
+    ("email", r"[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-z]{2,}"), # Email
+    ("url", r"(https?://|www\.)\S+"),                        # URLs
+    ("handle", r"@[A-Za-z0-9_]+"),                           # Social media handles
 
     # --- Names ---
-    r"\b(Mr\.|Mrs\.|Ms\.|Dr\.)?\s?[A-Z][a-z]+(?:\s[A-Z][a-z]+)+\b",  # Two or more capitalized words (e.g., John Smith)
-    r"\b[A-Z][a-z]+(?:[-'][A-Z][a-z]+)?\b",         # Single capitalized names like O'Connor
+    ("full_name", r"\b(Mr\.|Mrs\.|Ms\.|Dr\.)?\s?[A-Z][a-z]+(?:\s[A-Z][a-z]+)+\b"),  # Two or more capitalized words (e.g., John Smith)
+    ("name", r"\b[A-Z][a-z]+(?:[-'][A-Z][a-z]+)?\b"),         # Single capitalized names like O'Connor
 
     # --- Addresses ---
-    r"\d{1,5}\s\w+(\s\w+)*\s(St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Ln|Lane|Dr|Drive)\b",
-    r"\b(P\.?O\.?\s?Box\s?\d+)\b",                  # PO Box
-    r"\b[A-Z][a-z]+,\s?[A-Z]{2}\s?\d{5}(-\d{4})?\b",# City, State ZIP
+    ("street_address", r"\d{1,5}\s\w+(\s\w+)*\s(St|Street|Rd|Road|Ave|Avenue|Blvd|Boulevard|Ln|Lane|Dr|Drive)\b"),
+    ("po_box", r"\b(P\.?O\.?\s?Box\s?\d+)\b"),                  # PO Box
+    ("city_state_zip", r"\b[A-Z][a-z]+,\s?[A-Z]{2}\s?\d{5}(-\d{4})?\b"),# City, State ZIP
 
     # --- Organizations ---
-    r"\b[A-Z][A-Za-z&\s]+(Inc\.|Ltd\.|LLC|Corp\.|Co\.)\b",
+    ("organization", r"\b[A-Z][A-Za-z&\s]+(Inc\.|Ltd\.|LLC|Corp\.|Co\.)\b"),
 
     # --- Dates / DOB ---
-    r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",           # Dates
-    r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s\d{1,2},?\s?\d{4}\b",
+    ("date", r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b"),           # Dates
+    ("date_long", r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s\d{1,2},?\s?\d{4}\b"),
 
     # --- IPs / IDs ---
-    r"\b\d{1,3}(?:\.\d{1,3}){3}\b",                 # IP address
-    r"\b[A-Z0-9]{8,}\b",                            # Generic long alphanumeric tokens (IDs, UUIDs, etc.)
+    ("ip_address", r"\b\d{1,3}(?:\.\d{1,3}){3}\b"),              # IP address
+    ("long_id", r"\b[A-Z0-9]{8,}\b"),                         # Generic long alphanumeric tokens (IDs, UUIDs, etc.)
 ]
 
+PII_PATTERNS = [pattern for _, pattern in TAGGED_PII_PATTERNS]
+
+# Patterns that can span several OCR words and so are also run over whole lines
+MULTI_WORD_TAGS = ("credit_card", "full_name", "street_address", "po_box", "city_state_zip", "organization", "date_long")
+
+
+class PIIMatcher:
+    """All PII patterns compiled into one alternation with a named group per tag.
+
+    ``match_word`` makes a single regex pass per OCR word and stops at the
+    first hit. ``match_words`` additionally runs the multi-word patterns over
+    each OCR line (grouped by tesseract's block/par/line numbers) so names and
+    street addresses split across words are caught.
+    """
+
+    def __init__(self, tagged_patterns: List[Tuple[str, str]] = TAGGED_PII_PATTERNS,
+                 multi_word_tags: Tuple[str, ...] = MULTI_WORD_TAGS) -> None:
+        self.tags = [tag for tag, _ in tagged_patterns]
+        self.word_regex = re.compile("|".join(f"(?P<{tag}>{pattern})" for tag, pattern in tagged_patterns))
+        line_patterns = [(tag, pattern) for tag, pattern in tagged_patterns if tag in multi_word_tags]
+        self.line_regex = (
+            re.compile("|".join(f"(?P<{tag}>{pattern})" for tag, pattern in line_patterns))
+            if line_patterns else None
+        )
+
+    def match_word(self, text: str) -> Optional[str]:
+        """Return the tag of the first pattern matching ``text``, or None."""
+        m = self.word_regex.search(text)
+        if m is None:
+            return None
+        return m.lastgroup
+
+    def match_words(self, data: Dict[str, List[Any]]) -> Dict[int, str]:
+        """Map OCR word index -> PII tag for every word that should be redacted.
+
+        ``data`` is pytesseract's image_to_data() dict.
+        """
+        hits: Dict[int, str] = {}
+        lines: "OrderedDict[Tuple[Any, ...], List[int]]" = OrderedDict()
+        texts = data["text"]
+        blocks = data.get("block_num")
+        pars = data.get("par_num")
+        line_nums = data.get("line_num")
+        for i, text in enumerate(texts):
+            if not text or not text.strip():
+                continue
+            tag = self.match_word(text)
+            if tag is not None:
+                hits[i] = tag
+            if self.line_regex is not None and blocks is not None:
+                lines.setdefault((blocks[i], pars[i], line_nums[i]), []).append(i)
+
+        for indices in lines.values():
+            if len(indices) < 2:
+                continue
+            line_text, spans = self._join_line(texts, indices)
+            for m in self.line_regex.finditer(line_text):
+                start, end = m.span()
+                for i, (w_start, w_end) in zip(indices, spans):
+                    if w_start < end and start < w_end and i not in hits:
+                        hits[i] = m.lastgroup
+        return hits
+
+    @staticmethod
+    def _join_line(texts: List[str], indices: List[int]) -> Tuple[str, List[Tuple[int, int]]]:
+        parts = []
+        spans = []
+        offset = 0
+        for i in indices:
+            word = texts[i].strip()
+            parts.append(word)
+            spans.append((offset, offset + len(word)))
+            offset += len(word) + 1
+        return " ".join(parts), spans
+
+
+_default_matcher: Optional[PIIMatcher] = None
+
+
+def get_pii_matcher() -> PIIMatcher:
+    """Shared PIIMatcher, compiled on first use."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = PIIMatcher()
+    return _default_matcher
+
+
+# --- Tiled OCR ---
+# Pixels of overlap between neighbouring tiles so words on a seam are seen whole by one tile
+DEFAULT_TILE_OVERLAP = 48
+
+Box = Tuple[int, int, int, int]  # x, y, width, height
+
+_ocr_executor: Optional[ThreadPoolExecutor] = None
+_ocr_executor_workers = 0
+_ocr_executor_lock = threading.Lock()
+
+
+def _axis_spans(length: int, tile: Optional[int], overlap: int) -> List[Tuple[int, int]]:
+    """(start, size) spans covering [0, length) with the given tile size and overlap."""
+    if not tile or tile >= length:
+        return [(0, length)]
+    step = max(tile - overlap, 1)
+    spans = []
+    start = 0
+    while True:
+        spans.append((start, min(tile, length - start)))
+        if start + tile >= length:
+            return spans
+        start += step
+
 
-def redact_image(image: Union[np.ndarray, Image.Image]) -> Image.Image:
+def plan_tiles(width: int, height: int, tile_size: Tuple[Optional[int], Optional[int]],
+               overlap: int = DEFAULT_TILE_OVERLAP) -> List[Box]:
+    """Split a frame into overlapping tiles.
+
+    A tile dimension of None/0 spans the whole frame, so (None, 512) gives
+    full-width horizontal bands that never cut a line of text.
+    """
+    tile_w, tile_h = tile_size
+    return [
+        (x, y, w, h)
+        for y, h in _axis_spans(height, tile_h, overlap)
+        for x, w in _axis_spans(width, tile_w, overlap)
+    ]
+
+
+def _limit_tesseract_threads() -> None:
+    """Run tesseract single-threaded (OMP_THREAD_LIMIT=1) unless the user set a limit.
+
+    pytesseract passes its module-level ``environ`` to every tesseract process
+    it starts, so the default is layered over that mapping; os.environ and
+    other child processes are left alone.
+    """
+    import pytesseract
+
+    runner = getattr(pytesseract, "pytesseract", None)
+    environ = getattr(runner, "environ", None)
+    if environ is None or isinstance(environ, ChainMap):
+        return
+    runner.environ = ChainMap(environ, {"OMP_THREAD_LIMIT": "1"})
+
+
+def _get_ocr_executor(workers: Optional[int]) -> ThreadPoolExecutor:
+    """Shared pool for tile OCR, resized if a different worker count is requested."""
+    global _ocr_executor, _ocr_executor_workers
+    workers = workers or os.cpu_count() or 1
+    with _ocr_executor_lock:
+        if _ocr_executor is None or _ocr_executor_workers != workers:
+            if _ocr_executor is not None:
+                _ocr_executor.shutdown(wait=False)
+            # tesseract runs as a child process per call, so threads are enough to use
+            # every core; keep each tesseract single-threaded to avoid oversubscription
+            _limit_tesseract_threads()
+            _ocr_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ocr")
+            _ocr_executor_workers = workers
+        return _ocr_executor
+
+
+def load_ocr() -> None:
+    """Import the OCR bindings ahead of the first frame (they are otherwise loaded on first use)."""
+    import pytesseract  # noqa: F401
+
+
+def ocr_pii_boxes(gray: np.ndarray) -> List[Box]:
+    """OCR one grayscale image and return the boxes of words that match PII patterns."""
+    import pytesseract
+
+    data: Dict[str, List[Any]] = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
+    return [
+        (data["left"][i], data["top"][i], data["width"][i], data["height"][i])
+        for i in get_pii_matcher().match_words(data)
+    ]
+
+
+def _intersects(a: Box, b: Box) -> bool:
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _overlap_ratio(a: Box, b: Box) -> float:
+    """Intersection area over the smaller box's area."""
+    w = min(a[0] + a[2], b[0] + b[2]) - max(a[0], b[0])
+    h = min(a[1] + a[3], b[1] + b[3]) - max(a[1], b[1])
+    if w <= 0 or h <= 0:
+        return 0.0
+    smaller = min(a[2] * a[3], b[2] * b[3]) or 1
+    return (w * h) / smaller
+
+
+def _union(a: Box, b: Box) -> Box:
+    x0, y0 = min(a[0], b[0]), min(a[1], b[1])
+    x1, y1 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def merge_tile_boxes(tiles: List[Box], tile_boxes: List[List[Box]]) -> List[Box]:
+    """Map tile-local boxes to frame coordinates and de-duplicate the overlap bands.
+
+    A word inside an overlap band is usually found by two tiles (once whole,
+    once clipped); such boxes are merged into their union so nothing is lost.
+    """
+    merged: List[Box] = []
+    band: List[Tuple[int, int]] = []  # (tile index, index into merged)
+    for t, (tile, boxes) in enumerate(zip(tiles, tile_boxes)):
+        tx, ty = tile[0], tile[1]
+        for bx, by, bw, bh in boxes:
+            box = (bx + tx, by + ty, bw, bh)
+            in_band = any(_intersects(box, other) for o, other in enumerate(tiles) if o != t)
+            if not in_band:
+                merged.append(box)
+                continue
+            for other_tile, k in band:
+                if other_tile != t and _overlap_ratio(merged[k], box) >= 0.5:
+                    merged[k] = _union(merged[k], box)
+                    break
+            else:
+                band.append((t, len(merged)))
+                merged.append(box)
+    return merged
+
+
+def find_pii_boxes(gray: np.ndarray, tile_size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+                   tile_overlap: int = DEFAULT_TILE_OVERLAP, workers: Optional[int] = None) -> List[Box]:
+    """Boxes of PII words in a grayscale frame, optionally OCR'd as parallel tiles."""
+    height, width = gray.shape[:2]
+    tiles = plan_tiles(width, height, tile_size, tile_overlap) if tile_size else [(0, 0, width, height)]
+    if len(tiles) == 1:
+        return ocr_pii_boxes(gray)
+    executor = _get_ocr_executor(workers)
+    futures = [executor.submit(ocr_pii_boxes, gray[y:y + h, x:x + w]) for x, y, w, h in tiles]
+    return merge_tile_boxes(tiles, [f.result() for f in futures])
+
+
+class IncrementalRedactor:
+    """Re-OCR only the tiles that changed since the previous frame.
+
+    Consecutive captures of the same window usually differ in a small strip
+    (a new terminal line, a sent chat message). Each tile's grayscale pixels
+    are hashed; tiles whose hash matches the cached one reuse their PII boxes,
+    and only changed tiles are OCR'd (in parallel). Caches are kept per frame
+    size so switching between a few windows doesn't throw them away.
+
+    Use as ``redact_image(image, box_finder=redactor.find_boxes)``.
+    """
+
+    def __init__(
+        self,
+        tile_size: Tuple[Optional[int], Optional[int]] = (None, 256),
+        tile_overlap: int = DEFAULT_TILE_OVERLAP,
+        workers: Optional[int] = None,
+        max_layouts: int = 4,
+    ) -> None:
+        self.tile_size = tile_size
+        self.tile_overlap = tile_overlap
+        self.workers = workers
+        self.max_layouts = max(1, max_layouts)
+        # (width, height) -> {tile: (digest, tile-local boxes)}
+        self._layouts: "OrderedDict[Tuple[int, int], Dict[Box, Tuple[bytes, List[Box]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.frames = 0
+        self.tile_hits = 0
+        self.tile_misses = 0
+        self.ocr_seconds = 0.0
+        self.ocr_pixels = 0
+        self.reused_pixels = 0
+
+    @staticmethod
+    def _digest(tile: np.ndarray) -> bytes:
+        return hashlib.blake2b(np.ascontiguousarray(tile).data, digest_size=16).digest()
+
+    def find_boxes(self, gray: np.ndarray) -> List[Box]:
+        height, width = gray.shape[:2]
+        tiles = plan_tiles(width, height, self.tile_size, self.tile_overlap)
+        digests = [self._digest(gray[y:y + h, x:x + w]) for x, y, w, h in tiles]
+
+        with self._lock:
+            layout = self._layouts.get((width, height))
+            if layout is None:
+                layout = {}
+                self._layouts[(width, height)] = layout
+                while len(self._layouts) > self.max_layouts:
+                    self._layouts.popitem(last=False)
+            self._layouts.move_to_end((width, height))
+            cached = [layout.get(tile) for tile in tiles]
+
+        tile_boxes: List[Optional[List[Box]]] = [None] * len(tiles)
+        stale = []
+        for i, (tile, digest) in enumerate(zip(tiles, digests)):
+            entry = cached[i]
+            if entry is not None and entry[0] == digest:
+                tile_boxes[i] = entry[1]
+            else:
+                stale.append(i)
+
+        started = time.perf_counter()
+        if len(stale) > 1:
+            executor = _get_ocr_executor(self.workers)
+            futures = {}
+            for i in stale:
+                x, y, w, h = tiles[i]
+                futures[i] = executor.submit(ocr_pii_boxes, gray[y:y + h, x:x + w])
+            for i, future in futures.items():
+                tile_boxes[i] = future.result()
+        elif stale:
+            x, y, w, h = tiles[stale[0]]
+            tile_boxes[stale[0]] = ocr_pii_boxes(gray[y:y + h, x:x + w])
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            for i in stale:
+                layout[tiles[i]] = (digests[i], tile_boxes[i])
+            self.frames += 1
+            self.tile_misses += len(stale)
+            self.tile_hits += len(tiles) - len(stale)
+            if stale:
+                self.ocr_seconds += elapsed
+                self.ocr_pixels += sum(tiles[i][2] * tiles[i][3] for i in stale)
+            stale_set = set(stale)
+            self.reused_pixels += sum(t[2] * t[3] for i, t in enumerate(tiles) if i not in stale_set)
+
+        return merge_tile_boxes(tiles, tile_boxes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._layouts.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Tile cache hit rate and an estimate of OCR time saved by reuse."""
+        with self._lock:
+            lookups = self.tile_hits + self.tile_misses
+            seconds_per_pixel = self.ocr_seconds / self.ocr_pixels if self.ocr_pixels else 0.0
+            return {
+                "frames": self.frames,
+                "tile_hits": self.tile_hits,
+                "tile_misses": self.tile_misses,
+                "hit_rate": self.tile_hits / lookups if lookups else 0.0,
+                "ocr_seconds": self.ocr_seconds,
+                "time_saved_seconds": self.reused_pixels * seconds_per_pixel,
+            }
+
+
+def _find_boxes(
+    gray: np.ndarray,
+    tile_size: Optional[Tuple[Optional[int], Optional[int]]],
+    tile_overlap: int,
+    workers: Optional[int],
+    box_finder: Optional[Callable[[np.ndarray], List[Box]]],
+) -> List[Box]:
+    if box_finder is not None:
+        return box_finder(gray)
+    return find_pii_boxes(gray, tile_size, tile_overlap, workers)
+
+
+def redact_frame(
+    frame: Frame,
+    tile_size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    workers: Optional[int] = None,
+    box_finder: Optional[Callable[[np.ndarray], List[Box]]] = None,
+) -> Frame:
+    """Redact PII from a Frame in place and return it.
+
+    The grayscale OCR input is the only full-size copy made. If OCR fails the
+    frame is returned unredacted, as redact_image() does.
+    """
+    try:
+        boxes = _find_boxes(frame.gray(), tile_size, tile_overlap, workers, box_finder)
+        frame.fill(boxes)
+    except Exception as e:
+        print(f"Redaction failed: {e}, using original image")
+    return frame
+
+
+def redact_image(
+    image: Union[np.ndarray, Image.Image, Frame],
+    tile_size: Optional[Tuple[Optional[int], Optional[int]]] = None,
+    tile_overlap: int = DEFAULT_TILE_OVERLAP,
+    workers: Optional[int] = None,
+    box_finder: Optional[Callable[[np.ndarray], List[Box]]] = None,
+) -> Union[Image.Image, Frame]:
     """Redact PII from an image using OCR.
+
+    Frames are redacted in place (see redact_frame()) and returned as Frames.
     
     Args:
-        image: PIL Image or numpy array to redact
+        image: PIL Image, numpy array or Frame to redact
+        tile_size: (width, height) of OCR tiles; None OCRs the frame in one pass.
+            Tiles are OCR'd in parallel, which helps on 4K/5K and multi-monitor frames.
+        tile_overlap: Pixels shared by neighbouring tiles
+        workers: Tile OCR concurrency (default: CPU count)
+        box_finder: Replaces the OCR step; maps a grayscale frame to PII boxes
+            (e.g. IncrementalRedactor.find_boxes). Tiling arguments are then ignored.
     
     Returns:
         Redacted PIL Image, or original image if redaction fails
     """
+    if isinstance(image, Frame):
+        return redact_frame(image, tile_size, tile_overlap, workers, box_finder)
     try:
         if isinstance(image, Image.Image):
             # Handle RGBA images
@@ -72,17 +469,10 @@ def redact_image(image: Union[np.ndarray, Image.Image]) -> Image.Image:
         # --- Preprocess ---
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # Extract text with bounding boxes
-        data: Dict[str, List[Any]] = pytesseract.image_to_data(gray, output_type=pytesseract.Output.DICT)
-
-        # --- Redact matched patterns ---
-        for i, text in enumerate(data["text"]):
-            if not text.strip():
-                continue
-            for pattern in PII_PATTERNS:
-                if re.search(pattern, text):
-                    x, y, w, h = data["left"][i], data["top"][i], data["width"][i], data["height"][i]
-                    cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 0), -1)
+        # --- Extract text with bounding boxes and redact matched patterns ---
+        boxes = _find_boxes(gray, tile_size, tile_overlap, workers, box_finder)
+        for x, y, w, h in boxes:
+            cv2.rectangle(img, (x, y), (x + w, y + h), (0, 0, 0), -1)
 
         # --- Convert back to PIL Image before returning ---
         redacted_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
@@ -101,4 +491,99 @@ def redact_image(image: Union[np.ndarray, Image.Image]) -> Image.Image:
         if isinstance(image, Image.Image):
             return image
         else:
-            return Image.fromarray(image)
\ No newline at end of file
+            return Image.fromarray(image)
+
+
+class RedactionCache:
+    """Memoize redact_image() per frame so each frame is OCR'd once.
+
+    Results are keyed by frame content hash (or a caller-supplied key) and kept
+    in a small LRU. Concurrent requests for a frame that is already being
+    redacted wait for that computation instead of starting a second OCR.
+    """
+
+    def __init__(self, max_entries: int = 2, **redact_options: Any) -> None:
+        """
+        Args:
+            max_entries: Redacted frames kept in the LRU
+            **redact_options: Passed through to redact_image() (tile_size, workers, ...)
+        """
+        self.max_entries = max(1, max_entries)
+        self.redact_options = redact_options
+        self._results: "OrderedDict[Hashable, Union[Image.Image, Frame]]" = OrderedDict()
+        self._inflight: Dict[Hashable, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+
+    @staticmethod
+    def key_for(image: Union[Image.Image, Frame]) -> Hashable:
+        """Content hash of a frame (mode, size and pixels).
+
+        A Frame keeps the key of its unredacted pixels, so redacting it in place
+        doesn't change the key and a second redact() of it is a cache hit.
+        """
+        if isinstance(image, Frame):
+            if image.redaction_key is None:
+                image.redaction_key = (image.order, image.size, image.content_digest())
+            return image.redaction_key
+        digest = hashlib.blake2b(image.tobytes(), digest_size=16)
+        return (image.mode, image.size, digest.hexdigest())
+
+    def redact(
+        self,
+        image: Union[Image.Image, Frame],
+        key: Optional[Hashable] = None,
+    ) -> Union[Image.Image, Frame]:
+        """Return the redacted frame, computing it at most once per key.
+
+        A Frame is redacted in place; a cache hit returns the earlier Frame.
+        """
+        if key is None:
+            key = self.key_for(image)
+        while True:
+            with self._lock:
+                cached = self._results.get(key)
+                if cached is not None:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return cached
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = threading.Event()
+                    self._inflight[key] = pending
+                    self.misses += 1
+                    break
+                self.waits += 1
+            # Another thread is redacting this frame; wait for its result
+            pending.wait()
+
+        try:
+            result = redact_image(image, **self.redact_options)
+            with self._lock:
+                self._results[key] = result
+                self._results.move_to_end(key)
+                while len(self._results) > self.max_entries:
+                    self._results.popitem(last=False)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            pending.set()
+
+    def discard(self, result: Union[Image.Image, Frame]) -> None:
+        """Evict a redacted frame once its caller is done with it, freeing its pixels early."""
+        with self._lock:
+            for key, cached in self._results.items():
+                if cached is result:
+                    del self._results[key]
+                    break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._results.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "waits": self.waits, "entries": len(self._results)}
@@ -0,0 +1,159 @@
+"""
+Screenshot retention without directory scans.
+
+RetentionManager owns the screenshots whose names match its pattern. It
+scans the folder once at startup to rebuild an oldest-first index of them,
+then tracks every new file itself, so enforcing the limits costs O(1) per
+save: files are evicted from the front of the index while any policy is
+exceeded.
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class RetentionPolicy:
+    """Decides whether the oldest tracked file must go."""
+
+    def exceeded(self, count: int, total_bytes: int, oldest_age: float) -> bool:
+        raise NotImplementedError
+
+
+class MaxCount(RetentionPolicy):
+    def __init__(self, count: int) -> None:
+        self.count = max(0, count)
+
+    def exceeded(self, count: int, total_bytes: int, oldest_age: float) -> bool:
+        return count > self.count
+
+    def __repr__(self) -> str:
+        return f"MaxCount({self.count})"
+
+
+class MaxBytes(RetentionPolicy):
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max(0, max_bytes)
+
+    def exceeded(self, count: int, total_bytes: int, oldest_age: float) -> bool:
+        return total_bytes > self.max_bytes
+
+    def __repr__(self) -> str:
+        return f"MaxBytes({self.max_bytes})"
+
+
+class MaxAge(RetentionPolicy):
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+
+    def exceeded(self, count: int, total_bytes: int, oldest_age: float) -> bool:
+        return oldest_age > self.seconds
+
+    def __repr__(self) -> str:
+        return f"MaxAge({self.seconds})"
+
+
+class RetentionManager:
+    """Oldest-first index of the screenshots in ``folder``.
+
+    Files named ``<prefix><n><suffix>`` are owned by default; pass ``pattern``
+    (a regex matched against file names) to own other names too.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        policies: Sequence[RetentionPolicy] = (MaxCount(5),),
+        prefix: str = "screenshot_",
+        suffix: str = ".png",
+        pattern: Optional[str] = None,
+    ) -> None:
+        self.folder = folder
+        self.policies = list(policies)
+        self._pattern = re.compile(pattern or rf"^{re.escape(prefix)}\d+{re.escape(suffix)}$")
+        self._lock = threading.Lock()
+        # path -> (size, saved_at), oldest first
+        self._files: "OrderedDict[str, Tuple[int, float]]" = OrderedDict()
+        self._total_bytes = 0
+        self.saved = 0
+        self.evicted = 0
+        self._rebuild()
+
+    def _rebuild(self) -> None:
+        """The one directory scan: index existing screenshots by modification time."""
+        os.makedirs(self.folder, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.folder):
+            if not self._pattern.match(entry.name) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            found.append((stat.st_mtime, entry.path, stat.st_size))
+        for mtime, path, size in sorted(found):
+            self._files[path] = (size, mtime)
+            self._total_bytes += size
+
+    def track(self, path: str, size: Optional[int] = None) -> List[str]:
+        """Record a file just written and apply the policies. Returns evicted paths."""
+        if size is None:
+            size = os.path.getsize(path)
+        with self._lock:
+            previous = self._files.pop(path, None)
+            if previous is not None:
+                self._total_bytes -= previous[0]
+            self._files[path] = (size, time.time())
+            self._total_bytes += size
+            self.saved += 1
+            evicted = self._evict()
+        for old in evicted:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f'failed to delete {old}: {e}')
+        return evicted
+
+    def touch(self, path: str) -> bool:
+        """Mark an already tracked file as the newest. Returns False if it isn't tracked."""
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is None:
+                return False
+            self._files[path] = (entry[0], time.time())
+            self._files.move_to_end(path)
+        try:
+            os.utime(path)  # keep the order across restarts
+        except OSError:
+            pass
+        return True
+
+    def _evict(self) -> List[str]:
+        evicted = []
+        now = time.time()
+        while len(self._files) > 1:  # never evict the file just saved
+            path, (size, saved_at) = next(iter(self._files.items()))
+            if not any(p.exceeded(len(self._files), self._total_bytes, now - saved_at) for p in self.policies):
+                break
+            self._files.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(path)
+        self.evicted += len(evicted)
+        return evicted
+
+    def files(self) -> List[str]:
+        """Tracked screenshots, oldest first."""
+        with self._lock:
+            return list(self._files)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "saved": self.saved,
+                "evicted": self.evicted,
+                "policies": [repr(p) for p in self.policies],
+            }
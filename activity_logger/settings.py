@@ -6,10 +6,15 @@ Handles secure storage of API key and user preferences
 
 import os
 import json
-import keyring
 from pathlib import Path
 
 
+def _keyring():
+    """Import keyring on first use; loading its backends is slow and only the API key needs it."""
+    import keyring
+    return keyring
+
+
 class Settings:
     """Manages application settings with secure storage"""
     
@@ -34,7 +39,7 @@ class Settings:
     def get_api_key(self):
         """Retrieve API key from Keychain"""
         try:
-            api_key = keyring.get_password(self.KEYCHAIN_SERVICE, "api_key")
+            api_key = _keyring().get_password(self.KEYCHAIN_SERVICE, "api_key")
             if api_key:
                 print("api_key: ", api_key)
                 return api_key
@@ -46,7 +51,7 @@ class Settings:
         """Store API key in Keychain"""
         try:
             if api_key:
-                keyring.set_password(self.KEYCHAIN_SERVICE, "api_key", api_key)
+                _keyring().set_password(self.KEYCHAIN_SERVICE, "api_key", api_key)
                 return True
             else:
                 # Delete if None/empty
@@ -59,10 +64,12 @@ class Settings:
     def delete_api_key(self):
         """Delete API key from Keychain"""
         try:
-            keyring.delete_password(self.KEYCHAIN_SERVICE, "api_key")
-        except keyring.errors.PasswordDeleteError:
-            # Password doesn't exist, that's fine
-            pass
+            keyring = _keyring()
+            try:
+                keyring.delete_password(self.KEYCHAIN_SERVICE, "api_key")
+            except keyring.errors.PasswordDeleteError:
+                # Password doesn't exist, that's fine
+                pass
         except Exception as e:
             print(f"Error deleting API key: {e}")
             
@@ -94,7 +101,8 @@ class Settings:
             "screenshot_folder": self.DEFAULT_SCREENSHOT_FOLDER,
             "log_dir": self.DEFAULT_LOG_DIR,
             "auto_start": False,
-            "minimize_to_tray": True
+            "minimize_to_tray": True,
+            "archive_after_days": None
         }
         
     def set_preferences(self, preferences):
@@ -152,6 +160,14 @@ class Settings:
         """Set auto-start preference"""
         return self.set("auto_start", bool(value))
         
+    def get_archive_after_days(self):
+        """Get the log archiving age in days (None: don't archive)"""
+        return self.get("archive_after_days", None)
+        
+    def set_archive_after_days(self, days):
+        """Set the log archiving age in days (None disables archiving)"""
+        return self.set("archive_after_days", None if days is None else int(days))
+        
     def reset_to_defaults(self):
         """Reset all settings to defaults"""
         try:
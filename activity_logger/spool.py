@@ -0,0 +1,336 @@
+"""
+Durable on-disk queue for frames awaiting analysis.
+
+Encoded (already redacted) frames are written to a spool directory and
+tracked in a SQLite database in WAL mode. Jobs are claimed with a lease,
+acknowledged after their log entry is written, and retried with backoff
+when analysis fails, so work survives crashes, restarts and offline periods
+with at-least-once semantics. Jobs that were in flight when the process
+died are returned to the queue on the next open.
+
+After close(), claim/ack/nack do nothing, so a worker that finishes late
+leaves its job in flight to be recovered on the next open.
+
+Jobs that keep failing are parked as "failed" after ``max_attempts``, or
+right away when the handler reports a permanent error. The spool is capped
+by job count and bytes; when it is full the oldest jobs are evicted.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+PENDING = "pending"
+INFLIGHT = "inflight"
+FAILED = "failed"
+
+# Handler result: park the job as failed without retrying (e.g. HTTP 400/401)
+PARK = "park"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL,
+    mime TEXT NOT NULL,
+    meta TEXT NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL,
+    leased_until REAL,
+    last_error TEXT,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, available_at);
+"""
+
+_EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+
+
+class Job:
+    """A claimed queue entry."""
+
+    __slots__ = ("id", "payload_path", "mime", "meta", "attempts")
+
+    def __init__(self, id: int, payload_path: str, mime: str, meta: Dict[str, Any], attempts: int) -> None:
+        self.id = id
+        self.payload_path = payload_path
+        self.mime = mime
+        self.meta = meta
+        self.attempts = attempts
+
+    def read_payload(self) -> bytes:
+        with open(self.payload_path, "rb") as f:
+            return f.read()
+
+
+class DurableQueue:
+    """SQLite (WAL) job table plus a spool directory of encoded frames."""
+
+    def __init__(self, directory: str, max_attempts: Optional[int] = 8,
+                 base_backoff: float = 5.0, max_backoff: float = 600.0,
+                 max_jobs: Optional[int] = 1000, max_bytes: Optional[int] = 512 * 1024 * 1024) -> None:
+        """
+        Args:
+            directory: Holds queue.db and the spool/ folder
+            max_attempts: Failed analyses before a job is parked as "failed";
+                None retries forever (with capped backoff)
+            base_backoff, max_backoff: Retry delay bounds in seconds
+            max_jobs, max_bytes: Spool limits; the oldest jobs (of any state but
+                in flight) are evicted to stay under them. None means no limit.
+        """
+        self.directory = directory
+        self.spool_dir = os.path.join(directory, "spool")
+        os.makedirs(self.spool_dir, exist_ok=True)
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.evicted = 0
+        self._last_depth: Dict[str, int] = {PENDING: 0, INFLIGHT: 0, FAILED: 0}
+
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._conn = sqlite3.connect(
+            os.path.join(directory, "queue.db"), check_same_thread=False, isolation_level=None,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "size" not in columns:  # queues created before the spool was capped
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        self._recover()
+
+    def _recover(self) -> None:
+        """Return orphaned in-flight jobs to the queue and delete unreferenced spool files."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, leased_until = NULL WHERE state = ?", (PENDING, INFLIGHT),
+            )
+            referenced = {row[0] for row in self._conn.execute("SELECT payload FROM jobs")}
+        for name in os.listdir(self.spool_dir):
+            if name not in referenced:
+                try:
+                    os.remove(os.path.join(self.spool_dir, name))
+                except OSError:
+                    pass
+
+    def enqueue(self, data: Any, mime: str, meta: Optional[Dict[str, Any]] = None) -> int:
+        """Spool an encoded frame and queue it for analysis. Returns the job id."""
+        name = uuid.uuid4().hex + _EXTENSIONS.get(mime, ".bin")
+        path = os.path.join(self.spool_dir, name)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO jobs (created_at, payload, mime, meta, state, available_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (now, name, mime, json.dumps(meta or {}), PENDING, now, len(data)),
+            )
+            evicted = self._evict()
+            self._ready.notify_all()
+            job_id = cur.lastrowid
+        self._remove_payloads(evicted)
+        return job_id
+
+    def _evict(self) -> List[str]:
+        """Delete the oldest jobs beyond max_jobs/max_bytes (caller holds the lock). Returns their payloads."""
+        if self.max_jobs is None and self.max_bytes is None:
+            return []
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM jobs").fetchone()
+        if (self.max_jobs is None or count <= self.max_jobs) and (self.max_bytes is None or total <= self.max_bytes):
+            return []
+        evicted: List[Tuple[int, str]] = []
+        for job_id, payload, size in self._conn.execute(
+            "SELECT id, payload, size FROM jobs WHERE state != ? ORDER BY id", (INFLIGHT,),
+        ).fetchall():
+            if (self.max_jobs is None or count <= self.max_jobs) and (self.max_bytes is None or total <= self.max_bytes):
+                break
+            evicted.append((job_id, payload))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id, _ in evicted])
+        if evicted:
+            self.evicted += len(evicted)
+            print(f"Analysis queue full; dropped {len(evicted)} oldest frame(s)")
+        return [payload for _, payload in evicted]
+
+    def _remove_payloads(self, names: List[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.spool_dir, name))
+            except OSError:
+                pass
+
+    def claim(self, limit: int = 1, lease: float = 300.0) -> List[Job]:
+        """Lease up to ``limit`` ready jobs, oldest first."""
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return []
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, payload, mime, meta, attempts FROM jobs "
+                    "WHERE (state = ? AND available_at <= ?) OR (state = ? AND leased_until < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (PENDING, now, INFLIGHT, now, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET state = ?, leased_until = ? WHERE id = ?",
+                    [(INFLIGHT, now + lease, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return [
+            Job(row[0], os.path.join(self.spool_dir, row[1]), row[2], json.loads(row[3]), row[4])
+            for row in rows
+        ]
+
+    def ack(self, job: Job) -> None:
+        """Analysis done: forget the job and its spooled frame."""
+        with self._lock:
+            if self._conn is None:
+                return  # closed: the job is recovered on the next open
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+        try:
+            os.remove(job.payload_path)
+        except OSError:
+            pass
+
+    def nack(self, job: Job, error: str = "", permanent: bool = False) -> None:
+        """Analysis failed: retry later with exponential backoff, or park the job if ``permanent``."""
+        attempts = job.attempts + 1
+        delay = min(self.max_backoff, self.base_backoff * (2 ** min(attempts - 1, 16)))
+        parked = permanent or (self.max_attempts is not None and attempts >= self.max_attempts)
+        state = FAILED if parked else PENDING
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, attempts = ?, available_at = ?, leased_until = NULL, last_error = ? "
+                "WHERE id = ?",
+                (state, attempts, time.time() + delay, error[:500], job.id),
+            )
+
+    def wait(self, timeout: float) -> None:
+        """Sleep until something is enqueued or ``timeout`` seconds pass."""
+        with self._ready:
+            self._ready.wait(timeout)
+
+    def next_available_in(self) -> Optional[float]:
+        """Seconds until the earliest pending job becomes ready (None if none are pending)."""
+        with self._lock:
+            if self._conn is None:
+                return None
+            row = self._conn.execute(
+                "SELECT MIN(available_at) FROM jobs WHERE state = ?", (PENDING,),
+            ).fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def wake(self) -> None:
+        with self._ready:
+            self._ready.notify_all()
+
+    def depth(self) -> Dict[str, int]:
+        """Jobs per state; after close(), the counts last seen."""
+        with self._lock:
+            if self._conn is None:
+                return dict(self._last_depth)
+            rows = self._conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+            counts = {PENDING: 0, INFLIGHT: 0, FAILED: 0}
+            counts.update(dict(rows))
+            self._last_depth = counts
+        return dict(counts)
+
+    def close(self) -> None:
+        self.depth()  # keep the final counts for stats
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class QueueDrainer:
+    """Worker threads that claim jobs and hand them to ``handler``.
+
+    ``handler(jobs)`` returns one result per job: True acknowledges it, False
+    schedules a retry and PARK marks it failed without retrying. An exception
+    retries the whole claim.
+    """
+
+    def __init__(self, queue: DurableQueue, handler: Callable[[List[Job]], List[Union[bool, str]]],
+                 workers: int = 1, claim_size: int = 1, idle_poll: float = 30.0) -> None:
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.claim_size = max(1, claim_size)
+        self.idle_poll = idle_poll
+        self._stopping = False
+        self._threads: List[threading.Thread] = []
+        self._stats_lock = threading.Lock()
+        self.acked = 0
+        self.retried = 0
+        self.parked = 0
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stopping = False
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"queue-drainer-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _run(self) -> None:
+        while not self._stopping:
+            jobs = self.queue.claim(self.claim_size)
+            if not jobs:
+                next_in = self.queue.next_available_in()
+                self.queue.wait(self.idle_poll if next_in is None else min(next_in + 0.05, self.idle_poll))
+                continue
+            try:
+                results = self.handler(jobs)
+            except Exception as e:
+                print(f"Queued analysis failed: {e}")
+                results = [False] * len(jobs)
+            for job, result in zip(jobs, results):
+                if result == PARK:
+                    self.queue.nack(job, "permanent error", permanent=True)
+                elif result:
+                    self.queue.ack(job)
+                else:
+                    self.queue.nack(job, "analysis failed")
+            with self._stats_lock:
+                self.parked += sum(1 for result in results if result == PARK)
+                self.acked += sum(1 for result in results if result is True)
+                self.retried += sum(1 for result in results if not result)
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """Stop claiming; jobs still in flight are finished or recovered on next start."""
+        self._stopping = True
+        self.queue.wake()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = {"acked": self.acked, "retried": self.retried, "parked": self.parked}
+        stats["depth"] = self.queue.depth()
+        stats["evicted"] = self.queue.evicted
+        return stats
@@ -0,0 +1,136 @@
+"""
+Content-addressed screenshot store.
+
+Each redacted frame is encoded once (see encode.ImageEncoder); the same
+bytes go into the API request and, through this store, onto disk as
+``screenshot_<hash>.<ext>``. Identical frames hash to the same file, so a
+repeated screen costs no extra disk write: the existing file is simply
+marked as the newest. Files are written on a background thread to a
+temporary name and renamed into place, so a crash never leaves a
+half-written screenshot. Retention limits are applied by RetentionManager.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+from typing import Any, Dict, Optional, Set
+
+from .encode import EncodedImage
+from .retention import RetentionManager
+
+HASH_BYTES = 16
+
+EXTENSIONS = {"image/png": ".png", "image/jpeg": ".jpg", "image/webp": ".webp"}
+
+# Names this store owns: its own hashed files plus numbered ones from older versions
+STORE_PATTERN = r"^screenshot_(?:\d+|[0-9a-f]{%d})\.(?:png|jpg|webp)$" % (HASH_BYTES * 2)
+
+_STOP = object()
+
+
+def content_hash(data: Any) -> str:
+    return hashlib.blake2b(data, digest_size=HASH_BYTES).hexdigest()
+
+
+class ScreenshotStore:
+    """Writes encoded frames under their content hash on a background thread."""
+
+    def __init__(self, folder: str, retention: RetentionManager, max_pending: int = 8) -> None:
+        """
+        Args:
+            folder: Screenshot folder
+            retention: Retention index for ``folder`` (built with STORE_PATTERN)
+            max_pending: Writes queued before put() starts dropping frames
+        """
+        self.folder = folder
+        self.retention = retention
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, max_pending))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self.written = 0
+        self.deduplicated = 0
+        self.dropped = 0
+        self.bytes_written = 0
+        for entry in os.scandir(folder):
+            if entry.name.startswith(".screenshot_") and entry.name.endswith(".tmp"):
+                os.remove(entry.path)  # left over from an interrupted write
+
+    def path_for(self, encoded: EncodedImage) -> str:
+        name = f"screenshot_{content_hash(encoded.data)}{EXTENSIONS.get(encoded.mime, '.bin')}"
+        return os.path.join(self.folder, name)
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="screenshot-writer", daemon=True)
+            self._thread.start()
+
+    def put(self, encoded: EncodedImage) -> Optional[str]:
+        """Queue an encoded frame for saving. Returns its path, or None if dropped."""
+        self.start()
+        path = self.path_for(encoded)
+        with self._stats_lock:
+            if path in self._pending or self.retention.touch(path):
+                self.deduplicated += 1
+                return path
+            try:
+                self._queue.put_nowait((path, encoded.data))
+            except queue.Full:
+                self.dropped += 1
+                print(f'screenshot writer busy; {os.path.basename(path)} not saved')
+                return None
+            self._pending.add(path)
+        return path
+
+    def _write(self, path: str, data: Any) -> None:
+        tmp_path = os.path.join(self.folder, f".{os.path.basename(path)}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        size = len(data) if isinstance(data, bytes) else data.nbytes
+        with self._stats_lock:
+            self.written += 1
+            self.bytes_written += size
+        print(f'screenshot saved to {path}')
+        for oldest in self.retention.track(path, size):
+            print(f'deleted screenshot: {oldest}')
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            path, data = item
+            try:
+                self._write(path, data)
+            except OSError as e:
+                print(f'failed to save {path}: {e}')
+            finally:
+                with self._stats_lock:
+                    self._pending.discard(path)
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Finish queued writes and stop the writer."""
+        with self._start_lock:
+            if self._thread is None:
+                return
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            stats: Dict[str, Any] = {
+                "written": self.written,
+                "deduplicated": self.deduplicated,
+                "dropped": self.dropped,
+                "bytes_written": self.bytes_written,
+                "pending": self._queue.qsize(),
+            }
+        stats.update({f"retained_{key}": value for key, value in self.retention.stats().items()})
+        return stats
+
@@ -0,0 +1,274 @@
+"""
+Window context for captured frames.
+
+A WindowContextProvider answers "what is the frontmost window?" with a dict
+(window_id, bounds, app_name, window_title, pid). The logger takes one
+snapshot when a frame is captured and attaches it to the frame, so the
+analysis prompt describes the window that was actually captured, not
+whatever is in front seconds later.
+
+MacWindowContextProvider caches the result of the (expensive) window-list
+walk. The cache is dropped when the frontmost app's pid (cheap to read) no
+longer matches the cached window's, when another app is activated
+(NSWorkspaceDidActivateApplicationNotification, delivered on a private
+operation queue so it doesn't depend on the main run loop), and otherwise
+expires after ``ttl`` seconds, since window titles change within an app.
+FakeWindowContextProvider serves canned windows for tests and benchmarks on
+any platform.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+WindowInfo = Dict[str, Any]
+
+
+def frontmost_app() -> Optional[Tuple[int, str]]:
+    """(pid, name) of the frontmost app, or None (macOS).
+
+    activeApplication() asks for the current app on every call;
+    frontmostApplication is only refreshed while the main run loop runs,
+    which it doesn't when the logger is started off the main thread.
+    """
+    from AppKit import NSWorkspace
+
+    workspace = NSWorkspace.sharedWorkspace()
+    try:
+        info = workspace.activeApplication()
+    except Exception:
+        info = None
+    if info and info.get("NSApplicationProcessIdentifier") is not None:
+        return int(info["NSApplicationProcessIdentifier"]), str(info.get("NSApplicationName") or "")
+    app = workspace.frontmostApplication()
+    if app is None:
+        return None
+    return int(app.processIdentifier()), str(app.localizedName() or "")
+
+
+def query_frontmost_window() -> Optional[WindowInfo]:
+    """Walk the on-screen window list for the frontmost app's top window (macOS).
+
+    Returns dict with keys: window_id, bounds (x, y, width, height), app_name, window_title, pid.
+    Returns None if it cannot be determined.
+    """
+    from Quartz import (
+        CGWindowListCopyWindowInfo,
+        kCGWindowListOptionOnScreenOnly,
+        kCGWindowListExcludeDesktopElements,
+        kCGNullWindowID,
+    )
+
+    try:
+        app = frontmost_app()
+        if app is None:
+            return None
+        pid, app_name = app
+
+        options = kCGWindowListOptionOnScreenOnly | kCGWindowListExcludeDesktopElements
+        window_list = CGWindowListCopyWindowInfo(options, kCGNullWindowID) or []
+
+        # Windows are front-to-back ordered; pick the first for this PID with layer 0
+        for w in window_list:
+            try:
+                if int(w.get('kCGWindowOwnerPID', -1)) != pid:
+                    continue
+                if int(w.get('kCGWindowLayer', 0)) != 0:
+                    continue
+                bounds = w.get('kCGWindowBounds') or {}
+                width = int(bounds.get('Width', 0))
+                height = int(bounds.get('Height', 0))
+                if width <= 2 or height <= 2:
+                    continue
+                if float(w.get('kCGWindowAlpha', 1.0)) <= 0.01:
+                    continue
+            except Exception:
+                continue
+
+            window_id = int(w.get('kCGWindowNumber')) if w.get('kCGWindowNumber') is not None else None
+            return {
+                'window_id': window_id,
+                'bounds': (int(bounds.get('X', 0)), int(bounds.get('Y', 0)), width, height),
+                'app_name': w.get('kCGWindowOwnerName') or app_name,
+                'window_title': w.get('kCGWindowName') or "",
+                'pid': pid,
+            }
+        return None
+    except Exception as e:
+        print(f"Failed to get frontmost window info: {e}")
+        return None
+
+
+class WindowContextProvider:
+    """Source of frontmost-window snapshots."""
+
+    name = "base"
+
+    def snapshot(self) -> Optional[WindowInfo]:
+        """Info for the frontmost window right now (None if unknown)."""
+        raise NotImplementedError
+
+    def invalidate(self) -> None:
+        """Forget any cached answer."""
+
+    def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class CachedWindowContextProvider(WindowContextProvider):
+    """Caches ``query()`` until invalidate() or ``ttl`` seconds pass."""
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cached: Optional[WindowInfo] = None
+        self._cached_key: Any = None
+        self._cached_at = 0.0
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.query_seconds = 0.0
+
+    def query(self) -> Optional[WindowInfo]:
+        raise NotImplementedError
+
+    def front_key(self) -> Any:
+        """Cheap identity of the frontmost app, checked on every lookup; a change drops the cache."""
+        return None
+
+    def snapshot(self) -> Optional[WindowInfo]:
+        key = self.front_key()
+        with self._lock:
+            if self._cached is not None and key != self._cached_key:
+                # App switch the activation notification hasn't reported (yet)
+                self._cached = None
+                self._generation += 1
+                self.invalidations += 1
+            if self._cached is not None and time.monotonic() - self._cached_at < self.ttl:
+                self.hits += 1
+                return dict(self._cached)
+            self.misses += 1
+            generation = self._generation
+        started = time.perf_counter()
+        info = self.query()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.query_seconds += elapsed
+            # Don't cache an answer that raced with an app switch
+            if info is not None and generation == self._generation:
+                self._cached = dict(info)
+                self._cached_key = key
+                self._cached_at = time.monotonic()
+        return info
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._cached = None
+            self._generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "avg_query_ms": self.query_seconds / self.misses * 1000.0 if self.misses else 0.0,
+            }
+
+
+class MacWindowContextProvider(CachedWindowContextProvider):
+    """Frontmost window via CGWindowListCopyWindowInfo, invalidated on app activation."""
+
+    name = "macos"
+
+    def __init__(self, ttl: float = 1.0) -> None:
+        super().__init__(ttl)
+        self._center: Any = None
+        self._observer: Any = None
+        self._queue: Any = None
+        try:
+            from AppKit import NSWorkspace
+            from Foundation import NSOperationQueue
+
+            self._center = NSWorkspace.sharedWorkspace().notificationCenter()
+            # With queue=None the block runs on the posting thread's run loop, which
+            # nothing pumps when the logger runs off the main thread
+            self._queue = NSOperationQueue.alloc().init()
+            self._observer = self._center.addObserverForName_object_queue_usingBlock_(
+                "NSWorkspaceDidActivateApplicationNotification", None, self._queue,
+                lambda _notification: self.invalidate(),
+            )
+        except Exception as e:
+            print(f"App activation notifications unavailable ({e}); relying on the TTL")
+
+    def query(self) -> Optional[WindowInfo]:
+        return query_frontmost_window()
+
+    def front_key(self) -> Any:
+        try:
+            app = frontmost_app()
+        except Exception:
+            return None
+        return app[0] if app is not None else None
+
+    def close(self) -> None:
+        if self._center is not None and self._observer is not None:
+            self._center.removeObserver_(self._observer)
+            self._observer = None
+
+
+class FakeWindowContextProvider(CachedWindowContextProvider):
+    """Canned windows for tests and benchmarks.
+
+    ``windows`` are served in turn, one per activate() call (or per query when
+    ``cycle`` is set); ``query_cost`` seconds of sleep simulate the window-list
+    walk so the cache can be benchmarked.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        windows: Optional[Sequence[Optional[WindowInfo]]] = None,
+        ttl: float = 1.0,
+        query_cost: float = 0.0,
+        cycle: bool = False,
+    ) -> None:
+        super().__init__(ttl)
+        self.windows: List[Optional[WindowInfo]] = list(windows or [{
+            'window_id': 1, 'bounds': (0, 0, 1920, 1080), 'app_name': "Terminal",
+            'window_title': "zsh", 'pid': 1,
+        }])
+        self.query_cost = query_cost
+        self.cycle = cycle
+        self.index = 0
+        self.queries = 0
+
+    def activate(self, index: Optional[int] = None) -> None:
+        """Bring another canned window to the front (like an app switch)."""
+        self.index = (self.index + 1 if index is None else index) % len(self.windows)
+        self.invalidate()
+
+    def query(self) -> Optional[WindowInfo]:
+        if self.query_cost:
+            time.sleep(self.query_cost)
+        self.queries += 1
+        info = self.windows[self.index]
+        if self.cycle:
+            self.index = (self.index + 1) % len(self.windows)
+        return dict(info) if info is not None else None
+
+
+def create_window_provider(name: str = "macos", **options: Any) -> WindowContextProvider:
+    if name == "macos":
+        return MacWindowContextProvider(**options)
+    if name == "fake":
+        return FakeWindowContextProvider(**options)
+    raise ValueError(f"Unknown window context provider '{name}'")
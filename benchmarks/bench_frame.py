@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: capture -> redact -> encode with PIL images vs NumPy Frames.
+
+Starts from a BGRA buffer like mss returns. The PIL path converts it to an
+image, to a NumPy BGR copy for redaction and back to PIL for encoding; the
+Frame path wraps the buffer, redacts it in place and encodes it with OpenCV.
+OCR is replaced by a fixed list of boxes so only the pixel handling is timed.
+
+    python benchmarks/bench_frame.py [--sizes 1920x1080,2560x1440,3840x2160,5120x2880] [--frames 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np  # noqa: E402
+from PIL import Image  # noqa: E402
+
+from activity_logger.encode import ImageEncoder  # noqa: E402
+from activity_logger.frame import Frame  # noqa: E402
+from activity_logger.redact import redact_image  # noqa: E402
+
+BOXES = [(40 + 300 * i, 30 + 45 * i, 220, 18) for i in range(12)]
+
+
+def find_boxes(gray: np.ndarray) -> list:
+    return BOXES
+
+
+def bgra_buffer(width: int, height: int) -> bytearray:
+    rng = np.random.default_rng(0)
+    pixels = np.full((height, width, 4), 255, dtype=np.uint8)
+    pixels[::22, :, :3] = rng.integers(0, 255, size=(len(range(0, height, 22)), width, 3), dtype=np.uint8)
+    return bytearray(pixels.tobytes())
+
+
+def run_pil(raw: bytearray, size: tuple, encoder: ImageEncoder) -> None:
+    image = Image.frombytes("RGB", size, bytes(raw), "raw", "BGRX")
+    encoder.encode(redact_image(image, box_finder=find_boxes))
+
+
+def run_frame(raw: bytearray, size: tuple, encoder: ImageEncoder) -> None:
+    frame = Frame.from_bgra(raw, *size)
+    encoder.encode(redact_image(frame, box_finder=find_boxes))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1920x1080,2560x1440,3840x2160,5120x2880")
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--codec", default="png", choices=("png", "jpeg", "webp"))
+    args = parser.parse_args()
+
+    encoder = ImageEncoder(args.codec)
+    for spec in args.sizes.split(","):
+        size = tuple(int(v) for v in spec.split("x"))
+        template = bgra_buffer(*size)
+        results = {}
+        for label, run in (("PIL", run_pil), ("Frame", run_frame)):
+            elapsed = 0.0
+            for _ in range(args.frames):
+                raw = bytearray(template)  # a fresh capture buffer, not timed
+                started = time.perf_counter()
+                run(raw, size, encoder)
+                elapsed += time.perf_counter() - started
+            results[label] = elapsed / args.frames * 1000.0
+        print(f"{spec:>10s}  PIL {results['PIL']:7.1f} ms/frame  Frame {results['Frame']:7.1f} ms/frame  "
+              f"({results['PIL'] / results['Frame']:.1f}x)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
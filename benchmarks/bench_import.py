@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the lightweight entry points.
+
+Runs each scenario in a fresh interpreter under ``-X importtime`` and reports
+the import time it adds over a bare ``python -c pass`` (modules loaded by site
+are excluded), the extra wall-clock startup, and any heavy capture-path
+module it loaded (OpenCV, NumPy, Pillow, OpenAI, ...). The best of --repeat
+runs is reported.
+
+Scenarios marked with a budget fail the run (exit status 1) if they exceed
+--budget-ms or load a heavy module; "capture path" is reported for reference.
+
+    python benchmarks/bench_import.py [--repeat 5] [--budget-ms 50] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Modules only the capture/analysis path should load
+HEAVY_MODULES = (
+    "cv2", "numpy", "PIL", "openai", "httpx", "pytesseract", "mss", "pynput",
+    "Quartz", "AppKit", "keyring", "rumps",
+)
+
+# (name, code, budgeted)
+SCENARIOS: List[Tuple[str, str, bool]] = [
+    ("import activity_logger", "import activity_logger", True),
+    ("activity-logger --version", "from activity_logger.cli import main; main(['--version'])", True),
+    ("activity-logger query --help", "from activity_logger.cli import main; main(['query', '--help'])", True),
+    ("settings lookup", "from activity_logger import Settings", True),
+    ("capture path", "import activity_logger.core", False),
+]
+
+
+def run_importtime(code: str) -> Tuple[Dict[str, int], Set[str], float]:
+    """Run ``code`` under -X importtime. Returns top-level cumulative us per module, all modules, wall seconds."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (ROOT, env.get("PYTHONPATH")) if p)
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+    top_level: Dict[str, int] = {}
+    modules: Set[str] = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # the header line
+        modules.add(name.strip())
+        if not name.startswith("  "):  # one space after the separator means top level
+            top_level[name.strip()] = int(cumulative)
+    return top_level, modules, wall
+
+
+def measure(code: str, baseline: Set[str], baseline_wall: float, repeat: int) -> Dict[str, Any]:
+    best_ms: Optional[float] = None
+    best_wall: Optional[float] = None
+    heavy: Set[str] = set()
+    slowest: List[Tuple[str, int]] = []
+    for _ in range(repeat):
+        top_level, modules, wall = run_importtime(code)
+        added = {name: us for name, us in top_level.items() if name not in baseline}
+        total_ms = sum(added.values()) / 1000.0
+        if best_ms is None or total_ms < best_ms:
+            best_ms = total_ms
+            slowest = sorted(added.items(), key=lambda item: item[1], reverse=True)[:3]
+        best_wall = wall if best_wall is None else min(best_wall, wall)
+        heavy |= {m for m in modules if m.split(".")[0] in HEAVY_MODULES}
+    return {
+        "import_ms": best_ms,
+        "startup_ms": max(0.0, (best_wall or 0.0) - baseline_wall) * 1000.0,
+        "heavy_modules": sorted({m.split(".")[0] for m in heavy}),
+        "slowest": [{"module": name, "ms": us / 1000.0} for name, us in slowest],
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per scenario (best is reported)")
+    parser.add_argument("--budget-ms", type=float, default=50.0, help="Import-time budget per lightweight scenario")
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    baseline_modules: Set[str] = set()
+    baseline_wall: Optional[float] = None
+    for _ in range(args.repeat):
+        top_level, _, wall = run_importtime("pass")
+        baseline_modules |= set(top_level)
+        baseline_wall = wall if baseline_wall is None else min(baseline_wall, wall)
+
+    results = []
+    failures = []
+    for name, code, budgeted in SCENARIOS:
+        result = measure(code, baseline_modules, baseline_wall or 0.0, max(1, args.repeat))
+        result.update(name=name, budget_ms=args.budget_ms if budgeted else None)
+        results.append(result)
+        problems = []
+        if budgeted and result["import_ms"] > args.budget_ms:
+            problems.append(f"over {args.budget_ms:.0f} ms budget")
+        if budgeted and result["heavy_modules"]:
+            problems.append(f"loads {', '.join(result['heavy_modules'])}")
+        if problems:
+            failures.append(name)
+        slowest = ", ".join(f"{s['module']} {s['ms']:.1f}" for s in result["slowest"])
+        print(f"{name:30s} imports {result['import_ms']:7.1f} ms  startup +{result['startup_ms']:6.1f} ms"
+              f"  [{slowest}]{'  FAIL: ' + '; '.join(problems) if problems else ''}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the capture-to-log pipeline.
+
+Times each step a capture goes through on synthetic, text-heavy screenshots
+at 1080p, 1440p, 4K and 5K: redaction, encoding, saving (with retention),
+logging and a full analyze_screenshot_then_log() against the local OpenAI
+stub (openai_stub.py). Runs on Linux; no display, API key or network needed.
+Without a tesseract binary the OCR step is skipped (recorded as "ocr": false)
+and redaction only measures the pixel handling.
+
+Results are written as JSON (default benchmarks/results/<commit>.json) with
+the commit, platform and library versions, so runs can be compared:
+
+    python benchmarks/bench_pipeline.py [--sizes 1080p,1440p,4k,5k] [--repeat 5]
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/abc1234.json
+
+With --compare, steps whose median got slower than --threshold percent are
+listed and the exit status is 1.
+"""
+
+import argparse
+import base64
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+sys.path.insert(0, BENCH_DIR)
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import PIL  # noqa: E402
+from PIL import Image  # noqa: E402
+import pytesseract  # noqa: E402
+
+from activity_logger.capture import SyntheticBackend  # noqa: E402
+from activity_logger.core import ActivityLogger  # noqa: E402
+from activity_logger.encode import ImageEncoder  # noqa: E402
+from activity_logger.frame import Frame  # noqa: E402
+from activity_logger.redact import RedactionCache, redact_image  # noqa: E402
+from activity_logger.window import FakeWindowContextProvider  # noqa: E402
+from openai_stub import start_stub_server  # noqa: E402
+
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "1080p": (1920, 1080),
+    "1440p": (2560, 1440),
+    "4k": (3840, 2160),
+    "5k": (5120, 2880),
+}
+
+
+def encode_image_from_pil(image: Image.Image) -> str:
+    """Legacy baseline: full-resolution PNG as base64, as uploads were encoded before ImageEncoder."""
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return base64.b64encode(buffer.getbuffer()).decode("utf-8")
+
+
+def no_boxes(gray: np.ndarray) -> list:
+    return []
+
+
+def tesseract_version() -> Optional[str]:
+    try:
+        return str(pytesseract.get_tesseract_version())
+    except Exception:
+        return None
+
+
+def git_commit() -> Tuple[str, bool]:
+    """Short commit hash of the tree being measured, and whether it has local changes."""
+    root = os.path.join(BENCH_DIR, "..")
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+
+
+def measure(fn: Callable[[Any], Any], repeat: int, setup: Optional[Callable[[], Any]] = None,
+            warmup: int = 1) -> Dict[str, Any]:
+    """Run fn(setup()) warmup + repeat times; only fn is timed. Returns millisecond statistics."""
+    samples: List[float] = []
+    for i in range(warmup + repeat):
+        arg = setup() if setup is not None else None
+        started = time.perf_counter()
+        fn(arg)
+        elapsed = (time.perf_counter() - started) * 1000.0
+        if i >= warmup:
+            samples.append(elapsed)
+    samples.sort()
+    return {
+        "n": len(samples),
+        "mean_ms": sum(samples) / len(samples),
+        "p50_ms": samples[len(samples) // 2],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+    }
+
+
+def make_logger(workdir: str, base_url: str, ocr: bool) -> ActivityLogger:
+    logger = ActivityLogger(
+        api_key="bench",
+        base_url=base_url,
+        screenshot_folder=os.path.join(workdir, "screenshots"),
+        log_dir=os.path.join(workdir, "logs"),
+        capture_backend=SyntheticBackend(),
+        window_provider=FakeWindowContextProvider(),
+        dedup_distance=None,
+        durable_queue=False,
+        search_index=False,
+        archive_after_days=None,
+        max_screenshots=5,
+    )
+    if not ocr:
+        logger.redaction_cache = RedactionCache(box_finder=no_boxes)
+    logger.engine.start()
+    logger.log_writer.start()
+    logger.screenshot_store.start()
+    return logger
+
+
+def run_suite(sizes: List[str], repeat: int, stub_latency: float, log_entries: int) -> Dict[str, Any]:
+    ocr = tesseract_version() is not None
+    redact_options = {} if ocr else {"box_finder": no_boxes}
+    server, base_url, _ = start_stub_server(latency=stub_latency, seed=0)
+    results: List[Dict[str, Any]] = []
+
+    def record(name: str, resolution: Optional[str], stats: Dict[str, Any]) -> None:
+        results.append(dict(name=name, resolution=resolution, **stats))
+        where = f" @ {resolution}" if resolution else ""
+        print(f"{name + where:42s} p50 {stats['p50_ms']:9.2f} ms  p95 {stats['p95_ms']:9.2f} ms  (n={stats['n']})")
+
+    with tempfile.TemporaryDirectory(prefix="activity-logger-bench-") as workdir:
+        logger = make_logger(workdir, base_url, ocr)
+        try:
+            for label in sizes:
+                backend = SyntheticBackend(size=RESOLUTIONS[label], seed=1)
+                encoder = ImageEncoder()
+                image = backend.grab()
+
+                record("redact_image", label, measure(
+                    lambda img: redact_image(img, **redact_options), repeat, setup=backend.grab))
+                record("redact_image[frame]", label, measure(
+                    lambda frame: redact_image(frame, **redact_options), repeat,
+                    setup=lambda: Frame.from_image(backend.grab())))
+                record("encode_image_from_pil", label, measure(
+                    lambda _: encode_image_from_pil(image), repeat))
+                record("ImageEncoder.encode", label, measure(lambda _: encoder.encode(image), repeat))
+                record("ImageEncoder.encode[frame]", label, measure(
+                    encoder.encode, repeat, setup=lambda: Frame.from_image(image)))
+                record("save_screenshot", label, measure(logger.save_screenshot, repeat, setup=backend.grab))
+                record("analyze_screenshot_then_log", label, measure(
+                    logger.analyze_screenshot_then_log, repeat, setup=backend.grab))
+                logger.screenshot_store.close()  # let queued writes finish before the next size
+                logger.screenshot_store.start()
+
+            record("log_response", None, measure(
+                lambda _: logger.log_response("[Coding] Editing bench_pipeline.py in an editor."),
+                log_entries))
+
+            def log_and_flush(_: Any) -> None:
+                for _ in range(20):
+                    logger.log_response("[Coding] Editing bench_pipeline.py in an editor.")
+                logger.log_writer.flush()
+
+            record("log_response x20 + flush", None, measure(log_and_flush, repeat))
+            retention = logger.retention_stats()
+        finally:
+            logger._cleanup()
+            server.shutdown()
+
+    commit, dirty = git_commit()
+    return {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "pillow": PIL.__version__,
+            "opencv": cv2.__version__,
+            "tesseract": tesseract_version(),
+            "ocr": ocr,
+            "repeat": repeat,
+            "stub_latency": stub_latency,
+            "sizes": sizes,
+            "retention": retention,
+        },
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print median changes against a baseline run; returns the regressed step names."""
+    base = {(r["name"], r["resolution"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')}):")
+    regressions = []
+    for r in current["results"]:
+        old = base.get((r["name"], r["resolution"]))
+        if old is None or not old["p50_ms"]:
+            continue
+        change = (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100.0
+        label = f"{r['name']} @ {r['resolution']}" if r["resolution"] else r["name"]
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{label:42s} {old['p50_ms']:9.2f} -> {r['p50_ms']:9.2f} ms  {change:+6.1f}%{flag}")
+        if flag:
+            regressions.append(label)
+    if baseline["meta"].get("ocr") != current["meta"].get("ocr"):
+        print("note: OCR availability differs between the runs")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(RESOLUTIONS),
+                        help=f"Comma-separated resolutions from {', '.join(RESOLUTIONS)}")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per step")
+    parser.add_argument("--log-entries", type=int, default=200, help="log_response() calls timed")
+    parser.add_argument("--stub-latency", type=float, default=0.0, help="Seconds the OpenAI stub waits per request")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Percent slowdown reported as a regression")
+    args = parser.parse_args()
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in RESOLUTIONS]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    report = run_suite(sizes, args.repeat, args.stub_latency, args.log_entries)
+    output = args.output or os.path.join(BENCH_DIR, "results", f"{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: window-context lookups per Enter press, uncached vs cached.
+
+Simulates the old flow (a full window-list walk at capture time and another at
+analysis time) against one cached snapshot per capture, with an app switch
+every --switch-every presses. Uses FakeWindowContextProvider, so it runs on
+any platform; --query-ms sets the simulated cost of CGWindowListCopyWindowInfo.
+
+    python benchmarks/bench_window_context.py [--presses 500] [--query-ms 3] [--switch-every 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from activity_logger.window import FakeWindowContextProvider  # noqa: E402
+
+WINDOWS = [
+    {"window_id": 1, "bounds": (0, 0, 1920, 1080), "app_name": "Terminal", "window_title": "zsh", "pid": 1},
+    {"window_id": 2, "bounds": (0, 0, 1920, 1080), "app_name": "Slack", "window_title": "#dev", "pid": 2},
+    {"window_id": 3, "bounds": (0, 0, 1920, 1080), "app_name": "Safari", "window_title": "Docs", "pid": 3},
+]
+
+
+def run(presses: int, query_cost: float, switch_every: int, cached: bool) -> dict:
+    provider = FakeWindowContextProvider(WINDOWS, ttl=1.0 if cached else 0.0, query_cost=query_cost)
+    started = time.perf_counter()
+    for i in range(presses):
+        if switch_every and i and i % switch_every == 0:
+            provider.activate()
+        provider.snapshot()          # at capture time
+        if not cached:
+            provider.snapshot()      # the old second lookup at analysis time
+    elapsed = time.perf_counter() - started
+    return {"queries": provider.queries, "ms_per_press": elapsed / presses * 1000.0}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--presses", type=int, default=500)
+    parser.add_argument("--query-ms", type=float, default=3.0)
+    parser.add_argument("--switch-every", type=int, default=10)
+    args = parser.parse_args()
+
+    for label, cached in (("uncached (2 lookups/press)", False), ("cached snapshot", True)):
+        result = run(args.presses, args.query_ms / 1000.0, args.switch_every, cached)
+        print(f"{label:28s} {result['queries']:6d} window-list walks  {result['ms_per_press']:.3f} ms/press")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the OpenAI chat completions endpoint.
+
+Answers POST /v1/chat/completions with a canned activity description per
+image (numbered lines for multi-image requests), so the analysis path can be
+exercised and benchmarked without network access or API cost:
+
+    python benchmarks/openai_stub.py --port 8765 --latency 0.4
+    ActivityLogger(api_key="test", base_url="http://127.0.0.1:8765/v1", ...)
+
+It can also inject 429/500 responses to exercise retry handling. Use
+start_stub_server() to run it in-process.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+CATEGORIES = ("Coding", "Communication", "Writing", "Learning")
+
+
+class StubState:
+    """Behaviour knobs and counters shared by request handlers."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.images = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "images": self.images,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "max_in_flight": self.max_in_flight,
+            }
+
+
+def _count_images(body: Dict[str, Any]) -> int:
+    count = 0
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            count += sum(1 for part in content if part.get("type") == "image_url")
+    return count
+
+
+def _reply(images: int, request_no: int) -> str:
+    if images <= 1:
+        return f"[{CATEGORIES[request_no % len(CATEGORIES)]}] Stub description for request {request_no}."
+    return "\n".join(
+        f"{i}. [{CATEGORIES[i % len(CATEGORIES)]}] Stub description {i} of request {request_no}."
+        for i in range(1, images + 1)
+    )
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    state: StubState = StubState()
+
+    def log_message(self, format: str, *args: Any) -> None:  # keep benchmark output clean
+        pass
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+            return
+
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            request_no = state.requests
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            roll = state.rng.random()
+        try:
+            if state.latency:
+                time.sleep(state.latency)
+            if roll < state.rate_limit_rate:
+                with state.lock:
+                    state.rate_limited += 1
+                self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                                headers={"Retry-After": "0.2"})
+                return
+            if roll < state.rate_limit_rate + state.error_rate:
+                with state.lock:
+                    state.errors += 1
+                self._send_json(500, {"error": {"message": "Injected server error", "type": "server_error"}})
+                return
+
+            images = _count_images(body)
+            with state.lock:
+                state.images += images
+            self._send_json(200, {
+                "id": f"chatcmpl-stub-{request_no}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": _reply(images, request_no)},
+                    "finish_reason": "stop",
+                }],
+                "usage": {"prompt_tokens": 600 + 255 * images, "completion_tokens": 25 * max(images, 1),
+                          "total_tokens": 600 + 280 * max(images, 1)},
+            })
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+
+def start_stub_server(port: int = 0, **options: Any) -> Tuple[ThreadingHTTPServer, str, StubState]:
+    """Serve the stub on a background thread. Returns (server, base_url, state)."""
+    state = StubState(**options)
+    handler = type("BoundStubHandler", (StubHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="openai-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1", state
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction answered with 429")
+    args = parser.parse_args()
+
+    server, base_url, state = start_stub_server(
+        args.port, latency=args.latency, error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+    )
+    print(f"OpenAI stub listening on {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print(json.dumps(state.stats()))
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,199 @@
+"""Offline tests for the durable analysis queue (activity_logger.spool)."""
+
+import os
+import sqlite3
+import time
+
+from activity_logger.spool import FAILED, INFLIGHT, PARK, PENDING, DurableQueue, QueueDrainer
+
+
+def make_queue(tmp_path, **kwargs):
+    kwargs.setdefault("base_backoff", 0.0)
+    return DurableQueue(str(tmp_path), **kwargs)
+
+
+def states(queue):
+    return {state: count for state, count in queue.depth().items() if count}
+
+
+def test_claim_and_ack_remove_job_and_payload(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue(b"frame", "image/png", {"captured_at": "2024-01-01T00:00:00"})
+
+    jobs = queue.claim()
+    assert [job.id for job in jobs] == [job_id]
+    assert jobs[0].read_payload() == b"frame"
+    assert jobs[0].meta == {"captured_at": "2024-01-01T00:00:00"}
+    assert states(queue) == {INFLIGHT: 1}
+    assert queue.claim() == []  # leased jobs aren't handed out twice
+
+    queue.ack(jobs[0])
+    assert states(queue) == {}
+    assert not os.path.exists(jobs[0].payload_path)
+    queue.close()
+
+
+def test_claim_is_oldest_first(tmp_path):
+    queue = make_queue(tmp_path)
+    ids = [queue.enqueue(b"x", "image/png") for _ in range(3)]
+    assert [job.id for job in queue.claim(limit=2)] == ids[:2]
+    assert [job.id for job in queue.claim(limit=2)] == ids[2:]
+    queue.close()
+
+
+def test_nack_retries_after_backoff(tmp_path):
+    queue = make_queue(tmp_path, base_backoff=0.2)
+    queue.enqueue(b"x", "image/png")
+    job = queue.claim()[0]
+
+    queue.nack(job, "timeout")
+    assert states(queue) == {PENDING: 1}
+    assert queue.claim() == []  # not ready until the backoff has passed
+    assert 0.0 < queue.next_available_in() <= 0.2
+
+    time.sleep(0.25)
+    retried = queue.claim()
+    assert [j.id for j in retried] == [job.id]
+    assert retried[0].attempts == 1
+    queue.close()
+
+
+def test_nack_parks_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue(b"x", "image/png")
+    queue.nack(queue.claim()[0], "server error")
+    assert states(queue) == {PENDING: 1}
+    queue.nack(queue.claim()[0], "server error")
+    assert states(queue) == {FAILED: 1}
+    assert queue.claim() == []
+    queue.close()
+
+
+def test_permanent_nack_parks_immediately(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(b"x", "image/png")
+    queue.nack(queue.claim()[0], "401", permanent=True)
+    assert states(queue) == {FAILED: 1}
+    queue.close()
+
+
+def test_claimed_jobs_are_recovered_after_a_crash(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue(b"frame", "image/png")
+    assert queue.claim()[0].id == job_id
+    # Simulate a crash: the process dies holding the lease, without ack or close
+    queue._conn.close()
+
+    orphan = os.path.join(str(tmp_path), "spool", "orphan.png")
+    with open(orphan, "wb") as f:
+        f.write(b"never queued")
+
+    reopened = make_queue(tmp_path)
+    assert states(reopened) == {PENDING: 1}
+    jobs = reopened.claim()
+    assert [job.id for job in jobs] == [job_id]
+    assert jobs[0].read_payload() == b"frame"
+    assert not os.path.exists(orphan)
+    reopened.close()
+
+
+def test_count_cap_evicts_oldest(tmp_path):
+    queue = make_queue(tmp_path, max_jobs=3, max_bytes=None)
+    ids = [queue.enqueue(b"x", "image/png") for _ in range(5)]
+    assert queue.evicted == 2
+    assert [job.id for job in queue.claim(limit=10)] == ids[2:]
+    assert len(os.listdir(queue.spool_dir)) == 3
+    queue.close()
+
+
+def test_byte_cap_evicts_oldest_but_not_in_flight(tmp_path):
+    queue = make_queue(tmp_path, max_jobs=None, max_bytes=250)
+    first = queue.enqueue(b"a" * 100, "image/png")
+    leased = queue.claim()[0]
+    assert leased.id == first
+
+    second = queue.enqueue(b"b" * 100, "image/png")
+    third = queue.enqueue(b"c" * 100, "image/png")
+    # 300 bytes > 250: the oldest job that isn't in flight goes
+    assert queue.evicted == 1
+    assert [job.id for job in queue.claim(limit=10)] == [third]
+    assert os.path.exists(leased.payload_path)
+    assert second not in [row[0] for row in queue._conn.execute("SELECT id FROM jobs")]
+    queue.close()
+
+
+def test_queue_created_before_size_column_is_migrated(tmp_path):
+    conn = sqlite3.connect(os.path.join(str(tmp_path), "queue.db"))
+    conn.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY AUTOINCREMENT, created_at REAL NOT NULL, "
+        "payload TEXT NOT NULL, mime TEXT NOT NULL, meta TEXT NOT NULL, state TEXT NOT NULL, "
+        "attempts INTEGER NOT NULL DEFAULT 0, available_at REAL NOT NULL, leased_until REAL, last_error TEXT)"
+    )
+    conn.close()
+    queue = make_queue(tmp_path, max_jobs=1)
+    queue.enqueue(b"x", "image/png")
+    queue.enqueue(b"y", "image/png")
+    assert states(queue) == {PENDING: 1}
+    queue.close()
+
+
+def test_ack_and_nack_after_close_leave_job_for_recovery(tmp_path):
+    queue = make_queue(tmp_path)
+    queue.enqueue(b"frame", "image/png")
+    job = queue.claim()[0]
+    queue.close()
+
+    queue.ack(job)
+    queue.nack(job, "late")
+    assert queue.claim() == []
+    assert queue.next_available_in() is None
+    assert queue.depth() == {PENDING: 0, INFLIGHT: 1, FAILED: 0}
+    assert os.path.exists(job.payload_path)
+
+    reopened = make_queue(tmp_path)
+    assert [j.id for j in reopened.claim()] == [job.id]
+    reopened.close()
+
+
+def test_drainer_acks_retries_and_parks(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=None)
+    results = {
+        queue.enqueue(b"ok", "image/png"): True,
+        queue.enqueue(b"bad", "image/png"): PARK,
+        queue.enqueue(b"flaky", "image/png"): False,
+    }
+    def handler(jobs):
+        return [results[job.id] for job in jobs]
+
+    drainer = QueueDrainer(queue, handler, idle_poll=0.05)
+    drainer.start()
+    deadline = time.monotonic() + 5.0
+    while drainer.stats()["retried"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    drainer.stop()
+
+    stats = drainer.stats()
+    assert stats["acked"] == 1
+    assert stats["parked"] == 1
+    assert stats["retried"] >= 2  # the flaky job keeps coming back
+    assert states(queue).get(FAILED) == 1
+    assert states(queue).get(PENDING, 0) + states(queue).get(INFLIGHT, 0) == 1
+    queue.close()
+    assert drainer.stats()["depth"][FAILED] == 1  # stats still work after close
+
+
+def test_drainer_retries_the_claim_when_the_handler_raises(tmp_path):
+    queue = make_queue(tmp_path, base_backoff=60.0)
+    queue.enqueue(b"x", "image/png")
+
+    def handler(jobs):
+        raise RuntimeError("boom")
+
+    drainer = QueueDrainer(queue, handler, idle_poll=0.05)
+    drainer.start()
+    deadline = time.monotonic() + 5.0
+    while drainer.stats()["retried"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    drainer.stop()
+    assert states(queue) == {PENDING: 1}
+    queue.close()